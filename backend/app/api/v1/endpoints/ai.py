@@ -1,28 +1,66 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core.auth import get_current_user
+from app.core.exceptions import not_found
 from app.db.session import get_db
-from app.db.models import AttemptFeedback
-from app.services.ai_service import generate_feedback
-from app.schemas.quiz import AIFeedbackOut
+from app.db.models import Attempt, AttemptFeedback, User
+from app.services.ai_service import generate_attempt_feedback, generate_feedback
+from app.schemas.quiz import AIFeedbackOut, AttemptFeedbackOut
 # importar schema de IA desde quiz.py
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
 
+@router.get("/feedback", response_model=AttemptFeedbackOut)
+def ai_attempt_feedback(
+    attempt_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Feedback de todas las respuestas de un attempt (revisión al terminar).
+
+    Una sola query para el attempt completo, en vez de un request (y ~4
+    queries) por `feedback_id`.
+    """
+    items = generate_attempt_feedback(db, attempt_id, current_user.id)
+    db.commit()  # persiste los payloads recién generados
+    if not items:
+        attempt = db.get(Attempt, attempt_id)
+        if not attempt or attempt.user_id != current_user.id:
+            raise not_found("attempt", f"attempt_id={attempt_id}")
+    return {"attempt_id": attempt_id, "items": items}
+
+
 @router.get("/feedback/{feedback_id}", response_model=AIFeedbackOut)
 # agregar response_model para validar respuesta de IA, por el momento no se usa ya que no tenemos la ia_service implementada
 # Se agrego para un futuro cercano xd
-def ai_feedback(feedback_id: int, db: Session = Depends(get_db)):
+def ai_feedback(
+    feedback_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     """
     Endpoint para obtener feedback generado por IA.
     
     Futuro: aquí se llamará al LLM para generar explicaciones personalizadas.
     Hoy: retorna feedback escrito basado en reglas predefinidas.
+    La primera generación queda en `ai_payload` y se reutiliza mientras no
+    cambie `FEEDBACK_GENERATOR_VERSION`.
+
+    Solo el dueño del attempt: un feedback ajeno responde 404 (no se lee ni
+    se genera nada).
     """
-    fb = db.scalar(select(AttemptFeedback).where(AttemptFeedback.id == feedback_id))
+    fb = db.scalar(
+        select(AttemptFeedback)
+        .join(Attempt, Attempt.id == AttemptFeedback.attempt_id)
+        .where(AttemptFeedback.id == feedback_id, Attempt.user_id == current_user.id)
+    )
     if not fb:
-        raise HTTPException(status_code=404, detail="Feedback not found")
+        raise not_found("feedback", f"feedback_id={feedback_id}")
 
-    return generate_feedback(fb, db)
+    payload = generate_feedback(fb, db)
+    db.commit()  # write-through de ai_payload si se generó recién
+    return payload
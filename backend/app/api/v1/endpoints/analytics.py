@@ -0,0 +1,163 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.auth import require_admin_user
+from app.db.models import Question, Subject, Topic
+from app.db.session import get_db
+from app.schemas.analytics import QuestionStatsPageOut, TopicStatsPageOut
+from app.services.analytics import choice_pick_stats, question_stats, topic_stats
+
+# Solo lectura sobre vistas materializadas (services/analytics): los números
+# tienen el atraso del último `scripts/refresh_analytics.py` (`refreshed_at`).
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+    dependencies=[Depends(require_admin_user)],
+)
+
+
+@router.get("/questions", response_model=QuestionStatsPageOut)
+def question_analytics(
+    cursor: Optional[int] = Query(None, ge=1),
+    limit: int = Query(50, ge=1, le=200),
+    subject_code: Optional[str] = None,
+    topic_code: Optional[str] = None,
+    min_answered: int = Query(0, ge=0),
+    max_accuracy: Optional[float] = Query(None, ge=0, le=1),
+    db: Session = Depends(get_db),
+):
+    """
+    GET /api/v1/analytics/questions?topic_code=ALG&min_answered=20&max_accuracy=0.4
+
+    Precisión por pregunta y tasa de elección de cada alternativa (para
+    detectar distractores que nadie elige o claves confusas). Keyset sobre
+    `question_id` descendente, igual que `/questions/`; dos queries por página.
+    """
+    stmt = (
+        select(
+            question_stats,
+            Question.prompt,
+            Question.is_active,
+            Subject.code.label("subject_code"),
+            Topic.code.label("topic_code"),
+        )
+        .join(Question, Question.id == question_stats.c.question_id)
+        .join(Topic, Topic.id == question_stats.c.topic_id)
+        .join(Subject, Subject.id == Topic.subject_id)
+        .order_by(question_stats.c.question_id.desc())
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        stmt = stmt.where(question_stats.c.question_id < cursor)
+    if subject_code is not None:
+        stmt = stmt.where(Subject.code == subject_code)
+    if topic_code is not None:
+        stmt = stmt.where(Topic.code == topic_code)
+    if min_answered:
+        stmt = stmt.where(question_stats.c.answered_count >= min_answered)
+    if max_accuracy is not None:
+        stmt = stmt.where(question_stats.c.accuracy <= max_accuracy)
+
+    rows = db.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    choices_by_question: dict[int, list] = {row.question_id: [] for row in rows}
+    if choices_by_question:
+        for choice in db.execute(
+            select(choice_pick_stats)
+            .where(choice_pick_stats.c.question_id.in_(choices_by_question))
+            .order_by(choice_pick_stats.c.question_id, choice_pick_stats.c.label)
+        ):
+            choices_by_question[choice.question_id].append(choice)
+
+    items = []
+    for row in rows:
+        choices = choices_by_question[row.question_id]
+        picked_total = sum(c.picked_count for c in choices)
+        items.append(
+            {
+                "question_id": row.question_id,
+                "subject_code": row.subject_code,
+                "topic_code": row.topic_code,
+                "prompt": row.prompt,
+                "is_active": row.is_active,
+                "answered_count": row.answered_count,
+                "correct_count": row.correct_count,
+                "accuracy": row.accuracy,
+                "last_answered_at": row.last_answered_at,
+                "choices": [
+                    {
+                        "choice_id": c.choice_id,
+                        "label": c.label,
+                        "is_correct": c.is_correct,
+                        "picked_count": c.picked_count,
+                        "pick_rate": c.picked_count / picked_total if picked_total else None,
+                    }
+                    for c in choices
+                ],
+            }
+        )
+    return {
+        "items": items,
+        "next_cursor": rows[-1].question_id if has_more else None,
+        "refreshed_at": rows[0].refreshed_at if rows else None,
+    }
+
+
+@router.get("/topics", response_model=TopicStatsPageOut)
+def topic_analytics(
+    cursor: Optional[int] = Query(None, ge=1),
+    limit: int = Query(50, ge=1, le=200),
+    subject_code: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    GET /api/v1/analytics/topics?subject_code=M1
+
+    Attempts (iniciados, completados, usuarios distintos), respuestas y
+    puntaje promedio por topic. Keyset sobre `topic_id` ascendente.
+    """
+    stmt = (
+        select(
+            topic_stats,
+            Subject.code.label("subject_code"),
+            Topic.code.label("topic_code"),
+            Topic.name.label("topic_name"),
+        )
+        .join(Topic, Topic.id == topic_stats.c.topic_id)
+        .join(Subject, Subject.id == topic_stats.c.subject_id)
+        .order_by(topic_stats.c.topic_id)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        stmt = stmt.where(topic_stats.c.topic_id > cursor)
+    if subject_code is not None:
+        stmt = stmt.where(Subject.code == subject_code)
+
+    rows = db.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": [
+            {
+                "topic_id": row.topic_id,
+                "subject_code": row.subject_code,
+                "topic_code": row.topic_code,
+                "topic_name": row.topic_name,
+                "attempts_count": row.attempts_count,
+                "completed_count": row.completed_count,
+                "users_count": row.users_count,
+                "answered_count": row.answered_count,
+                "correct_count": row.correct_count,
+                "accuracy": row.correct_count / row.answered_count if row.answered_count else None,
+                "avg_score": float(row.avg_score) if row.avg_score is not None else None,
+            }
+            for row in rows
+        ],
+        "next_cursor": rows[-1].topic_id if has_more else None,
+        "refreshed_at": rows[0].refreshed_at if rows else None,
+    }
@@ -1,25 +1,175 @@
 """
 Catalog endpoints - Exámenes, asignaturas, temas
 Sin autenticación requerida (catálogo público)
+
+Cada endpoint carga su árbol con una sola query (JOIN), se renderiza una vez
+por versión del catálogo a bytes JSON/gzip/brotli (`catalog_cache`) y se sirve
+como `Response` cruda según Accept-Encoding, con ETag fuerte + Cache-Control;
+`If-None-Match` → 304.
 """
-from sqlalchemy import select
+from typing import Optional
+
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, Response
 
 from app.db.session import get_db
-from app.db.models import Exam, Subject, Topic
+from app.db.models import Exam, Subject, Topic, Question
+from app.core.config import settings
 from app.core.exceptions import not_found
+from app.core.http_cache import choose_encoding, etag_matches, not_modified
+from app.services.catalog_cache import COMPRESSED_ENCODINGS, catalog_cache
 
 router = APIRouter(prefix="/catalog", tags=["catalog"])
 
 
+def _catalog_response(entry, if_none_match: Optional[str], accept_encoding: Optional[str]) -> Response:
+    """
+    Sirve el snapshot pre-renderado: bytes ya serializados y comprimidos.
+
+    Retorna 304 si el cliente ya tiene alguna variante de esta versión.
+    """
+    for etag in entry.etags.values():
+        if etag_matches(if_none_match, etag):
+            response = not_modified(etag, settings.CATALOG_CACHE_CONTROL)
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+
+    encoding = choose_encoding(accept_encoding, COMPRESSED_ENCODINGS)
+    headers = {
+        "ETag": entry.etags[encoding],
+        "Cache-Control": settings.CATALOG_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=entry.bodies[encoding], media_type="application/json", headers=headers)
+
+
+def _build_exams(db: Session) -> list:
+    rows = db.execute(
+        select(Exam.id, Exam.code, Exam.name, Subject.id, Subject.code, Subject.name)
+        .outerjoin(Subject, Subject.exam_id == Exam.id)
+        .order_by(Exam.id.asc(), Subject.id.asc())
+    ).all()
+
+    exams: dict[int, dict] = {}
+    for exam_id, exam_code, exam_name, subject_id, subject_code, subject_name in rows:
+        exam = exams.setdefault(
+            exam_id,
+            {"exam_id": exam_id, "code": exam_code, "name": exam_name, "subjects": []},
+        )
+        if subject_id is not None:
+            exam["subjects"].append(
+                {"subject_id": subject_id, "subject_code": subject_code, "name": subject_name}
+            )
+    return list(exams.values())
+
+
+def _build_subjects(db: Session, exam_id: int) -> Optional[list]:
+    rows = db.execute(
+        select(Subject.id, Subject.code, Subject.name, Topic.id, Topic.code, Topic.name)
+        .select_from(Exam)
+        .outerjoin(Subject, Subject.exam_id == Exam.id)
+        .outerjoin(Topic, Topic.subject_id == Subject.id)
+        .where(Exam.id == exam_id)
+        .order_by(Subject.id.asc(), Topic.id.asc())
+    ).all()
+    if not rows:
+        return None
+
+    subjects: dict[int, dict] = {}
+    for subject_id, subject_code, subject_name, topic_id, topic_code, topic_name in rows:
+        if subject_id is None:
+            continue
+        subject = subjects.setdefault(
+            subject_id,
+            {"subject_id": subject_id, "subject_code": subject_code, "name": subject_name, "topics": []},
+        )
+        if topic_id is not None:
+            subject["topics"].append({"topic_id": topic_id, "topic_code": topic_code, "name": topic_name})
+    return list(subjects.values())
+
+
+def _build_topics(db: Session, subject_id: int) -> Optional[list]:
+    rows = db.execute(
+        select(Topic.id, Topic.code, Topic.name)
+        .select_from(Subject)
+        .outerjoin(Topic, Topic.subject_id == Subject.id)
+        .where(Subject.id == subject_id)
+        .order_by(Topic.id.asc())
+    ).all()
+    if not rows:
+        return None
+
+    return [
+        {"topic_id": topic_id, "topic_code": code, "name": name}
+        for topic_id, code, name in rows
+        if topic_id is not None
+    ]
+
+
+def _build_tree(db: Session) -> list:
+    rows = db.execute(
+        select(
+            Exam.id, Exam.code, Exam.name,
+            Subject.id, Subject.code, Subject.name,
+            Topic.id, Topic.code, Topic.name,
+        )
+        .outerjoin(Subject, Subject.exam_id == Exam.id)
+        .outerjoin(Topic, Topic.subject_id == Subject.id)
+        .order_by(Exam.id.asc(), Subject.id.asc(), Topic.id.asc())
+    ).all()
+
+    # Un solo agregado para todos los conteos (no una query por topic).
+    counts: dict[int, dict[str, int]] = {}
+    for topic_id, difficulty, total in db.execute(
+        select(Question.topic_id, Question.difficulty, func.count())
+        .where(Question.is_active == True)  # noqa: E712
+        .group_by(Question.topic_id, Question.difficulty)
+    ).all():
+        counts.setdefault(topic_id, {})[str(difficulty)] = total
+
+    exams: dict[int, dict] = {}
+    subjects: dict[int, dict] = {}
+    for exam_id, exam_code, exam_name, subject_id, subject_code, subject_name, topic_id, topic_code, topic_name in rows:
+        exam = exams.setdefault(
+            exam_id,
+            {"exam_id": exam_id, "code": exam_code, "name": exam_name, "subjects": []},
+        )
+        if subject_id is None:
+            continue
+        subject = subjects.get(subject_id)
+        if subject is None:
+            subject = {"subject_id": subject_id, "subject_code": subject_code, "name": subject_name, "topics": []}
+            subjects[subject_id] = subject
+            exam["subjects"].append(subject)
+        if topic_id is None:
+            continue
+        by_difficulty = counts.get(topic_id, {})
+        subject["topics"].append(
+            {
+                "topic_id": topic_id,
+                "topic_code": topic_code,
+                "name": topic_name,
+                "question_count": sum(by_difficulty.values()),
+                "questions_by_difficulty": by_difficulty,
+            }
+        )
+    return list(exams.values())
+
+
 @router.get("/exams/")
-def get_exams(db: Session = Depends(get_db)):
+def get_exams(
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     """
     GET /api/v1/catalog/exams/
-    
+
     Obtiene lista de exámenes disponibles.
-    
+
     Returns:
     [
         {
@@ -30,41 +180,25 @@ def get_exams(db: Session = Depends(get_db)):
         }
     ]
     """
-    exams = db.scalars(select(Exam)).all()
-    
-    result = []
-    for exam in exams:
-        subjects = db.scalars(
-            select(Subject).where(Subject.exam_id == exam.id)
-        ).all()
-        
-        result.append({
-            "exam_id": exam.id,
-            "code": exam.code,
-            "name": exam.name,
-            "subjects": [
-                {
-                    "subject_id": s.id,
-                    "subject_code": s.code,
-                    "name": s.name
-                }
-                for s in subjects
-            ]
-        })
-    
-    return result
+    entry = catalog_cache.get_or_build(("exams",), lambda: _build_exams(db))
+    return _catalog_response(entry, if_none_match, accept_encoding)
 
 
 @router.get("/subjects/")
-def get_subjects(exam_id: int = Query(...), db: Session = Depends(get_db)):
+def get_subjects(
+    exam_id: int = Query(...),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     """
     GET /api/v1/catalog/subjects/?exam_id=1
-    
+
     Obtiene asignaturas de un examen.
-    
+
     Query params:
     - exam_id: ID del examen
-    
+
     Returns:
     [
         {
@@ -75,47 +209,27 @@ def get_subjects(exam_id: int = Query(...), db: Session = Depends(get_db)):
         }
     ]
     """
-    exam = db.scalar(select(Exam).where(Exam.id == exam_id))
-    if not exam:
+    entry = catalog_cache.get_or_build(("subjects", exam_id), lambda: _build_subjects(db, exam_id))
+    if entry is None:
         raise not_found("exam_not_found", f"Exam {exam_id} not found")
-    
-    subjects = db.scalars(
-        select(Subject).where(Subject.exam_id == exam_id)
-    ).all()
-    
-    result = []
-    for subject in subjects:
-        topics = db.scalars(
-            select(Topic).where(Topic.subject_id == subject.id)
-        ).all()
-        
-        result.append({
-            "subject_id": subject.id,
-            "subject_code": subject.code,
-            "name": subject.name,
-            "topics": [
-                {
-                    "topic_id": t.id,
-                    "topic_code": t.code,
-                    "name": t.name
-                }
-                for t in topics
-            ]
-        })
-    
-    return result
+    return _catalog_response(entry, if_none_match, accept_encoding)
 
 
 @router.get("/topics/")
-def get_topics(subject_id: int = Query(...), db: Session = Depends(get_db)):
+def get_topics(
+    subject_id: int = Query(...),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     """
     GET /api/v1/catalog/topics/?subject_id=1
-    
+
     Obtiene temas de una asignatura.
-    
+
     Query params:
     - subject_id: ID de la asignatura
-    
+
     Returns:
     [
         {
@@ -125,19 +239,49 @@ def get_topics(subject_id: int = Query(...), db: Session = Depends(get_db)):
         }
     ]
     """
-    subject = db.scalar(select(Subject).where(Subject.id == subject_id))
-    if not subject:
+    entry = catalog_cache.get_or_build(("topics", subject_id), lambda: _build_topics(db, subject_id))
+    if entry is None:
         raise not_found("subject_not_found", f"Subject {subject_id} not found")
-    
-    topics = db.scalars(
-        select(Topic).where(Topic.subject_id == subject_id)
-    ).all()
-    
-    return [
+    return _catalog_response(entry, if_none_match, accept_encoding)
+
+
+@router.get("/tree")
+def get_catalog_tree(
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """
+    GET /api/v1/catalog/tree
+
+    Árbol completo exams → subjects → topics con el conteo de preguntas
+    activas por topic y por dificultad (1=facil, 2=medio, 3=dificil).
+    Se invalida cuando los endpoints admin de `questions` escriben.
+
+    Returns:
+    [
         {
-            "topic_id": t.id,
-            "topic_code": t.code,
-            "name": t.name
+            "exam_id": 1,
+            "code": "PAES",
+            "name": "PAES",
+            "subjects": [
+                {
+                    "subject_id": 2,
+                    "subject_code": "M1",
+                    "name": "Matemática 1",
+                    "topics": [
+                        {
+                            "topic_id": 7,
+                            "topic_code": "ALG",
+                            "name": "Álgebra",
+                            "question_count": 6,
+                            "questions_by_difficulty": {"1": 4, "2": 2}
+                        }
+                    ]
+                }
+            ]
         }
-        for t in topics
     ]
+    """
+    entry = catalog_cache.get_or_build(("tree",), lambda: _build_tree(db))
+    return _catalog_response(entry, if_none_match, accept_encoding)
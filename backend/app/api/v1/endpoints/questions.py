@@ -1,22 +1,48 @@
 from datetime import datetime
 import logging
-from typing import List
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Integer, any_, func, literal, literal_column, or_, select, union, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 
 from app.core.auth import require_admin_user
 from app.core.config import settings
-from app.core.exceptions import bad_request, not_found
-from app.db.models import Exam, Subject, Topic, Question, QuestionChoice
+from app.core.exceptions import bad_request, conflict, internal_error, not_found
+from app.db.models import Exam, ImportJob, Passage, Subject, Topic, Question, QuestionChoice, User
 from app.db.session import get_db
+from app.services import import_jobs
+from app.services.catalog_cache import catalog_cache
+from app.services.question_import import (
+    IMPORT_FORMATS,
+    ImportAborted,
+    QuestionValidator,
+    import_questions,
+    insert_questions,
+    iter_import_rows,
+    near_duplicate_error,
+    question_content_hash,
+    question_minhash,
+    split_duplicates,
+)
+from app.services.passages import resolve_passages
+from app.services.question_export import EXPORT_MEDIA_TYPES, export_chunks, iter_export_questions
+from app.services.near_duplicates import near_duplicate_index, near_duplicates_enabled, signature_to_bytes
 from app.schemas.questions import (
     QuestionCreateIn,
     QuestionCreatedOut,
     RecentQuestionOut,
     BulkQuestionCreateIn,
     BulkQuestionCreateOut,
+    QuestionImportOut,
+    ImportJobOut,
+    QuestionPageOut,
+    QuestionSearchOut,
+    QuestionBulkUpdateIn,
+    QuestionBulkUpdateOut,
 )
 
 router = APIRouter(
@@ -29,6 +55,7 @@ router = APIRouter(
 @router.post("/", response_model=QuestionCreatedOut)
 def create_question(
     payload: QuestionCreateIn,
+    allow_near_duplicates: bool = False,
     db: Session = Depends(get_db),
 ):
     exam = db.scalar(select(Exam).where(Exam.code == settings.PAES_CODE))
@@ -64,18 +91,42 @@ def create_question(
     if isinstance(payload.prompt, str) and payload.prompt.strip().startswith("[TEST]"):
         raise bad_request("test_question", "Preguntas marcadas como [TEST] no están permitidas en la DB")
 
+    # Dedupe exacto: lookup sobre el índice único (content_hash, topic_id).
+    question_hash = question_content_hash(payload)
+    existing_id = db.scalar(
+        select(Question.id).where(Question.content_hash == question_hash, Question.topic_id == topic.id)
+    )
+    if existing_id:
+        raise conflict("question", f"Ya existe una pregunta igual en el topic (question_id={existing_id})")
+
+    # Casi duplicados: búsqueda LSH en memoria (sub-lineal), no contra todo el banco.
+    signature = question_minhash(payload)
+    if signature is not None and near_duplicates_enabled() and not allow_near_duplicates:
+        near_duplicate_index.refresh(db)
+        matches = near_duplicate_index.query(signature, topic.id)
+        if matches:
+            raise conflict("near_duplicate", near_duplicate_error(matches)["detail"])
+
+    passage_ids = resolve_passages(db, [payload.reading_text])
     question = Question(
         topic_id=topic.id,
         prompt=payload.prompt,
-        reading_text=payload.reading_text,
+        passage_id=passage_ids.get(payload.reading_text),
         explanation=payload.explanation,
         difficulty=payload.difficulty,
         question_type="mcq",
         is_active=True,
         created_at=datetime.utcnow(),
+        content_hash=question_hash,
+        minhash=signature_to_bytes(signature),
     )
     db.add(question)
-    db.flush()
+    try:
+        db.flush()
+    except IntegrityError:
+        # carrera con otra request que creó la misma pregunta
+        db.rollback()
+        raise conflict("question", "Ya existe una pregunta igual en el topic")
 
     created_choices: List[QuestionChoice] = []
     for choice in payload.choices:
@@ -90,6 +141,7 @@ def create_question(
 
     db.flush()
     db.commit()
+    catalog_cache.invalidate()
 
     # Audit log: registra creación para facilitar trazabilidad en el futuro.
     logger = logging.getLogger(__name__)
@@ -108,7 +160,8 @@ def create_question(
         "subject_code": payload.subject_code,
         "topic_code": payload.topic_code,
         "prompt": question.prompt,
-        "reading_text": question.reading_text,
+        "reading_text": payload.reading_text,
+        "passage_id": question.passage_id,
         "explanation": question.explanation,
         "difficulty": question.difficulty,
         "choices": [
@@ -131,100 +184,30 @@ def create_questions_bulk(
             f"{settings.PAES_CODE} exam no inicializado. Ejecutar seed_paes.py",
         )
 
-    # Caché local de subjects/topics para reducir llamadas repetidas a la DB.
-    # Propósito: evitar múltiples roundtrips a la BD durante la validación y creación
-    # de preguntas en operaciones bulk, mejorando latencia y consistencia.
-    subject_cache: dict[str, Subject] = {}
-    topic_cache: dict[tuple[str, str], Topic] = {}
-
-    errors: list[dict] = []
-    created_question_ids: list[int] = []
-
-    def resolve_subject(subject_code: str) -> Subject | None:
-        cached = subject_cache.get(subject_code)
-        if cached:
-            return cached
-        subject = db.scalar(
-            select(Subject).where(Subject.exam_id == exam.id, Subject.code == subject_code)
-        )
-        if subject:
-            subject_cache[subject_code] = subject
-        return subject
-
-    def resolve_topic(subject_code: str, topic_code: str) -> Topic | None:
-        key = (subject_code, topic_code)
-        cached = topic_cache.get(key)
-        if cached:
-            return cached
-        subject = resolve_subject(subject_code)
-        if not subject:
-            return None
-        topic = db.scalar(
-            select(Topic).where(Topic.subject_id == subject.id, Topic.code == topic_code)
-        )
-        if topic:
-            topic_cache[key] = topic
-        return topic
-
-    # Primera pasada: validar todos los ítems del payload y preparar objetos.
+    # Primera pasada: validar todos los ítems del payload antes de escribir.
     # Propósito: detectar errores (subjects/topics no existentes, choices inválidas,
     # o preguntas marcadas como test) antes de escribir nada en la base de datos.
-    prepared: list[tuple[QuestionCreateIn, Topic]] = []
+    # El validador carga subjects/topics del exam en una sola query.
+    validator = QuestionValidator(db, exam)
+    errors: list[dict] = []
+    valid: list[tuple[int, QuestionCreateIn, int]] = []
     for index, q in enumerate(payload.questions):
-        # Bloqueo de preguntas de prueba (bulk):
-        # Propósito: rechazar explícitamente preguntas marcadas como [TEST]
-        # para evitar que datos de prueba se filtren a la BD de producción.
-        if isinstance(q.prompt, str) and q.prompt.strip().startswith("[TEST]"):
-            errors.append(
-                {
-                    "index": index,
-                    "error": "test_question",
-                    "detail": "Preguntas marcadas como [TEST] no están permitidas",
-                }
-            )
-            continue
-        topic = resolve_topic(q.subject_code, q.topic_code)
-        if not topic:
-            # Determine which entity is missing for better error messaging.
-            if not resolve_subject(q.subject_code):
-                errors.append(
-                    {
-                        "index": index,
-                        "error": "subject_not_found",
-                        "detail": f"subject_code={q.subject_code} en exam={exam.code}",
-                    }
-                )
-            else:
-                errors.append(
-                    {
-                        "index": index,
-                        "error": "topic_not_found",
-                        "detail": f"topic_code={q.topic_code} en subject_code={q.subject_code}",
-                    }
-                )
+        topic_id, error = validator.validate(q)
+        if error:
+            errors.append({"index": index, **error})
             continue
+        valid.append((index, q, topic_id))
 
-        labels = [c.label for c in q.choices]
-        if len(set(labels)) != 4:
-            errors.append(
-                {
-                    "index": index,
-                    "error": "invalid_choices",
-                    "detail": "Las alternativas deben tener labels únicos (A/B/C/D)",
-                }
-            )
-            continue
-        if q.correct_choice not in set(labels):
-            errors.append(
-                {
-                    "index": index,
-                    "error": "invalid_correct_choice",
-                    "detail": "correct_choice debe existir dentro de choices",
-                }
-            )
-            continue
-
-        prepared.append((q, topic))
+    # Duplicados exactos (ya en la BD o repetidos en el lote): una sola query
+    # sobre el índice único (content_hash, topic_id). Casi duplicados: índice
+    # LSH en memoria, salvo con allow_near_duplicates.
+    prepared, duplicates = split_duplicates(
+        db, [(q, topic_id) for _, q, topic_id in valid], payload.allow_near_duplicates
+    )
+    if duplicates:
+        for position, error in duplicates.items():
+            errors.append({"index": valid[position][0], **error})
+        errors.sort(key=lambda e: e["index"])
 
     if payload.atomic and errors:
         return {
@@ -249,36 +232,16 @@ def create_questions_bulk(
         }
 
     # Segunda pasada: escribir en la BD solo los ítems que pasaron validación.
-    # Propósito: realizar la inserción en bloque de preguntas válidas y garantizar
-    # que la operación sea atómica según la opción `atomic` del payload.
+    # Propósito: insertar en dos sentencias multi-fila (preguntas con RETURNING
+    # de ids + todas las alternativas) en vez de un flush por pregunta.
     try:
-        for q, topic in prepared:
-            question = Question(
-                topic_id=topic.id,
-                prompt=q.prompt,
-                reading_text=q.reading_text,
-                explanation=q.explanation,
-                difficulty=q.difficulty,
-                question_type="mcq",
-                is_active=True,
-                created_at=datetime.utcnow(),
-            )
-            db.add(question)
-            db.flush()
-
-            for choice in q.choices:
-                db.add(
-                    QuestionChoice(
-                        question_id=question.id,
-                        label=choice.label,
-                        text=choice.text,
-                        is_correct=(choice.label == q.correct_choice),
-                    )
-                )
-
-            created_question_ids.append(question.id)
-
+        created_question_ids = insert_questions(db, prepared)
         db.commit()
+        catalog_cache.invalidate()
+    except IntegrityError:
+        # carrera con otra carga que insertó alguna de las mismas preguntas
+        db.rollback()
+        raise conflict("question", "Otra carga insertó preguntas iguales; reintentar el lote")
     except Exception:
         db.rollback()
         raise
@@ -294,46 +257,545 @@ def create_questions_bulk(
     }
 
 
-@router.get("/recent", response_model=List[RecentQuestionOut])
-def list_recent_questions(
-    limit: int = 10,
+@router.post("/bulk-update", response_model=QuestionBulkUpdateOut)
+def bulk_update_questions(
+    payload: QuestionBulkUpdateIn,
     db: Session = Depends(get_db),
 ):
-    limit = max(1, min(50, limit))
+    """
+    POST /api/v1/questions/bulk-update
+
+    Activa/desactiva, cambia dificultad o mueve de topic un conjunto de
+    preguntas (`question_ids` o `filter`) con un solo `UPDATE ... WHERE`,
+    sin cargar objetos ORM. Solo cuenta (y escribe) las filas que cambian.
+    Invalida el catálogo, que expone conteos por topic y dificultad, y al
+    mover de topic re-indexa las preguntas movidas en el índice de casi
+    duplicados (sus buckets son por topic).
+    """
+    if (payload.question_ids is None) == (payload.filter is None):
+        raise bad_request("invalid_selection", "Enviar question_ids o filter (solo uno de los dos)")
+
+    changes = payload.changes
+    if (changes.subject_code is None) != (changes.topic_code is None):
+        raise bad_request("invalid_changes", "Mover de topic requiere subject_code y topic_code")
+
+    # el filtro y el topic destino se resuelven dentro del exam PAES
+    selection = payload.filter
+    exam = None
+    if changes.topic_code is not None or selection is not None:
+        exam = db.scalar(select(Exam).where(Exam.code == settings.PAES_CODE))
+        if not exam:
+            raise bad_request(
+                "exam_not_seeded",
+                f"{settings.PAES_CODE} exam no inicializado. Ejecutar seed_paes.py",
+            )
+
+    values: dict = {}
+    if changes.is_active is not None:
+        values["is_active"] = changes.is_active
+    if changes.difficulty is not None:
+        values["difficulty"] = changes.difficulty
+    if changes.topic_code is not None:
+        topic_id = db.scalar(
+            select(Topic.id)
+            .join(Subject, Subject.id == Topic.subject_id)
+            .where(
+                Subject.exam_id == exam.id,
+                Subject.code == changes.subject_code,
+                Topic.code == changes.topic_code,
+            )
+        )
+        if topic_id is None:
+            raise not_found(
+                "topic",
+                f"topic_code={changes.topic_code} en subject_code={changes.subject_code}",
+            )
+        values["topic_id"] = topic_id
+    if not values:
+        raise bad_request("invalid_changes", "changes no trae campos a modificar")
+
+    if payload.question_ids is not None:
+        # un solo parámetro array (= ANY) en vez de un placeholder por id
+        conditions = [Question.id == any_(literal(payload.question_ids, ARRAY(Integer)))]
+    else:
+        if all(
+            value is None
+            for value in (selection.subject_code, selection.topic_code, selection.difficulty, selection.is_active)
+        ):
+            raise bad_request("invalid_selection", "filter vacío: usar al menos un criterio")
+        # siempre acotado al exam PAES, aunque el filtro no traiga subject/topic
+        topic_ids = (
+            select(Topic.id)
+            .join(Subject, Subject.id == Topic.subject_id)
+            .where(Subject.exam_id == exam.id)
+        )
+        if selection.subject_code is not None:
+            topic_ids = topic_ids.where(Subject.code == selection.subject_code)
+        if selection.topic_code is not None:
+            topic_ids = topic_ids.where(Topic.code == selection.topic_code)
+        conditions = [Question.topic_id.in_(topic_ids)]
+        if selection.difficulty is not None:
+            conditions.append(Question.difficulty == selection.difficulty)
+        if selection.is_active is not None:
+            conditions.append(Question.is_active == selection.is_active)
+
+    # filas que ya tienen los valores pedidos no se tocan ni se cuentan
+    conditions.append(or_(*(getattr(Question, column).is_distinct_from(value) for column, value in values.items())))
+
+    if payload.dry_run:
+        count = db.scalar(select(func.count()).select_from(Question).where(*conditions))
+        return {"dry_run": True, "updated": count}
+
+    moves_topic = "topic_id" in values
+    statement = update(Question).where(*conditions).values(**values)
+    if moves_topic:
+        statement = statement.returning(Question.id)
+    try:
+        result = db.execute(statement.execution_options(synchronize_session=False))
+        moved_ids = list(result.scalars()) if moves_topic else []
+        db.commit()
+    except IntegrityError:
+        # (content_hash, topic_id) único: el topic destino ya tiene alguna de las preguntas
+        db.rollback()
+        raise conflict("question", "El topic destino ya tiene una pregunta igual a alguna de las seleccionadas")
+    except Exception:
+        db.rollback()
+        raise
+
+    updated = len(moved_ids) if moves_topic else result.rowcount
+    if updated:
+        catalog_cache.invalidate()
+    if moved_ids and near_duplicates_enabled():
+        near_duplicate_index.reindex(db, moved_ids)
+    logging.getLogger(__name__).info(
+        "Preguntas actualizadas en bloque: %s filas, cambios=%s", updated, values
+    )
+    return {"dry_run": False, "updated": updated}
+
+
+def _detect_import_format(file: UploadFile) -> Optional[str]:
+    filename = (file.filename or "").lower()
+    if filename.endswith(".csv"):
+        return "csv"
+    if filename.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    content_type = (file.content_type or "").lower()
+    if "csv" in content_type:
+        return "csv"
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    return None
+
+
+def _resolve_import_format(file: UploadFile, fmt: Optional[str]) -> str:
+    fmt = fmt or _detect_import_format(file)
+    if fmt not in IMPORT_FORMATS:
+        raise bad_request(
+            "unsupported_format",
+            "Usar archivos .ndjson/.jsonl o .csv, o indicar ?format=ndjson|csv",
+        )
+    return fmt
+
+
+@router.post("/import", response_model=QuestionImportOut)
+def import_questions_file(
+    file: UploadFile = File(...),
+    format: Optional[Literal["ndjson", "csv"]] = Query(None),
+    chunk_size: int = Query(settings.IMPORT_CHUNK_SIZE, ge=1),
+    dry_run: bool = False,
+    allow_near_duplicates: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    POST /api/v1/questions/import  (multipart, campo `file`)
+
+    Importa preguntas desde un archivo NDJSON (un objeto como en /questions/bulk
+    por línea) o CSV (columnas subject_code, topic_code, prompt, reading_text,
+    explanation, difficulty, choice_a..choice_d, correct_choice).
+
+    El archivo se lee en streaming (el upload queda en disco, no en memoria) y
+    se valida fila a fila con las mismas reglas que /questions/bulk. Las filas
+    válidas se insertan en chunks de `chunk_size` con un commit por chunk: no
+    hay modo `atomic`, un error de BD deja confirmados los chunks anteriores.
+
+    Si el import se detiene (CSV malformado, encoding, conflicto con otra
+    carga, error de BD) la respuesta de error trae `row` y `summary` con lo
+    ya confirmado.
+    """
+    fmt = _resolve_import_format(file, format)
+    chunk_size = min(chunk_size, settings.IMPORT_MAX_CHUNK_SIZE)
+
+    exam = db.scalar(select(Exam).where(Exam.code == settings.PAES_CODE))
+    if not exam:
+        raise bad_request(
+            "exam_not_seeded",
+            f"{settings.PAES_CODE} exam no inicializado. Ejecutar seed_paes.py",
+        )
+    validator = QuestionValidator(db, exam)
 
-    rows = db.scalars(select(Question).order_by(Question.id.desc()).limit(limit)).all()
-
-    # Pre-cargar relaciones (choices + topic->subject)
-    # Propósito: evitar consultas N+1 al serializar la respuesta `recent`.
-    result: List[RecentQuestionOut] = []
-    for q in rows:
-        topic = db.get(Topic, q.topic_id)
-        subject_code = ""
-        topic_code = ""
-        if topic:
-            topic_code = topic.code
-            subject = db.get(Subject, topic.subject_id)
-            if subject:
-                subject_code = subject.code
-
-        choices = db.scalars(
-            select(QuestionChoice).where(QuestionChoice.question_id == q.id).order_by(QuestionChoice.label.asc())
-        ).all()
-
-        result.append(
+    try:
+        summary = import_questions(
+            db,
+            validator,
+            iter_import_rows(file.file, fmt),
+            chunk_size=chunk_size,
+            dry_run=dry_run,
+            max_errors=settings.IMPORT_MAX_REPORTED_ERRORS,
+            allow_near_duplicates=allow_near_duplicates,
+        )
+    except ImportAborted as exc:
+        raise _import_aborted_error(exc, fmt, dry_run, chunk_size)
+    finally:
+        # Los chunks confirmados ya son visibles aunque el import falle después.
+        if not dry_run:
+            catalog_cache.invalidate()
+
+    logging.getLogger(__name__).info(
+        "Import de preguntas: format=%s total=%s created=%s skipped=%s dry_run=%s",
+        fmt,
+        summary["total"],
+        summary["created"],
+        summary["skipped"],
+        dry_run,
+    )
+    return {"format": fmt, "dry_run": dry_run, "chunk_size": chunk_size, **summary}
+
+
+def _import_aborted_error(exc: ImportAborted, fmt: str, dry_run: bool, chunk_size: int) -> HTTPException:
+    if exc.status_code == status.HTTP_409_CONFLICT:
+        error = conflict("question", exc.detail)
+    elif exc.status_code >= 500:
+        error = internal_error(exc.error, exc.detail)
+    else:
+        error = bad_request(exc.error, exc.detail)
+    summary = {k: v for k, v in (exc.summary or {}).items() if k != "cancelled"}
+    error.detail["row"] = exc.row
+    error.detail["summary"] = {"format": fmt, "dry_run": dry_run, "chunk_size": chunk_size, **summary}
+    return error
+
+
+def _import_job_payload(job: ImportJob) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "format": job.format,
+        "filename": job.filename,
+        "dry_run": job.dry_run,
+        "chunk_size": job.chunk_size,
+        "allow_near_duplicates": job.allow_near_duplicates,
+        "rows_processed": job.rows_processed,
+        "created": job.created_count,
+        "skipped": job.skipped_count,
+        "chunks_committed": job.chunks_committed,
+        "errors": job.errors or [],
+        "errors_truncated": job.errors_truncated,
+        "error_message": job.error_message,
+        "cancel_requested": job.cancel_requested,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+@router.post("/import-jobs", response_model=ImportJobOut, status_code=status.HTTP_202_ACCEPTED)
+def submit_import_job(
+    file: UploadFile = File(...),
+    format: Optional[Literal["ndjson", "csv"]] = Query(None),
+    chunk_size: int = Query(settings.IMPORT_CHUNK_SIZE, ge=1),
+    dry_run: bool = False,
+    allow_near_duplicates: bool = False,
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_admin_user),
+):
+    """
+    POST /api/v1/questions/import-jobs  (multipart, campo `file`) -> 202
+
+    Igual que /questions/import, pero en segundo plano: responde de inmediato
+    con el job en `queued`. El progreso se consulta con
+    GET /questions/import-jobs/{job_id}.
+    """
+    fmt = _resolve_import_format(file, format)
+    chunk_size = min(chunk_size, settings.IMPORT_MAX_CHUNK_SIZE)
+
+    job = import_jobs.create_job(
+        db,
+        file.file,
+        file.filename,
+        fmt,
+        chunk_size=chunk_size,
+        dry_run=dry_run,
+        user_id=admin.id,
+        allow_near_duplicates=allow_near_duplicates,
+    )
+    payload = _import_job_payload(job)
+    import_jobs.enqueue(job.id)
+    return payload
+
+
+@router.get("/import-jobs", response_model=List[ImportJobOut])
+def list_import_jobs(
+    limit: int = 20,
+    db: Session = Depends(get_db),
+):
+    limit = max(1, min(100, limit))
+    jobs = db.scalars(select(ImportJob).order_by(ImportJob.id.desc()).limit(limit)).all()
+    return [_import_job_payload(job) for job in jobs]
+
+
+@router.get("/import-jobs/{job_id}", response_model=ImportJobOut)
+def get_import_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+):
+    job = db.get(ImportJob, job_id)
+    if not job:
+        raise not_found("import_job", f"job_id={job_id}")
+    return _import_job_payload(job)
+
+
+@router.post("/import-jobs/{job_id}/cancel", response_model=ImportJobOut)
+def cancel_import_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+):
+    """
+    Cancela un job en cola de inmediato; si ya está corriendo, se detiene en
+    el próximo chunk (los chunks ya confirmados quedan creados).
+    """
+    job = db.get(ImportJob, job_id)
+    if not job:
+        raise not_found("import_job", f"job_id={job_id}")
+    if job.status in import_jobs.FINISHED_STATUSES:
+        raise conflict("import_job", f"El job ya terminó (status={job.status})")
+
+    job = import_jobs.request_cancel(db, job_id)
+    return _import_job_payload(job)
+
+
+def _question_list_item(question: Question, subject_code: str, topic_code: str) -> dict:
+    choices = sorted(question.choices, key=lambda c: c.label)
+    return {
+        "question_id": question.id,
+        "subject_code": subject_code,
+        "topic_code": topic_code,
+        "prompt": question.prompt,
+        "passage_id": question.passage_id,
+        "difficulty": question.difficulty,
+        "is_active": question.is_active,
+        "created_at": question.created_at.isoformat() if question.created_at else "",
+        "choices": [{"id": c.id, "label": c.label, "text": c.text} for c in choices],
+        "correct_choice": next((c.label for c in choices if c.is_correct), None),
+    }
+
+
+def _list_questions_page(
+    db: Session,
+    limit: int,
+    cursor: Optional[int] = None,
+    subject_code: Optional[str] = None,
+    topic_code: Optional[str] = None,
+    difficulty: Optional[int] = None,
+    is_active: Optional[bool] = None,
+) -> dict:
+    """
+    Página de preguntas de la más nueva a la más antigua (keyset sobre `id`).
+
+    Dos queries sin importar el tamaño de la página: preguntas + códigos de
+    topic/subject en un join, y las alternativas de todas con `selectinload`.
+    `cursor` es el último `question_id` de la página anterior; pedir la página
+    N cuesta lo mismo que la primera (sin OFFSET).
+    """
+    stmt = (
+        select(Question, Subject.code, Topic.code)
+        .join(Topic, Topic.id == Question.topic_id)
+        .join(Subject, Subject.id == Topic.subject_id)
+        .options(selectinload(Question.choices))
+        .order_by(Question.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        stmt = stmt.where(Question.id < cursor)
+    if subject_code is not None:
+        stmt = stmt.where(Subject.code == subject_code)
+    if topic_code is not None:
+        stmt = stmt.where(Topic.code == topic_code)
+    if difficulty is not None:
+        stmt = stmt.where(Question.difficulty == difficulty)
+    if is_active is not None:
+        stmt = stmt.where(Question.is_active == is_active)
+
+    rows = db.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": [_question_list_item(q, subject, topic) for q, subject, topic in rows],
+        "next_cursor": rows[-1][0].id if has_more else None,
+    }
+
+
+@router.get("/", response_model=QuestionPageOut)
+def list_questions(
+    cursor: Optional[int] = Query(None, ge=1),
+    limit: int = Query(50, ge=1, le=200),
+    subject_code: Optional[str] = None,
+    topic_code: Optional[str] = None,
+    difficulty: Optional[int] = Query(None, ge=1, le=3),
+    is_active: Optional[bool] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    GET /api/v1/questions/?subject_code=M1&topic_code=ALG&difficulty=2&is_active=true&limit=50
+
+    Listado paginado para administrar el banco. La siguiente página se pide
+    con `cursor=<next_cursor>`; `next_cursor` es null en la última.
+    """
+    return _list_questions_page(
+        db,
+        limit,
+        cursor=cursor,
+        subject_code=subject_code,
+        topic_code=topic_code,
+        difficulty=difficulty,
+        is_active=is_active,
+    )
+
+
+_TS_CONFIG = literal_column("'spanish'::regconfig")
+# enunciados: un fragmento largo; textos largos: hasta 2 fragmentos alrededor de los términos
+_PROMPT_HEADLINE = "StartSel=<mark>, StopSel=</mark>, MaxWords=60, MinWords=20"
+_TEXT_HEADLINE = "StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=10, MaxFragments=2, FragmentDelimiter=\" … \""
+_SEARCH_MAX_OFFSET = 1000
+
+
+@router.get("/search", response_model=QuestionSearchOut)
+def search_questions(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=_SEARCH_MAX_OFFSET),
+    subject_code: Optional[str] = None,
+    topic_code: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    GET /api/v1/questions/search?q=idea principal&limit=20
+
+    Búsqueda full-text en español sobre enunciado, texto de lectura y
+    explicación (en ese orden de peso). `q` acepta la sintaxis de buscador:
+    "frase exacta", `-excluir`, `or`. Resultados por relevancia, con
+    fragmentos resaltados.
+
+    Usa los índices GIN de `questions.search_vector` y `passages.search_vector`
+    (las preguntas de un texto de lectura que coincide entran por `passage_id`);
+    `ts_headline` (lo caro) se calcula solo para las filas de la página.
+    """
+    tsquery = func.websearch_to_tsquery(_TS_CONFIG, q)
+    matched = union(
+        select(Question.id).where(Question.search_vector.op("@@")(tsquery)),
+        select(Question.id)
+        .join(Passage, Passage.id == Question.passage_id)
+        .where(Passage.search_vector.op("@@")(tsquery)),
+    ).subquery()
+    # ranking sobre el vector combinado (enunciado A, lectura B, explicación C)
+    document = Question.search_vector.op("||")(
+        func.coalesce(Passage.search_vector, literal_column("''::tsvector"))
+    )
+    rank = func.ts_rank_cd(document, tsquery)
+    ranked = (
+        select(Question.id.label("id"), rank.label("rank"))
+        .join(matched, matched.c.id == Question.id)
+        .outerjoin(Passage, Passage.id == Question.passage_id)
+        .join(Topic, Topic.id == Question.topic_id)
+        .join(Subject, Subject.id == Topic.subject_id)
+        .order_by(rank.desc(), Question.id)
+        .limit(limit + 1)
+        .offset(offset)
+    )
+    if subject_code is not None:
+        ranked = ranked.where(Subject.code == subject_code)
+    if topic_code is not None:
+        ranked = ranked.where(Topic.code == topic_code)
+    if is_active is not None:
+        ranked = ranked.where(Question.is_active == is_active)
+    ranked = ranked.subquery()
+
+    def headline(column, options=_TEXT_HEADLINE):
+        return func.ts_headline(_TS_CONFIG, column, tsquery, options)
+
+    rows = db.execute(
+        select(
+            Question.id,
+            Subject.code,
+            Topic.code,
+            Question.difficulty,
+            Question.is_active,
+            ranked.c.rank,
+            headline(Question.prompt, _PROMPT_HEADLINE),
+            headline(Passage.text),
+            headline(Question.explanation),
+        )
+        .join(ranked, ranked.c.id == Question.id)
+        .outerjoin(Passage, Passage.id == Question.passage_id)
+        .join(Topic, Topic.id == Question.topic_id)
+        .join(Subject, Subject.id == Topic.subject_id)
+        .order_by(ranked.c.rank.desc(), Question.id)
+    ).all()
+
+    has_more = len(rows) > limit and offset + limit <= _SEARCH_MAX_OFFSET
+    items = []
+    for question_id, subject, topic, difficulty, active, score, prompt, reading, explanation in rows[:limit]:
+        items.append(
             {
-                "question_id": q.id,
-                "subject_code": subject_code,
-                "topic_code": topic_code,
-                "prompt": q.prompt,
-                "reading_text": q.reading_text,
-                "difficulty": q.difficulty,
-                "created_at": q.created_at.isoformat() if q.created_at else "",
-                "choices": [
-                    {"id": c.id, "label": c.label, "text": c.text}
-                    for c in choices
-                ],
+                "question_id": question_id,
+                "subject_code": subject,
+                "topic_code": topic,
+                "difficulty": difficulty,
+                "is_active": active,
+                "rank": round(float(score), 4),
+                "prompt_snippet": prompt or "",
+                # ts_headline sin coincidencias devuelve el inicio del texto: solo
+                # se muestran los fragmentos que de verdad resaltan algo
+                "reading_text_snippet": reading if reading and "<mark>" in reading else None,
+                "explanation_snippet": explanation if explanation and "<mark>" in explanation else None,
             }
         )
+    return {"query": q, "items": items, "next_offset": offset + limit if has_more else None}
+
+
+@router.get("/export")
+def export_questions(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    subject_code: Optional[str] = None,
+    topic_code: Optional[str] = None,
+    is_active: Optional[bool] = None,
+):
+    """
+    GET /api/v1/questions/export?format=ndjson|csv&gzip=true
+
+    Descarga el banco completo (o filtrado) con alternativas y respuesta
+    correcta, en el mismo formato que acepta /questions/import. Se genera en
+    streaming desde un cursor del lado del servidor: la memoria no crece con
+    el tamaño del banco.
+    """
+    filename = f"questions-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    questions = iter_export_questions(subject_code=subject_code, topic_code=topic_code, is_active=is_active)
+    return StreamingResponse(
+        export_chunks(questions, format, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
-    return result
+
+@router.get("/recent", response_model=List[RecentQuestionOut])
+def list_recent_questions(
+    limit: int = 10,
+    db: Session = Depends(get_db),
+):
+    limit = max(1, min(50, limit))
+    return _list_questions_page(db, limit)["items"]
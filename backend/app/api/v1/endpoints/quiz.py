@@ -1,29 +1,112 @@
 from datetime import datetime
-from typing import Optional, Union
+from typing import Literal, Optional, Union
 import logging
 import random
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy import select, func
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, load_only
 
 from app.core.config import settings
 from app.core.exceptions import not_found, bad_request
 from app.core.auth import get_current_user
+from app.core.http_cache import etag_matches, make_etag, not_modified
 from app.db.session import get_db
-from app.db.models import Topic, Question, QuestionChoice, Exam, Subject, Attempt, AttemptFeedback, User
-from app.schemas.quiz import QuestionOut, AnswerIn, AnswerOut, TopicCompletedOut
+from app.db.models import (
+    Topic, Question, QuestionChoice, Exam, Subject, Attempt, AttemptFeedback, Passage, User
+)
+from app.schemas.quiz import (
+    QuestionOut, AnswerIn, AnswerOut, TopicCompletedOut, PassageOut, PassageQuestionsOut
+)
+from app.services.progress_service import record_answer, record_completion
+from app.services.ranking_service import topic_histograms
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/quiz", tags=["quiz"])
 
+# El texto de un passage no cambia sin subir `version` (que viaja en cada
+# pregunta): el cliente puede reusarlo sin revalidar por un día.
+PASSAGE_CACHE_CONTROL = "private, max-age=86400"
 
-@router.get("/next-question", response_model=Union[QuestionOut, TopicCompletedOut])
+# Subjects donde next-question acepta mode=passage (comprensión lectora).
+PASSAGE_MODE_SUBJECTS = ("LECT",)
+
+
+def _pick_passage(db: Session, topic_id: int, answered_ids: set[int]) -> Optional[int]:
+    """
+    Elige un passage del topic con preguntas activas sin responder.
+
+    Prioriza los ya empezados en el attempt (el alumno ya leyó el texto) y
+    sortea entre el resto. Lee solo `ix_questions_topic_passage_active`
+    (index-only scan sobre las preguntas con passage del topic).
+    """
+    stmt = (
+        select(Question.passage_id)
+        .where(
+            Question.topic_id == topic_id,
+            Question.is_active == True,  # noqa: E712
+            Question.passage_id.is_not(None),
+        )
+        .group_by(Question.passage_id)
+        .limit(1)
+    )
+    if answered_ids:
+        stmt = stmt.having(func.count().filter(Question.id.not_in(answered_ids)) > 0).order_by(
+            (func.count().filter(Question.id.in_(answered_ids)) > 0).desc()
+        )
+    return db.scalar(stmt.order_by(func.random()))
+
+
+def _passage_questions(
+    db: Session, topic: Topic, passage_id: int, answered_ids: set[int]
+) -> dict:
+    """Payload `passage_questions`: el texto una vez + sus preguntas pendientes, en orden de id."""
+    passage = db.execute(
+        select(Passage.version, Passage.text).where(Passage.id == passage_id)
+    ).one()
+    questions = db.execute(
+        select(Question.id, Question.prompt)
+        .where(
+            Question.passage_id == passage_id,
+            Question.topic_id == topic.id,
+            Question.is_active == True,  # noqa: E712
+            Question.id.not_in(answered_ids) if answered_ids else True,
+        )
+        .order_by(Question.id)
+    ).all()
+    choices_by_question: dict[int, list[dict]] = {question_id: [] for question_id, _ in questions}
+    for choice in db.scalars(
+        select(QuestionChoice).where(QuestionChoice.question_id.in_(choices_by_question))
+    ):
+        choices_by_question[choice.question_id].append(
+            {"id": choice.id, "label": choice.label, "text": choice.text}
+        )
+    for choices in choices_by_question.values():
+        random.shuffle(choices)
+
+    return {
+        "kind": "passage_questions",
+        "topic": topic.code,
+        "passage_id": passage_id,
+        "passage_version": passage.version,
+        "text": passage.text,
+        "questions": [
+            {"question_id": question_id, "prompt": prompt, "choices": choices_by_question[question_id]}
+            for question_id, prompt in questions
+        ],
+    }
+
+
+@router.get(
+    "/next-question",
+    response_model=Union[QuestionOut, PassageQuestionsOut, TopicCompletedOut],
+)
 def next_question(
     attempt_id: Optional[int] = None,
     topic_code: str = "ALG",
     subject_code: str = "M1",
+    mode: Literal["single", "passage"] = "single",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -53,6 +136,11 @@ def next_question(
     )
     if not topic:
         raise not_found("topic", f"topic_code={topic_code} en subject_code={subject_code}")
+    if mode == "passage" and subject.code not in PASSAGE_MODE_SUBJECTS:
+        raise bad_request(
+            "passage_mode_unsupported",
+            f"mode=passage solo aplica a subject_code en {', '.join(PASSAGE_MODE_SUBJECTS)}",
+        )
 
     if attempt_id is not None:
         attempt = db.get(Attempt, attempt_id)
@@ -92,8 +180,17 @@ def next_question(
             ).all()
         )
 
+    # Modo passage: un texto con todas sus preguntas pendientes. Sin passages
+    # pendientes se sigue con las preguntas sueltas (y el cierre) de siempre.
+    if mode == "passage":
+        passage_id = _pick_passage(db, topic.id, answered_question_ids)
+        if passage_id is not None:
+            logger.debug("Serving passage %s to user %s", passage_id, user_id)
+            return _passage_questions(db, topic, passage_id, answered_question_ids)
+
     question = db.scalar(
         select(Question)
+        .options(joinedload(Question.passage).options(load_only(Passage.id, Passage.version)))
         .where(
             Question.topic_id == topic.id,
             Question.is_active == True,  # noqa: E712
@@ -123,6 +220,7 @@ def next_question(
         score_paes = int((correct / total) * 1000)
 
         attempt.score = score_paes
+        record_completion(db, user_id, topic.id, attempt.completed_at)
         db.commit()
 
         logger.info(
@@ -157,13 +255,41 @@ def next_question(
         "question_id": question.id,
         "prompt": question.prompt,
         "topic": topic.code,
-        "reading_text": question.reading_text,
+        "passage_id": question.passage_id,
+        "passage_version": question.passage.version if question.passage else None,
         "choices": [
             {"id": choice.id, "label": choice.label, "text": choice.text}
             for choice in choices
         ],
     }
 
+@router.get("/passages/{passage_id}", response_model=PassageOut)
+def get_passage(
+    passage_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Texto de lectura de una pregunta (`passage_id` en /next-question).
+
+    Se pide una vez por (passage_id, passage_version) en vez de viajar con
+    cada pregunta. ETag por versión: una revalidación responde 304 sin body.
+    """
+    row = db.execute(select(Passage.version, Passage.text).where(Passage.id == passage_id)).first()
+    if row is None:
+        raise not_found("passage", f"passage_id={passage_id}")
+
+    etag = make_etag("passage", passage_id, row.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PASSAGE_CACHE_CONTROL)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = PASSAGE_CACHE_CONTROL
+    return {"passage_id": passage_id, "version": row.version, "text": row.text}
+
+
 @router.post("/answer", response_model=AnswerOut)
 def submit_answer(
     payload: AnswerIn,
@@ -269,6 +395,7 @@ def submit_answer(
         if total > 0:
             score_paes = int((correct / total) * 1000)
             attempt.score = score_paes
+        record_completion(db, user_id, topic.id, attempt.completed_at)
 
     # SNIPPET 2: Deduplicacion (evitar respuestas duplicadas)
     existing_feedback = db.scalar(
@@ -303,7 +430,7 @@ def submit_answer(
         selected_choice_id=payload.selected_choice_id,
         is_correct=is_correct,
         feedback_text=feedback_text,
-        ai_payload={},  # placeholder: aquí va resultado de OpenAI después
+        ai_payload={},  # lo completa /ai/feedback la primera vez (write-through, ver ai_service)
     )
     db.add(fb)
 
@@ -311,6 +438,9 @@ def submit_answer(
     if is_correct:
         attempt.correct_count = (attempt.correct_count or 0) + 1
 
+    # Rollup (user, topic) en la misma transacción que el feedback.
+    answered_count, correct_count = record_answer(db, user_id, topic.id, is_correct, datetime.utcnow())
+
     db.flush()
 
     is_finished = False
@@ -319,6 +449,7 @@ def submit_answer(
         is_finished = True
 
     db.commit()
+    topic_histograms.record_answer(topic.id, answered_count, correct_count, is_correct)
 
     logger.info(
         "Answer recorded | Result: %s | Progress: %s/%s",
@@ -1,22 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import and_, func, select
 from sqlalchemy.orm import Session
 
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.http_cache import etag_matches, make_etag, not_modified
 from app.db.session import get_db
 from app.db.models import (
-    User, Attempt, Subject, Topic, Exam
+    User, UserProgress, UserTopicDaily, Subject, Topic, Exam
 )
-from app.core.exceptions import not_found, bad_request
+from app.core.exceptions import bad_request
 from app.core.auth import get_current_user
+from app.services.ranking_service import topic_histograms
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.get("/{user_id}/stats")
-def user_stats(
-    user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
+# Datos por usuario: solo el browser puede guardarlos y siempre revalida.
+STATS_CACHE_CONTROL = "private, no-cache"
+
+# Stats renderizados por (user_id, stats_version). La versión vive en `users`
+# y ya viene cargada por get_current_user: un hit cuesta un lookup en memoria.
+stats_cache = LRUCache(settings.STATS_CACHE_MAX_ENTRIES)
+
+# Rango máximo de /progress/daily: a lo más 365 filas por topic.
+DAILY_MAX_DAYS = 365
+DAILY_DEFAULT_DAYS = 30
+
+
+def _ensure_same_user(user_id: int, current_user: User) -> None:
     if user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -26,91 +40,99 @@ def user_stats(
                 "code": "IDOR_BLOCKED",
             },
         )
-    user = db.scalar(select(User).where(User.id == user_id))
-    if not user:
-        raise not_found("user", f"user_id={user_id}")
-
-    exam = db.scalar(select(Exam).where(Exam.code == "PAES"))
-    if not exam:
-        raise bad_request("exam_not_seeded", "PAES exam not initialized. Run seed_paes.py")
-
-    subjects = db.scalars(
-        select(Subject)
-        .where(Subject.exam_id == exam.id)
-        .order_by(Subject.id.asc())
-    ).all()
 
-    subject_ids = [s.id for s in subjects]
-    topic_rows = db.execute(
-        select(Topic.id, Topic.code, Topic.name, Topic.subject_id)
-        .where(Topic.subject_id.in_(subject_ids) if subject_ids else False)
-        .order_by(Topic.id.asc())
-    ).all()
 
-    attempt_rows = db.execute(
+@router.get("/{user_id}/stats")
+def user_stats(
+    user_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    _ensure_same_user(user_id, current_user)
+    version = current_user.stats_version or 0
+    etag = make_etag("user-stats", user_id, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, STATS_CACHE_CONTROL)
+
+    payload = stats_cache.get((user_id, version))
+    if payload is None:
+        payload = _build_user_stats(db, user_id)
+        stats_cache.set((user_id, version), payload)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = STATS_CACHE_CONTROL
+    return payload
+
+
+def _build_user_stats(db: Session, user_id: int) -> dict:
+    # Lee solo el rollup `user_progress` (una fila por topic tocado, índice
+    # único user+topic) sobre el catálogo: costo O(topics), sin recorrer
+    # los intentos ni el feedback del usuario.
+    rows = db.execute(
         select(
-            Attempt.subject_id,
-            Attempt.topic_id,
-            Attempt.status,
-            Attempt.total_questions,
-            Attempt.correct_count,
-            Attempt.completed_at,
+            Subject.id,
+            Subject.code,
+            Subject.name,
+            Topic.id.label("topic_id"),
+            Topic.code.label("topic_code"),
+            func.coalesce(UserProgress.answered_count, 0).label("questions"),
+            func.coalesce(UserProgress.correct_count, 0).label("correct"),
+            UserProgress.completed_at,
         )
-        .where(Attempt.user_id == user_id)
+        .select_from(Exam)
+        .outerjoin(Subject, Subject.exam_id == Exam.id)
+        .outerjoin(Topic, Topic.subject_id == Subject.id)
+        .outerjoin(
+            UserProgress,
+            and_(UserProgress.topic_id == Topic.id, UserProgress.user_id == user_id),
+        )
+        .where(Exam.code == settings.PAES_CODE)
+        .order_by(Subject.id.asc(), Topic.id.asc())
     ).all()
+    if not rows:
+        raise bad_request(
+            "exam_not_seeded",
+            f"{settings.PAES_CODE} exam no inicializado. Ejecutar seed_paes.py",
+        )
 
-    topic_stats = {}
+    subjects = {}
     total_questions = 0
     total_correct = 0
-
-    for row in attempt_rows:
-        total_questions += int(row.total_questions or 0)
-        total_correct += int(row.correct_count or 0)
-
-        if not row.topic_id:
+    for row in rows:
+        if row.id is None:
             continue
-
-        stats = topic_stats.setdefault(
-            row.topic_id,
-            {"questions": 0, "correct": 0, "completed_at": None},
-        )
-
-        stats["questions"] += int(row.total_questions or 0)
-        stats["correct"] += int(row.correct_count or 0)
-
-        if row.status == "completed" and row.completed_at:
-            if not stats["completed_at"] or row.completed_at > stats["completed_at"]:
-                stats["completed_at"] = row.completed_at
+        subject = subjects.setdefault(row.id, {"code": row.code, "name": row.name, "topics": []})
+        if row.topic_id is None:
+            continue
+        subject["topics"].append(row)
+        total_questions += int(row.questions)
+        total_correct += int(row.correct)
 
     overall_accuracy = (
         round((total_correct / total_questions) * 100, 2) if total_questions else 0
     )
 
-    topics_by_subject = {}
-    for t in topic_rows:
-        topics_by_subject.setdefault(t.subject_id, []).append(t)
-
     completed_subjects = 0
     subjects_payload = []
 
-    for subject in subjects:
+    for subject in subjects.values():
         topics_payload = []
-        subject_topics = topics_by_subject.get(subject.id, [])
-        subject_completed = True if subject_topics else False
+        subject_completed = True if subject["topics"] else False
 
-        for topic in subject_topics:
-            stats = topic_stats.get(topic.id, {"questions": 0, "correct": 0, "completed_at": None})
-            questions = stats["questions"]
-            correct = stats["correct"]
+        for topic in subject["topics"]:
+            questions = int(topic.questions)
+            correct = int(topic.correct)
             accuracy = round((correct / questions) * 100, 2) if questions else 0
-            completed_at = stats["completed_at"]
+            completed_at = topic.completed_at
 
             if not completed_at:
                 subject_completed = False
 
             topics_payload.append(
                 {
-                    "topic_code": topic.code,
+                    "topic_code": topic.topic_code,
                     "accuracy": accuracy,
                     "completed_at": completed_at.isoformat() if completed_at else None,
                 }
@@ -121,8 +143,8 @@ def user_stats(
 
         subjects_payload.append(
             {
-                "subject_code": subject.code,
-                "subject_name": subject.name,
+                "subject_code": subject["code"],
+                "subject_name": subject["name"],
                 "topics": topics_payload,
             }
         )
@@ -136,4 +158,152 @@ def user_stats(
     }
 
 
+@router.get("/{user_id}/ranking")
+def user_ranking(
+    user_id: int,
+    subject_code: Optional[str] = None,
+    topic_code: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    GET /api/v1/users/{user_id}/ranking?subject_code=M1&topic_code=ALG
+
+    Percentil del usuario por topic frente al resto de estudiantes
+    (ej: "estás en el top 20% en M1 Álgebra"). Lee el rollup del usuario y
+    resuelve cada percentil en O(buckets) sobre el histograma del topic.
+    Topics con menos de RANKING_MIN_ANSWERS respuestas salen con `ranked=false`.
+    """
+    _ensure_same_user(user_id, current_user)
+
+    query = (
+        select(
+            Subject.code.label("subject_code"),
+            Topic.id.label("topic_id"),
+            Topic.code.label("topic_code"),
+            Topic.name.label("topic_name"),
+            UserProgress.answered_count,
+            UserProgress.correct_count,
+        )
+        .join(Topic, Topic.id == UserProgress.topic_id)
+        .join(Subject, Subject.id == Topic.subject_id)
+        .join(Exam, Exam.id == Subject.exam_id)
+        .where(UserProgress.user_id == user_id, Exam.code == settings.PAES_CODE)
+        .order_by(Subject.id.asc(), Topic.id.asc())
+    )
+    if subject_code:
+        query = query.where(Subject.code == subject_code)
+    if topic_code:
+        query = query.where(Topic.code == topic_code)
+    rows = db.execute(query).all()
+
+    topic_histograms.ensure_built()
+
+    topics_payload = []
+    for row in rows:
+        answered = int(row.answered_count or 0)
+        correct = int(row.correct_count or 0)
+        rank = topic_histograms.rank(row.topic_id, answered, correct)
+        topics_payload.append(
+            {
+                "subject_code": row.subject_code,
+                "topic_code": row.topic_code,
+                "topic_name": row.topic_name,
+                "answered": answered,
+                "accuracy": round((correct / answered) * 100, 2) if answered else 0,
+                "ranked": rank is not None,
+                "percentile": rank["percentile"] if rank else None,
+                "top_percent": rank["top_percent"] if rank else None,
+                "cohort_size": rank["cohort_size"] if rank else 0,
+            }
+        )
+
+    return {
+        "user_id": user_id,
+        "min_answers": settings.RANKING_MIN_ANSWERS,
+        "topics": topics_payload,
+    }
+
+
+@router.get("/{user_id}/progress/daily")
+def user_daily_progress(
+    user_id: int,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    subject_code: Optional[str] = None,
+    topic_code: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    GET /api/v1/users/{user_id}/progress/daily?from=2026-01-01&to=2026-03-31&subject_code=M1
+
+    Respuestas y accuracy por día (UTC) y topic para gráficos de progreso.
+    Lee el rollup `user_topic_daily` (range scan sobre la PK), nunca
+    attempt_feedback. Por defecto los últimos 30 días; el rango máximo es de
+    365 días. Solo se incluyen los días con actividad.
+    """
+    _ensure_same_user(user_id, current_user)
+
+    if date_to is None:
+        date_to = datetime.utcnow().date()
+    if date_from is None:
+        date_from = date_to - timedelta(days=DAILY_DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        raise bad_request("invalid_date_range", "from debe ser anterior o igual a to")
+    if (date_to - date_from).days + 1 > DAILY_MAX_DAYS:
+        raise bad_request("invalid_date_range", f"El rango máximo es de {DAILY_MAX_DAYS} días")
+
+    query = (
+        select(
+            Subject.code.label("subject_code"),
+            Topic.id.label("topic_id"),
+            Topic.code.label("topic_code"),
+            Topic.name.label("topic_name"),
+            UserTopicDaily.day,
+            UserTopicDaily.answered_count,
+            UserTopicDaily.correct_count,
+        )
+        .join(Topic, Topic.id == UserTopicDaily.topic_id)
+        .join(Subject, Subject.id == Topic.subject_id)
+        .join(Exam, Exam.id == Subject.exam_id)
+        .where(
+            UserTopicDaily.user_id == user_id,
+            UserTopicDaily.day >= date_from,
+            UserTopicDaily.day <= date_to,
+            Exam.code == settings.PAES_CODE,
+        )
+        .order_by(Subject.id.asc(), Topic.id.asc(), UserTopicDaily.day.asc())
+    )
+    if subject_code:
+        query = query.where(Subject.code == subject_code)
+    if topic_code:
+        query = query.where(Topic.code == topic_code)
+
+    topics = {}
+    for row in db.execute(query):
+        topic = topics.get(row.topic_id)
+        if topic is None:
+            topic = topics[row.topic_id] = {
+                "subject_code": row.subject_code,
+                "topic_code": row.topic_code,
+                "topic_name": row.topic_name,
+                "days": [],
+            }
+        answered = int(row.answered_count)
+        correct = int(row.correct_count)
+        topic["days"].append(
+            {
+                "day": row.day.isoformat(),
+                "answered": answered,
+                "correct": correct,
+                "accuracy": round((correct / answered) * 100, 2) if answered else 0,
+            }
+        )
 
+    return {
+        "user_id": user_id,
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "topics": list(topics.values()),
+    }
@@ -66,6 +66,42 @@ class Settings(BaseSettings):
     # API Configuration
     API_V1_PREFIX: str = "/api/v1"
 
+    # Catalog cache (exams/subjects/topics casi estáticos)
+    # TTL en memoria: cubre cambios hechos por seeds desde otro proceso.
+    CATALOG_CACHE_TTL_SECONDS: int = 300
+    CATALOG_CACHE_CONTROL: str = "public, max-age=60, stale-while-revalidate=600"
+
+    # Stats cache (por proceso): entradas (user_id, stats_version) en LRU
+    STATS_CACHE_MAX_ENTRIES: int = 10000
+
+    # Ranking por percentil (histogramas de accuracy por topic)
+    RANKING_BUCKETS: int = 20
+    RANKING_MIN_ANSWERS: int = 5
+    # Cada cuánto se reconstruyen los histogramas en segundo plano (0 = nunca)
+    RANKING_REBUILD_SECONDS: int = 900
+
+    # Importación streaming de preguntas (POST /questions/import)
+    IMPORT_CHUNK_SIZE: int = 500
+    IMPORT_MAX_CHUNK_SIZE: int = 5000
+    # Tope del reporte de errores por fila (los contadores siguen completos)
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+    # Jobs de import en segundo plano (POST /questions/import-jobs)
+    IMPORT_JOB_WORKERS: int = 1
+    # Carpeta para los archivos subidos (vacío = directorio temporal del sistema)
+    IMPORT_JOBS_DIR: str = ""
+    # Un job `running` sin progreso por este tiempo se da por interrumpido
+    IMPORT_JOB_STALE_SECONDS: int = 600
+
+    # Casi duplicados (MinHash/LSH): similitud de Jaccard estimada desde la que
+    # una pregunta se marca como casi duplicada (0 = desactivado)
+    NEAR_DUP_THRESHOLD: float = 0.8
+    # Cada cuánto se reconstruye el índice en memoria (0 = solo al arrancar)
+    NEAR_DUP_REBUILD_SECONDS: int = 3600
+
+    # Explicaciones compartidas por (pregunta, alternativa elegida, versión del
+    # generador): LRU por proceso delante de la tabla feedback_explanations
+    EXPLANATION_CACHE_MAX_ENTRIES: int = 20000
+
     # DB bootstrap (dev only)
     # If true, the app will run Base.metadata.create_all() on startup.
     # Prefer Alembic in production to avoid schema drift.
@@ -0,0 +1,86 @@
+"""
+Helpers de caché HTTP (ETag / If-None-Match / 304).
+
+Se usan en endpoints cuyo contenido cambia poco (catálogo, stats), para que
+el frontend (Vercel) y los browsers revaliden en vez de re-descargar.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+
+
+def make_etag(*parts) -> str:
+    """ETag fuerte (entre comillas) derivado de las partes dadas."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        elif not isinstance(part, (bytes, bytearray)):
+            part = str(part).encode("utf-8")
+        digest.update(part)
+        digest.update(b"\x00")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evalúa `If-None-Match` (RFC 9110: comparación débil).
+
+    Acepta `*`, listas separadas por coma y prefijo `W/`.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def choose_encoding(accept_encoding: Optional[str], available) -> str:
+    """
+    Elige la codificación según `Accept-Encoding` (respeta q-values).
+
+    `available` viene en orden de preferencia del servidor (ej: br, gzip);
+    si ninguna es aceptada se usa "identity".
+    """
+    if not accept_encoding:
+        return "identity"
+
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    wildcard = weights.get("*")
+    best, best_q = "identity", weights.get("identity", 1.0)
+    for encoding in available:
+        q = weights.get(encoding, wildcard if wildcard is not None else 0.0)
+        # A igual q-value se prefiere comprimir antes que identity.
+        if q > 0 and (q > best_q or (best == "identity" and q == best_q)):
+            best, best_q = encoding, q
+    return best
+
+
+def not_modified(etag: str, cache_control: Optional[str] = None) -> Response:
+    """Respuesta 304 sin body, repitiendo los headers de validación."""
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
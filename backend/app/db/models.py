@@ -1,15 +1,16 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List
 
 from sqlalchemy import (
-    String, Integer, Boolean, DateTime, ForeignKey,
-    SmallInteger, Text, UniqueConstraint, Index
+    String, Integer, Boolean, Computed, Date, DateTime, ForeignKey,
+    SmallInteger, Text, LargeBinary, UniqueConstraint, Index
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy import Enum as SAEnum
+from sqlalchemy import text as sql_text
 
 from app.db.base import Base
 
@@ -30,6 +31,11 @@ SessionSource = SAEnum(
     name="session_source",
 )
 
+ImportJobStatus = SAEnum(
+    "queued", "running", "completed", "failed", "cancelled",
+    name="import_job_status",
+)
+
 
 #  Core catalog 
 class Exam(Base):
@@ -88,6 +94,10 @@ class User(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
+    # se incrementa cada vez que cambian los stats del usuario (respuesta nueva,
+    # topic completado); versiona el caché/ETag de /users/{id}/stats
+    stats_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
@@ -118,15 +128,44 @@ class UserEntitlement(Base):
 
 
 #  Questions 
+class Passage(Base):
+    """Texto de lectura compartido por varias preguntas (ver services/passages)."""
+    __tablename__ = "passages"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # sha256 del texto normalizado: un mismo texto se guarda una sola vez
+    content_hash: Mapped[str] = mapped_column(String(64), unique=True)
+    text: Mapped[str] = mapped_column(Text)
+    # sube cuando cambia el texto; el cliente cachea por (id, version)
+    version: Mapped[int] = mapped_column(Integer, default=1)
+
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed("setweight(to_tsvector('spanish'::regconfig, text), 'B')", persisted=True),
+        nullable=True,
+        deferred=True,
+    )
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_passages_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+
 class Question(Base):
     __tablename__ = "questions"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    topic_id: Mapped[int] = mapped_column(ForeignKey("topics.id", ondelete="CASCADE"), index=True)
+    topic_id: Mapped[int] = mapped_column(ForeignKey("topics.id", ondelete="CASCADE"))
 
     prompt: Mapped[str] = mapped_column(Text)
     explanation: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    reading_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # texto de lectura compartido (comprensión lectora)
+    passage_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("passages.id", ondelete="SET NULL"), nullable=True, index=True
+    )
 
     # 1=facil,2=medio,3=dificil
     difficulty: Mapped[int] = mapped_column(SmallInteger, default=1, index=True)
@@ -137,9 +176,47 @@ class Question(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
+    # sha256 del contenido normalizado (ver services/content_hash). NULL solo en
+    # duplicados exactos anteriores a la columna.
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # firma MinHash para casi duplicados (ver services/near_duplicates)
+    minhash: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+
+    # Búsqueda full-text (ver endpoints/questions.search_questions). Columna
+    # generada por Postgres; deferred para no traerla en cada carga ORM. El
+    # texto de lectura tiene su propio vector en `passages` (peso B).
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('spanish'::regconfig, coalesce(prompt, '')), 'A') || "
+            "setweight(to_tsvector('spanish'::regconfig, coalesce(explanation, '')), 'C')",
+            persisted=True,
+        ),
+        nullable=True,
+        deferred=True,
+    )
+
     topic: Mapped["Topic"] = relationship(back_populates="questions")
+    passage: Mapped[Optional["Passage"]] = relationship()
     choices: Mapped[List["QuestionChoice"]] = relationship(back_populates="question", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # content_hash primero: buscar duplicados de un lote usa el índice
+        UniqueConstraint("content_hash", "topic_id", name="uq_question_content_hash_topic"),
+        # listado admin por topic en orden de id (keyset) sin ordenar en memoria
+        Index("ix_questions_topic_id_id", "topic_id", "id"),
+        Index("ix_questions_search_vector", "search_vector", postgresql_using="gin"),
+        # next-question en modo passage: passages con preguntas pendientes de
+        # un topic, con index-only scan (ver quiz._pick_passage)
+        Index(
+            "ix_questions_topic_passage_active",
+            "topic_id",
+            "passage_id",
+            "id",
+            postgresql_where=sql_text("is_active AND passage_id IS NOT NULL"),
+        ),
+    )
+
 
 class QuestionChoice(Base):
     __tablename__ = "question_choices"
@@ -159,6 +236,40 @@ class QuestionChoice(Base):
     )
 
 
+class ImportJob(Base):
+    """Importación de preguntas en segundo plano (ver services/import_jobs)."""
+    __tablename__ = "import_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    created_by: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    status: Mapped[str] = mapped_column(ImportJobStatus, default="queued", index=True)
+    format: Mapped[str] = mapped_column(String(16))
+    filename: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    # archivo subido, guardado en IMPORT_JOBS_DIR hasta que termina el job
+    file_path: Mapped[Optional[str]] = mapped_column(String(1024), nullable=True)
+    dry_run: Mapped[bool] = mapped_column(Boolean, default=False)
+    chunk_size: Mapped[int] = mapped_column(Integer)
+    allow_near_duplicates: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    # progreso (se actualiza en cada chunk)
+    rows_processed: Mapped[int] = mapped_column(Integer, default=0)
+    created_count: Mapped[int] = mapped_column(Integer, default=0)
+    skipped_count: Mapped[int] = mapped_column(Integer, default=0)
+    chunks_committed: Mapped[int] = mapped_column(Integer, default=0)
+    errors: Mapped[list] = mapped_column(JSONB, default=list)
+    errors_truncated: Mapped[bool] = mapped_column(Boolean, default=False)
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # el worker lo revisa entre chunks
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
 #  Attempts / Feedback 
 class Attempt(Base):
     __tablename__ = "attempts"
@@ -210,6 +321,23 @@ class AttemptFeedback(Base):
     attempt: Mapped["Attempt"] = relationship(back_populates="feedback_items")
 
 
+class FeedbackExplanation(Base):
+    """
+    Explicación compartida para una alternativa elegida de una pregunta
+    (igual para todos los alumnos que la eligen). Ver services/explanation_store.
+    """
+    __tablename__ = "feedback_explanations"
+
+    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    choice_id: Mapped[int] = mapped_column(
+        ForeignKey("question_choices.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    generator_version: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    payload: Mapped[dict] = mapped_column(JSONB)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
 #  Study sessions / Progress 
 class StudySession(Base):
     __tablename__ = "study_sessions"
@@ -239,7 +367,13 @@ class UserProgress(Base):
     accuracy: Mapped[int] = mapped_column(Integer, default=0)  # 0-100
     streak: Mapped[int] = mapped_column(Integer, default=0)
 
+    # rollup incremental (se actualiza en cada respuesta, ver progress_service)
+    answered_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    correct_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+
     last_activity_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # último intento completado del topic
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
     user: Mapped["User"] = relationship(back_populates="progress")
@@ -247,3 +381,16 @@ class UserProgress(Base):
     __table_args__ = (
         UniqueConstraint("user_id", "topic_id", name="uq_progress_user_topic"),
     )
+
+
+class UserTopicDaily(Base):
+    """Rollup diario (user, topic, día UTC) para gráficos de progreso."""
+    __tablename__ = "user_topic_daily"
+
+    # PK compuesta: un rango de días de un usuario/topic es un index range scan
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    topic_id: Mapped[int] = mapped_column(ForeignKey("topics.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    answered_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    correct_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
@@ -9,10 +9,14 @@ from app.api.v1.endpoints.catalog import router as catalog_router
 from app.api.v1.endpoints.quiz import router as quiz_router
 from app.api.v1.endpoints.users import router as users_router
 from app.api.v1.endpoints.questions import router as questions_router
+from app.api.v1.endpoints.analytics import router as analytics_router
 from app.core.config import settings
 from app.core.logging_config import setup_logging
 from app.db.base import Base
 from app.db.session import engine
+from app.services.import_jobs import start_import_workers, stop_import_workers
+from app.services.near_duplicates import start_background_rebuild, stop_background_rebuild
+from app.services.ranking_service import start_background_refresh, stop_background_refresh
 
 logger = setup_logging()
 logger.info("Starting TutorPAES API...")
@@ -29,7 +33,13 @@ async def lifespan(_app: FastAPI):
     except Exception:
         logger.exception("Database not ready during startup")
         raise
+    start_background_refresh()
+    start_background_rebuild()
+    start_import_workers()
     yield
+    stop_import_workers()
+    stop_background_rebuild()
+    stop_background_refresh()
 
 
 app = FastAPI(
@@ -53,4 +63,5 @@ app.include_router(ai_router, prefix="/api/v1")
 app.include_router(catalog_router, prefix="/api/v1")
 app.include_router(quiz_router, prefix="/api/v1")
 app.include_router(users_router, prefix="/api/v1")
-app.include_router(questions_router, prefix="/api/v1")
\ No newline at end of file
+app.include_router(questions_router, prefix="/api/v1")
+app.include_router(analytics_router, prefix="/api/v1")
\ No newline at end of file
@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ChoicePickStatsOut(BaseModel):
+    choice_id: int
+    label: str
+    is_correct: bool
+    picked_count: int
+    # fracción de las respuestas de la pregunta que eligieron esta alternativa
+    pick_rate: Optional[float] = None
+
+
+class QuestionStatsOut(BaseModel):
+    question_id: int
+    subject_code: str
+    topic_code: str
+    prompt: str
+    is_active: bool
+    answered_count: int
+    correct_count: int
+    accuracy: Optional[float] = None
+    last_answered_at: Optional[datetime] = None
+    choices: List[ChoicePickStatsOut] = []
+
+
+class QuestionStatsPageOut(BaseModel):
+    items: List[QuestionStatsOut]
+    # pasar como `cursor` para la página siguiente; null = última página
+    next_cursor: Optional[int] = None
+    # último REFRESH de las vistas (scripts/refresh_analytics.py)
+    refreshed_at: Optional[datetime] = None
+
+
+class TopicStatsOut(BaseModel):
+    topic_id: int
+    subject_code: str
+    topic_code: str
+    topic_name: str
+    attempts_count: int
+    completed_count: int
+    users_count: int
+    answered_count: int
+    correct_count: int
+    accuracy: Optional[float] = None
+    avg_score: Optional[float] = None
+
+
+class TopicStatsPageOut(BaseModel):
+    items: List[TopicStatsOut]
+    next_cursor: Optional[int] = None
+    refreshed_at: Optional[datetime] = None
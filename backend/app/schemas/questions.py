@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
@@ -32,6 +33,7 @@ class QuestionCreatedOut(BaseModel):
     topic_code: str
     prompt: str
     reading_text: Optional[str] = Field(default=None, max_length=50000)
+    passage_id: Optional[int] = None
     explanation: Optional[str] = Field(default=None, max_length=50000)
     difficulty: int
 
@@ -44,12 +46,44 @@ class RecentQuestionOut(BaseModel):
     subject_code: str
     topic_code: str
     prompt: str
-    reading_text: Optional[str] = Field(default=None, max_length=50000)
+    # texto de lectura: GET /quiz/passages/{passage_id}
+    passage_id: Optional[int] = None
     difficulty: int
     created_at: str
     choices: List[ChoiceOut]
 
 
+class QuestionListItemOut(RecentQuestionOut):
+    is_active: bool
+    correct_choice: Optional[ChoiceLabel] = None
+
+
+class QuestionPageOut(BaseModel):
+    items: List[QuestionListItemOut]
+    # último question_id de la página; null si no hay más
+    next_cursor: Optional[int] = None
+
+
+class QuestionSearchHitOut(BaseModel):
+    question_id: int
+    subject_code: str
+    topic_code: str
+    difficulty: int
+    is_active: bool
+    rank: float
+    # fragmentos con los términos encontrados entre <mark>...</mark>
+    prompt_snippet: str
+    reading_text_snippet: Optional[str] = None
+    explanation_snippet: Optional[str] = None
+
+
+class QuestionSearchOut(BaseModel):
+    query: str
+    items: List[QuestionSearchHitOut]
+    # offset de la página siguiente; null si no hay más resultados
+    next_offset: Optional[int] = None
+
+
 class BulkQuestionCreateIn(BaseModel):
     questions: List[QuestionCreateIn] = Field(min_length=1, max_length=200)
 
@@ -59,11 +93,53 @@ class BulkQuestionCreateIn(BaseModel):
     # If true, either all questions are created or none (if there are errors).
     atomic: bool = False
 
+    # If true, near-duplicates (MinHash) are created instead of reported as errors.
+    allow_near_duplicates: bool = False
+
+
+class QuestionBulkFilterIn(BaseModel):
+    subject_code: Optional[str] = Field(default=None, min_length=1, max_length=32)
+    topic_code: Optional[str] = Field(default=None, min_length=1, max_length=32)
+    difficulty: Optional[int] = Field(default=None, ge=1, le=3)
+    is_active: Optional[bool] = None
+
+
+class QuestionBulkChangesIn(BaseModel):
+    is_active: Optional[bool] = None
+    difficulty: Optional[int] = Field(default=None, ge=1, le=3)
+    # mover de topic: ambos códigos (topic destino dentro del exam)
+    subject_code: Optional[str] = Field(default=None, min_length=1, max_length=32)
+    topic_code: Optional[str] = Field(default=None, min_length=1, max_length=32)
+
+
+class QuestionBulkUpdateIn(BaseModel):
+    # exactamente uno: lista de ids o filtro
+    question_ids: Optional[List[int]] = Field(default=None, min_length=1, max_length=10000)
+    filter: Optional[QuestionBulkFilterIn] = None
+    changes: QuestionBulkChangesIn
+
+    # If true, only counts the questions that would change, without writing to DB.
+    dry_run: bool = False
+
+
+class QuestionBulkUpdateOut(BaseModel):
+    dry_run: bool
+    # preguntas que cambiaron (o cambiarían); las que ya tenían esos valores no cuentan
+    updated: int
+
+
+class NearDuplicateMatchOut(BaseModel):
+    question_id: int
+    # similitud de Jaccard estimada (MinHash), 0..1
+    similarity: float
+
 
 class BulkQuestionErrorOut(BaseModel):
     index: int
     error: str
     detail: Optional[str] = None
+    # solo en near_duplicate_question contra preguntas ya guardadas
+    matches: Optional[List[NearDuplicateMatchOut]] = None
 
 
 class BulkQuestionCreateOut(BaseModel):
@@ -74,3 +150,48 @@ class BulkQuestionCreateOut(BaseModel):
     skipped: int
     question_ids: List[int] = []
     errors: List[BulkQuestionErrorOut] = []
+
+
+class QuestionImportErrorOut(BaseModel):
+    # número de fila de datos en el archivo (1-based, sin header)
+    row: int
+    error: str
+    detail: Optional[str] = None
+    matches: Optional[List[NearDuplicateMatchOut]] = None
+
+
+class QuestionImportOut(BaseModel):
+    format: Literal["ndjson", "csv"]
+    dry_run: bool
+    chunk_size: int
+    total: int
+    created: int
+    skipped: int
+    chunks_committed: int
+    errors: List[QuestionImportErrorOut] = []
+    # true si hubo más errores que IMPORT_MAX_REPORTED_ERRORS
+    errors_truncated: bool = False
+
+
+class ImportJobOut(BaseModel):
+    job_id: int
+    status: Literal["queued", "running", "completed", "failed", "cancelled"]
+    format: Literal["ndjson", "csv"]
+    filename: Optional[str] = None
+    dry_run: bool
+    chunk_size: int
+    allow_near_duplicates: bool = False
+
+    # progreso: se actualiza cada `chunk_size` filas
+    rows_processed: int
+    created: int
+    skipped: int
+    chunks_committed: int
+    errors: List[QuestionImportErrorOut] = []
+    errors_truncated: bool = False
+    error_message: Optional[str] = None
+    cancel_requested: bool = False
+
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
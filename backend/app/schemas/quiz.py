@@ -13,10 +13,35 @@ class QuestionOut(BaseModel):
     question_id: int
     prompt: str
     topic: str
-    reading_text: Optional[str] = None
+    # Texto de lectura compartido: se pide una vez a /quiz/passages/{passage_id}
+    # y se cachea por (passage_id, passage_version).
+    passage_id: Optional[int] = None
+    passage_version: Optional[int] = None
     choices: List[ChoiceOut]
 
 
+class PassageOut(BaseModel):
+    passage_id: int
+    version: int
+    text: str
+
+
+class PassageQuestionOut(BaseModel):
+    question_id: int
+    prompt: str
+    choices: List[ChoiceOut]
+
+
+class PassageQuestionsOut(BaseModel):
+    """Modo `passage`: el texto una vez + todas sus preguntas pendientes."""
+    kind: Literal["passage_questions"] = "passage_questions"
+    topic: str
+    passage_id: int
+    passage_version: int
+    text: str
+    questions: List[PassageQuestionOut]
+
+
 class AnswerIn(BaseModel):
     # `user_id` se deriva del JWT (get_current_user). Se mantiene opcional por compatibilidad hacia atrás.
     user_id: Optional[int] = None
@@ -53,3 +78,14 @@ class AIFeedbackOut(BaseModel):
     source: str
     correct_choice_id: Optional[int] = None
     correct_choice_label: Optional[str] = None
+
+
+class AttemptFeedbackItemOut(AIFeedbackOut):
+    feedback_id: int
+    question_id: int
+    selected_choice_id: Optional[int] = None
+
+
+class AttemptFeedbackOut(BaseModel):
+    attempt_id: int
+    items: List[AttemptFeedbackItemOut]
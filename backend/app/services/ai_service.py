@@ -1,25 +1,58 @@
-from app.db.models import AttemptFeedback, Question, QuestionChoice
+from typing import Optional
+
+from sqlalchemy import and_, select
 from sqlalchemy.orm import Session
 
+from app.db.models import Attempt, AttemptFeedback, Question, QuestionChoice, Topic
+from app.services.explanation_store import explanation_store
 
-def generate_feedback_phase1(feedback: AttemptFeedback, db: Session) -> dict:
+# Versión del generador guardada junto al feedback en `AttemptFeedback.ai_payload`
+# y en la llave de `explanation_store`. Lo guardado se sirve tal cual mientras
+# coincida; subirla (nuevas reglas, fase 2 con LLM, otro prompt) hace que se
+# regenere al pedirlo.
+FEEDBACK_GENERATOR_VERSION = "rule_based_phase1:1"
+
+
+def _feedback_context_stmt():
+    """
+    Feedback + código de topic + alternativa correcta en una sola query.
+
+    Antes eran ~4 queries por ítem (pregunta, alternativa correcta y la carga
+    lazy de `question.topic`); así un attempt completo cuesta una.
+    """
+    return (
+        select(AttemptFeedback, Topic.code, QuestionChoice)
+        .outerjoin(Question, Question.id == AttemptFeedback.question_id)
+        .outerjoin(Topic, Topic.id == Question.topic_id)
+        .outerjoin(
+            QuestionChoice,
+            and_(
+                QuestionChoice.question_id == AttemptFeedback.question_id,
+                QuestionChoice.is_correct == True,  # noqa: E712
+            ),
+        )
+        .order_by(AttemptFeedback.id, QuestionChoice.id)
+    )
+
+
+def build_feedback_phase1(
+    feedback: AttemptFeedback, topic_code: Optional[str], correct_choice: Optional[QuestionChoice]
+) -> dict:
     """
     Fase 1 - Rule-based feedback generator (sin LLM).
     Estrategia:
     1. Si respuesta correcta: feedback positivo variado
     2. Si incorrecta: hint basado en el tema + text de la opción correcta
+
+    No consulta la DB: recibe lo que carga `_feedback_context_stmt`.
     """
-    
-    # Obtener question y correcta choice
-    question = db.query(Question).get(feedback.question_id)
-    correct_choice = db.query(QuestionChoice).filter(
-        QuestionChoice.question_id == feedback.question_id,
-        QuestionChoice.is_correct == True
-    ).first()
-    
-    if not question or not correct_choice:
-        return {"explanation": "No se pudo generar feedback.", "source": "rule_based_phase1"}
-    
+    if correct_choice is None:
+        return {
+            "explanation": "No se pudo generar feedback.",
+            "is_correct": feedback.is_correct,
+            "source": "rule_based_phase1",
+        }
+
     if feedback.is_correct:
         # Feedback positivo variado
         positive_messages = [
@@ -42,7 +75,7 @@ def generate_feedback_phase1(feedback: AttemptFeedback, db: Session) -> dict:
     else:
         # Feedback negativo con hint
         # Mostrar la respuesta correcta y un hint genérico
-        topic = question.topic.code if question.topic else "general"
+        topic = topic_code or "general"
         
         feedback_messages = {
             "ALG": "Recuerda: este tema trata sobre Álgebra. Revisa las propiedades y operaciones algebraicas.",
@@ -63,12 +96,123 @@ def generate_feedback_phase1(feedback: AttemptFeedback, db: Session) -> dict:
         }
 
 
+def generate_feedback_phase1(feedback: AttemptFeedback, db: Session) -> dict:
+    row = db.execute(_feedback_context_stmt().where(AttemptFeedback.id == feedback.id).limit(1)).first()
+    _, topic_code, correct_choice = row if row else (feedback, None, None)
+    return _resolve_feedback(db, [(feedback, topic_code, correct_choice)])[feedback.id]
+
+
+def _shared_key(feedback: AttemptFeedback, correct_choice: Optional[QuestionChoice]):
+    """
+    Llave en `explanation_store`, o None si la explicación no es compartible:
+    las respuestas correctas llevan un mensaje por attempt (sin costo de
+    generación) y sin alternativa correcta/elegida no hay explicación.
+    """
+    if feedback.is_correct or correct_choice is None or feedback.selected_choice_id is None:
+        return None
+    return (feedback.question_id, feedback.selected_choice_id)
+
+
+def _resolve_feedback(db: Session, rows: list) -> dict[int, dict]:
+    """
+    Payload de cada (feedback, topic_code, correct_choice), por feedback_id.
+
+    Antes de generar consulta las explicaciones compartidas del lote (LRU +
+    una query); las que faltan se generan una vez por (pregunta, alternativa)
+    y se guardan con un INSERT. Cada fila queda además en su `ai_payload`.
+    """
+    keys = [key for feedback, _, correct_choice in rows if (key := _shared_key(feedback, correct_choice))]
+    shared = explanation_store.get_many(db, keys, FEEDBACK_GENERATOR_VERSION) if keys else {}
+    generated: dict = {}
+
+    results: dict[int, dict] = {}
+    for feedback, topic_code, correct_choice in rows:
+        key = _shared_key(feedback, correct_choice)
+        result = (shared.get(key) or generated.get(key)) if key else None
+        if result is None:
+            result = build_feedback_phase1(feedback, topic_code, correct_choice)
+            if key:
+                generated[key] = result
+        results[feedback.id] = result
+
+    # si otro proceso guardó la misma explicación en paralelo, vale la suya
+    stored = explanation_store.put_many(db, generated, FEEDBACK_GENERATOR_VERSION)
+    payloads: dict[int, dict] = {}
+    for feedback, _, correct_choice in rows:
+        key = _shared_key(feedback, correct_choice)
+        result = stored.get(key, results[feedback.id]) if key else results[feedback.id]
+        payloads[feedback.id] = _store_feedback(feedback, result, correct_choice)
+    return payloads
+
+
+def stored_feedback(feedback: AttemptFeedback) -> Optional[dict]:
+    """Payload ya generado con la versión actual del generador, o None."""
+    payload = feedback.ai_payload or {}
+    if payload.get("generator_version") == FEEDBACK_GENERATOR_VERSION:
+        return payload
+    return None
+
+
+def _store_feedback(feedback: AttemptFeedback, result: dict, correct_choice: Optional[QuestionChoice]) -> dict:
+    """
+    Write-through: deja el resultado en `ai_payload` (lo persiste el commit
+    del llamador). El fallback sin alternativa correcta no se guarda, para
+    que se regenere cuando se corrija la pregunta.
+    """
+    if correct_choice is None:
+        return result
+    payload = {**result, "generator_version": FEEDBACK_GENERATOR_VERSION}
+    feedback.ai_payload = payload
+    return payload
+
+
+def generate_attempt_feedback(db: Session, attempt_id: int, user_id: int) -> list[dict]:
+    """
+    Feedback de todas las respuestas de un attempt, en orden de respuesta.
+
+    Una query para todo el attempt (ver `_feedback_context_stmt`), que además
+    filtra por dueño: un attempt ajeno retorna lista vacía. Los ítems sin
+    payload de la versión actual se generan y quedan en `ai_payload` (commit
+    del llamador). Cada ítem agrega `feedback_id`, `question_id` y
+    `selected_choice_id`.
+    """
+    rows: dict[int, tuple] = {}
+    for feedback, topic_code, correct_choice in db.execute(
+        _feedback_context_stmt()
+        .join(Attempt, Attempt.id == AttemptFeedback.attempt_id)
+        .where(AttemptFeedback.attempt_id == attempt_id, Attempt.user_id == user_id)
+    ):
+        # más de una alternativa marcada correcta: vale la primera
+        rows.setdefault(feedback.id, (feedback, topic_code, correct_choice))
+
+    payloads = {feedback_id: stored_feedback(row[0]) for feedback_id, row in rows.items()}
+    pending = [row for feedback_id, row in rows.items() if payloads[feedback_id] is None]
+    if pending:
+        payloads.update(_resolve_feedback(db, pending))
+
+    return [
+        {
+            "feedback_id": feedback.id,
+            "question_id": feedback.question_id,
+            "selected_choice_id": feedback.selected_choice_id,
+            **payloads[feedback.id],
+        }
+        for feedback, _, _ in rows.values()
+    ]
+
+
 def generate_feedback(feedback: AttemptFeedback, db: Session) -> dict:
     """
     Main feedback generator.
     
     Por ahora: fase 1 (reglas).
     Futuro: agregar LLM en fase 2.
+
+    Sirve el payload guardado si es de la versión actual (sin queries); si no,
+    genera y lo deja en `ai_payload` para que el llamador haga commit.
     """
+    payload = stored_feedback(feedback)
+    if payload is not None:
+        return payload
     return generate_feedback_phase1(feedback, db)
 
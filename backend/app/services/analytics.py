@@ -0,0 +1,89 @@
+"""
+Analítica de contenido para admins (vistas materializadas).
+
+Precisión por pregunta, tasa de elección de cada alternativa y attempts por
+topic salen de agregar `attempt_feedback`/`attempts` completos: hacerlo por
+request pesaría sobre la DB principal. Las vistas (migración 444014f9e2bc)
+guardan el agregado y se refrescan con `REFRESH MATERIALIZED VIEW
+CONCURRENTLY` desde un cron (`scripts/refresh_analytics.py`); los endpoints
+de `/analytics` solo leen filas por índice.
+
+Las tablas se declaran en un MetaData propio: `Base.metadata.create_all`
+(AUTO_CREATE_TABLES) no debe crearlas como tablas comunes.
+"""
+
+import time
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, Integer, MetaData, Numeric, String, Table, text
+)
+from sqlalchemy.engine import Connection
+
+analytics_metadata = MetaData()
+
+question_stats = Table(
+    "question_stats_mv",
+    analytics_metadata,
+    Column("question_id", Integer, primary_key=True),
+    Column("topic_id", Integer),
+    Column("answered_count", Integer),
+    Column("correct_count", Integer),
+    Column("accuracy", Float),
+    Column("last_answered_at", DateTime(timezone=True)),
+    Column("refreshed_at", DateTime(timezone=True)),
+)
+
+choice_pick_stats = Table(
+    "choice_pick_stats_mv",
+    analytics_metadata,
+    Column("choice_id", Integer, primary_key=True),
+    Column("question_id", Integer),
+    Column("label", String(1)),
+    Column("is_correct", Boolean),
+    Column("picked_count", Integer),
+    Column("refreshed_at", DateTime(timezone=True)),
+)
+
+topic_stats = Table(
+    "topic_stats_mv",
+    analytics_metadata,
+    Column("topic_id", Integer, primary_key=True),
+    Column("subject_id", Integer),
+    Column("attempts_count", Integer),
+    Column("completed_count", Integer),
+    Column("users_count", Integer),
+    Column("answered_count", Integer),
+    Column("correct_count", Integer),
+    Column("avg_score", Numeric),
+    Column("refreshed_at", DateTime(timezone=True)),
+)
+
+ANALYTICS_VIEWS = tuple(analytics_metadata.tables)
+
+
+def refresh_analytics(conn: Connection, concurrently: bool = True) -> dict[str, float]:
+    """
+    Refresca cada vista en su propia transacción y retorna {vista: segundos}.
+
+    CONCURRENTLY no bloquea las lecturas de los endpoints (usa el índice único
+    de cada vista); una vista nunca poblada se refresca sin CONCURRENTLY,
+    que Postgres no permite en ese caso.
+    """
+    populated = dict(
+        conn.execute(
+            text("SELECT matviewname, ispopulated FROM pg_matviews WHERE matviewname = ANY(:names)"),
+            {"names": list(ANALYTICS_VIEWS)},
+        ).all()
+    )
+    conn.commit()
+
+    timings: dict[str, float] = {}
+    for name in ANALYTICS_VIEWS:
+        if name not in populated:
+            raise RuntimeError(f"{name} no existe: ejecutar `alembic upgrade head`")
+        mode = "CONCURRENTLY " if concurrently and populated[name] else ""
+        started = time.perf_counter()
+        conn.execute(text(f"REFRESH MATERIALIZED VIEW {mode}{name}"))
+        conn.commit()
+        timings[name] = time.perf_counter() - started
+    return timings
@@ -0,0 +1,94 @@
+"""
+Caché en memoria del catálogo (exams → subjects → topics).
+
+El catálogo casi no cambia: cada respuesta se renderiza una vez por versión
+a bytes JSON (más variantes gzip y brotli) y se sirve tal cual, sin tocar la
+DB ni volver a serializar. La versión se incrementa con `invalidate()`
+(escrituras admin) y, como los seeds corren en otro proceso, además expira
+por TTL (`CATALOG_CACHE_TTL_SECONDS`).
+"""
+
+import gzip
+import json
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+from app.core.config import settings
+from app.core.http_cache import make_etag
+
+# Orden de preferencia del servidor al negociar Accept-Encoding.
+COMPRESSED_ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+class CatalogEntry:
+    """Snapshot renderado: bytes por codificación y un ETag por variante."""
+
+    __slots__ = ("bodies", "etags", "built_at")
+
+    def __init__(self, bodies: dict[str, bytes], etags: dict[str, str], built_at: float):
+        self.bodies = bodies
+        self.etags = etags
+        self.built_at = built_at
+
+
+def render_entry(key: Hashable, payload: Any, built_at: float) -> CatalogEntry:
+    # Mismo formato que JSONResponse de FastAPI.
+    body = json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    bodies = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli:
+        bodies["br"] = brotli.compress(body, quality=11)
+
+    # El ETag depende solo del contenido: es estable entre workers y entre
+    # reinicios. Cada codificación lleva su propio ETag fuerte.
+    tag = make_etag(key, body).strip('"')
+    etags = {
+        encoding: f'"{tag}"' if encoding == "identity" else f'"{tag}-{encoding}"'
+        for encoding in bodies
+    }
+    return CatalogEntry(bodies, etags, built_at)
+
+
+class CatalogCache:
+    def __init__(self, ttl_seconds: int):
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: dict[Hashable, CatalogEntry] = {}
+        self.version = 0
+
+    def get_or_build(self, key: Hashable, builder: Callable[[], Optional[Any]]) -> Optional[CatalogEntry]:
+        """
+        Retorna la entrada cacheada para `key` o la construye con `builder`.
+
+        Si `builder` retorna None (ej: exam inexistente) no se cachea.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and (self._ttl <= 0 or now - entry.built_at < self._ttl):
+                return entry
+            version = self.version
+
+        payload = builder()
+        if payload is None:
+            return None
+        entry = render_entry(key, payload, now)
+
+        with self._lock:
+            # Si hubo invalidate() mientras se construía, no guardar datos viejos.
+            if version == self.version:
+                self._entries[key] = entry
+        return entry
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+
+catalog_cache = CatalogCache(settings.CATALOG_CACHE_TTL_SECONDS)
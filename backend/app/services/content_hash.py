@@ -0,0 +1,125 @@
+"""
+Hash de contenido de preguntas (deduplicación exacta).
+
+`content_hash` = sha256 del enunciado, texto de lectura y alternativas
+normalizados (NFKC, minúsculas, espacios colapsados). No incluye la
+alternativa correcta ni la dificultad: dos preguntas con el mismo texto son
+la misma pregunta aunque cambie la clave.
+
+`questions` tiene un índice único (content_hash, topic_id): buscar duplicados
+de un lote es un `content_hash = ANY(...)` indexado, y los seeds pueden usar
+`ON CONFLICT DO NOTHING`.
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+_WHITESPACE = re.compile(r"\s+")
+# separadores que no aparecen en texto normalizado
+_FIELD_SEP = "\x1f"
+_CHOICE_SEP = "\x1e"
+
+
+def normalize_text(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKC", value).casefold()
+    return _WHITESPACE.sub(" ", value).strip()
+
+
+def content_hash(
+    prompt: str,
+    reading_text: Optional[str],
+    choices: Iterable[tuple[str, str]],
+) -> str:
+    """`choices` son pares (label, text); el orden de entrada no importa."""
+    parts = [normalize_text(prompt), normalize_text(reading_text)]
+    parts.append(
+        _CHOICE_SEP.join(
+            f"{label.upper()}:{normalize_text(choice_text)}"
+            for label, choice_text in sorted(choices)
+        )
+    )
+    return hashlib.sha256(_FIELD_SEP.join(parts).encode("utf-8")).hexdigest()
+
+
+BACKFILL_BATCH_SQL = text(
+    """
+    SELECT
+        q.id,
+        q.topic_id,
+        q.prompt,
+        p.text AS reading_text,
+        coalesce(
+            json_agg(json_build_array(c.label, c.text) ORDER BY c.label)
+                FILTER (WHERE c.id IS NOT NULL),
+            '[]'
+        ) AS choices
+    FROM questions q
+    LEFT JOIN passages p ON p.id = q.passage_id
+    LEFT JOIN question_choices c ON c.question_id = q.id
+    WHERE q.content_hash IS NULL AND q.id > :after_id
+    GROUP BY q.id, p.id
+    ORDER BY q.id
+    LIMIT :batch_size
+    """
+)
+
+
+def backfill_content_hashes(conn: Connection, batch_size: int = 1000) -> tuple[int, int]:
+    """
+    Completa `content_hash` en las filas que no lo tienen, por lotes de id.
+
+    Si el hash ya existe en el topic (o se repite dentro del lote), la fila
+    queda en NULL: es un duplicado exacto y el índice único no la admite.
+    Retorna (filas actualizadas, duplicados dejados en NULL). No hace commit.
+    """
+    updated = 0
+    duplicates = 0
+    after_id = 0
+    while True:
+        rows = conn.execute(BACKFILL_BATCH_SQL, {"after_id": after_id, "batch_size": batch_size}).all()
+        if not rows:
+            break
+        after_id = rows[-1].id
+
+        hashed = [
+            (row.id, row.topic_id, content_hash(row.prompt, row.reading_text, [tuple(c) for c in row.choices]))
+            for row in rows
+        ]
+        taken = {
+            (h, topic_id)
+            for h, topic_id in conn.execute(
+                text("SELECT content_hash, topic_id FROM questions WHERE content_hash = ANY(:hashes)"),
+                {"hashes": [h for _, _, h in hashed]},
+            )
+        }
+        ids: list[int] = []
+        hashes: list[str] = []
+        for question_id, topic_id, h in hashed:
+            if (h, topic_id) in taken:
+                duplicates += 1
+                continue
+            taken.add((h, topic_id))
+            ids.append(question_id)
+            hashes.append(h)
+
+        if ids:
+            conn.execute(
+                text(
+                    """
+                    UPDATE questions AS q
+                    SET content_hash = v.content_hash
+                    FROM unnest(CAST(:ids AS integer[]), CAST(:hashes AS varchar[])) AS v(id, content_hash)
+                    WHERE q.id = v.id
+                    """
+                ),
+                {"ids": ids, "hashes": hashes},
+            )
+            updated += len(ids)
+    return updated, duplicates
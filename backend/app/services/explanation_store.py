@@ -0,0 +1,135 @@
+"""
+Explicaciones compartidas por (pregunta, alternativa elegida, versión del generador).
+
+La explicación de una alternativa incorrecta es la misma para todos los
+alumnos que la eligen: se genera una vez y se guarda en
+`feedback_explanations`, con un LRU por proceso adelante
+(`EXPLANATION_CACHE_MAX_ENTRIES`). Con la fase 2 (LLM), cada par
+(pregunta, alternativa) cuesta a lo más una llamada por versión del
+generador, sin importar cuántos alumnos la elijan.
+
+`ai_service` lo consulta antes de generar; el payload por respuesta
+(`AttemptFeedback.ai_payload`) sigue siendo el write-through de cada fila.
+
+El LRU solo guarda lo que está en la tabla: lo leído de ella, y lo escrito
+por `put_many` recién después del commit de la sesión (un rollback lo
+descarta).
+"""
+
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import event, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.models import FeedbackExplanation
+
+# (question_id, choice_id)
+ExplanationKey = tuple[int, int]
+
+# entradas escritas en la transacción en curso, a pasar al LRU en el commit
+_PENDING_INFO_KEY = "explanation_store_pending"
+
+
+class ExplanationStore:
+    def __init__(self, max_entries: int):
+        self._cache = LRUCache(max_entries)
+
+    def get_many(self, db: Session, keys: Iterable[ExplanationKey], version: str) -> dict[ExplanationKey, dict]:
+        """Explicaciones ya generadas para `keys`: LRU primero, una query para el resto."""
+        found: dict[ExplanationKey, dict] = {}
+        missing: list[ExplanationKey] = []
+        for key in set(keys):
+            payload = self._cache.get((*key, version))
+            if payload is None:
+                missing.append(key)
+            else:
+                found[key] = payload
+        if not missing:
+            return found
+
+        rows = db.execute(
+            select(FeedbackExplanation.question_id, FeedbackExplanation.choice_id, FeedbackExplanation.payload).where(
+                tuple_(FeedbackExplanation.question_id, FeedbackExplanation.choice_id).in_(missing),
+                FeedbackExplanation.generator_version == version,
+            )
+        )
+        for question_id, choice_id, payload in rows:
+            found[(question_id, choice_id)] = payload
+            self._cache.set((question_id, choice_id, version), payload)
+        return found
+
+    def put_many(
+        self, db: Session, payloads: dict[ExplanationKey, dict], version: str
+    ) -> dict[ExplanationKey, dict]:
+        """
+        Guarda explicaciones recién generadas (un INSERT multi-fila, sin commit).
+
+        ON CONFLICT DO NOTHING: si otro proceso generó la misma en paralelo,
+        queda la primera; esas se releen (una query) para que el llamador y el
+        LRU usen la guardada. Retorna {key: payload en la tabla}.
+        """
+        if not payloads:
+            return {}
+        now = datetime.utcnow()
+        inserted = db.execute(
+            pg_insert(FeedbackExplanation)
+            .values(
+                [
+                    {
+                        "question_id": question_id,
+                        "choice_id": choice_id,
+                        "generator_version": version,
+                        "payload": payload,
+                        "created_at": now,
+                    }
+                    for (question_id, choice_id), payload in payloads.items()
+                ]
+            )
+            .on_conflict_do_nothing()
+            .returning(FeedbackExplanation.question_id, FeedbackExplanation.choice_id)
+        ).all()
+        stored = {(question_id, choice_id): payloads[(question_id, choice_id)] for question_id, choice_id in inserted}
+        lost = [key for key in payloads if key not in stored]
+        if lost:
+            stored.update(
+                ((question_id, choice_id), payload)
+                for question_id, choice_id, payload in db.execute(
+                    select(
+                        FeedbackExplanation.question_id, FeedbackExplanation.choice_id, FeedbackExplanation.payload
+                    ).where(
+                        tuple_(FeedbackExplanation.question_id, FeedbackExplanation.choice_id).in_(lost),
+                        FeedbackExplanation.generator_version == version,
+                    )
+                )
+            )
+        self._cache_after_commit(db, {(*key, version): payload for key, payload in stored.items()})
+        return stored
+
+    def _cache_after_commit(self, db: Session, entries: dict) -> None:
+        if _PENDING_INFO_KEY not in db.info:
+            db.info[_PENDING_INFO_KEY] = {}
+            event.listen(db, "after_commit", self._flush_pending)
+            event.listen(db, "after_rollback", self._drop_pending)
+        db.info[_PENDING_INFO_KEY].update(entries)
+
+    def _flush_pending(self, session: Session) -> None:
+        pending = session.info.get(_PENDING_INFO_KEY)
+        if pending:
+            for key, payload in pending.items():
+                self._cache.set(key, payload)
+            pending.clear()
+
+    def _drop_pending(self, session: Session) -> None:
+        pending = session.info.get(_PENDING_INFO_KEY)
+        if pending:
+            pending.clear()
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+explanation_store = ExplanationStore(settings.EXPLANATION_CACHE_MAX_ENTRIES)
@@ -0,0 +1,297 @@
+"""
+Importaciones de preguntas en segundo plano (tabla `import_jobs`).
+
+`POST /questions/import-jobs` guarda el archivo en `IMPORT_JOBS_DIR`, crea el
+job en estado `queued` y responde 202 de inmediato. Un thread pool dentro del
+proceso (`IMPORT_JOB_WORKERS` threads) corre `run_job`, que reutiliza el
+pipeline streaming de `question_import` y actualiza el progreso del job en
+cada chunk. La cancelación es cooperativa: se marca `cancel_requested` y el
+worker se detiene en el siguiente chunk (lo ya confirmado queda creado).
+
+El archivo vive en el disco local: un job lo procesa el proceso que lo
+recibió. Al arrancar, cada proceso retoma los jobs `queued` cuyo archivo
+tiene a mano y marca como `failed` los `running` sin progreso reciente
+(proceso caído a mitad de import).
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import BinaryIO, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Exam, ImportJob
+from app.db.session import SessionLocal
+from app.services.catalog_cache import catalog_cache
+from app.services.question_import import ImportAborted, QuestionValidator, import_questions, iter_import_rows
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _jobs_dir() -> str:
+    path = settings.IMPORT_JOBS_DIR or os.path.join(tempfile.gettempdir(), "tutorpaes-imports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.IMPORT_JOB_WORKERS),
+                thread_name_prefix="import-job",
+            )
+        return _executor
+
+
+def create_job(
+    db: Session,
+    fileobj: BinaryIO,
+    filename: Optional[str],
+    fmt: str,
+    chunk_size: int,
+    dry_run: bool,
+    user_id: Optional[int],
+    allow_near_duplicates: bool = False,
+) -> ImportJob:
+    """Copia el upload a disco (en bloques) y registra el job como `queued`."""
+    file_path = os.path.join(_jobs_dir(), f"{uuid.uuid4().hex}.{fmt}")
+    with open(file_path, "wb") as out:
+        shutil.copyfileobj(fileobj, out, 1024 * 1024)
+
+    now = datetime.utcnow()
+    job = ImportJob(
+        created_by=user_id,
+        status="queued",
+        format=fmt,
+        filename=(filename or "")[:255] or None,
+        file_path=file_path,
+        dry_run=dry_run,
+        chunk_size=chunk_size,
+        allow_near_duplicates=allow_near_duplicates,
+        rows_processed=0,
+        created_count=0,
+        skipped_count=0,
+        chunks_committed=0,
+        errors=[],
+        errors_truncated=False,
+        cancel_requested=False,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        _remove_file(file_path)
+        raise
+    return job
+
+
+def enqueue(job_id: int) -> None:
+    _get_executor().submit(run_job, job_id)
+
+
+def request_cancel(db: Session, job_id: int) -> Optional[ImportJob]:
+    """
+    Cancela un job: si sigue en cola se cancela de inmediato; si está
+    corriendo, el worker se detiene en el próximo chunk.
+    """
+    now = datetime.utcnow()
+    cancelled = db.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id, ImportJob.status == "queued")
+        .values(status="cancelled", cancel_requested=True, finished_at=now, updated_at=now)
+        .returning(ImportJob.file_path)
+    ).first()
+    if cancelled is None:
+        db.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status == "running")
+            .values(cancel_requested=True, updated_at=now)
+        )
+    db.commit()
+    if cancelled is not None:
+        _remove_file(cancelled.file_path)
+    return db.get(ImportJob, job_id)
+
+
+def run_job(job_id: int) -> None:
+    db = SessionLocal()
+    claimed = False
+    dry_run, file_path = True, None
+    try:
+        job = _claim(db, job_id)
+        if job is None:
+            return
+        claimed = True
+        dry_run, file_path = job.dry_run, job.file_path
+        if not file_path or not os.path.exists(file_path):
+            _finish(db, job_id, "failed", error_message="Archivo del import no disponible en este proceso")
+            return
+
+        exam = db.scalar(select(Exam).where(Exam.code == settings.PAES_CODE))
+        if not exam:
+            _finish(
+                db,
+                job_id,
+                "failed",
+                error_message=f"{settings.PAES_CODE} exam no inicializado. Ejecutar seed_paes.py",
+            )
+            return
+        validator = QuestionValidator(db, exam)
+        reported_errors = 0
+
+        def on_progress(summary: dict) -> bool:
+            nonlocal reported_errors
+            values = _progress_values(summary)
+            if len(summary["errors"]) == reported_errors:
+                values.pop("errors")
+            reported_errors = len(summary["errors"])
+            cancel_requested = db.execute(
+                update(ImportJob)
+                .where(ImportJob.id == job_id)
+                .values(**values)
+                .returning(ImportJob.cancel_requested)
+            ).scalar_one()
+            db.commit()
+            return not cancel_requested
+
+        with open(file_path, "rb") as fileobj:
+            summary = import_questions(
+                db,
+                validator,
+                iter_import_rows(fileobj, job.format),
+                chunk_size=job.chunk_size,
+                dry_run=dry_run,
+                max_errors=settings.IMPORT_MAX_REPORTED_ERRORS,
+                on_progress=on_progress,
+                allow_near_duplicates=job.allow_near_duplicates,
+            )
+        _finish(db, job_id, "cancelled" if summary["cancelled"] else "completed", summary)
+    except ImportAborted as exc:
+        # los chunks confirmados y los errores por fila quedan en el job
+        db.rollback()
+        message = f"{exc.detail} (fila {exc.row})" if exc.row else exc.detail
+        _finish(db, job_id, "failed", exc.summary, error_message=message)
+    except Exception as exc:
+        logger.exception("Import job %s failed", job_id)
+        db.rollback()
+        _finish(db, job_id, "failed", error_message=str(exc)[:1000])
+    finally:
+        if claimed:
+            # Los chunks confirmados ya son visibles aunque el job falle.
+            if not dry_run:
+                catalog_cache.invalidate()
+            _remove_file(file_path)
+        db.close()
+
+
+def resume_pending_jobs() -> None:
+    """Al arrancar: re-encola jobs `queued` locales y cierra `running` huérfanos."""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS)
+        db.execute(
+            update(ImportJob)
+            .where(ImportJob.status == "running", ImportJob.updated_at < stale_before)
+            .values(
+                status="failed",
+                error_message="Import interrumpido (el proceso se detuvo)",
+                finished_at=now,
+                updated_at=now,
+            )
+        )
+        db.commit()
+        queued = db.execute(
+            select(ImportJob.id, ImportJob.file_path).where(ImportJob.status == "queued")
+        ).all()
+    except Exception:
+        db.rollback()
+        logger.exception("No se pudieron retomar los import jobs pendientes")
+        return
+    finally:
+        db.close()
+
+    for job_id, file_path in queued:
+        if file_path and os.path.exists(file_path):
+            enqueue(job_id)
+
+
+def start_import_workers() -> None:
+    resume_pending_jobs()
+
+
+def stop_import_workers() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _claim(db: Session, job_id: int) -> Optional[ImportJob]:
+    """Pasa el job de `queued` a `running` de forma atómica (un solo worker lo toma)."""
+    now = datetime.utcnow()
+    claimed = db.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id, ImportJob.status == "queued")
+        .values(status="running", started_at=now, updated_at=now)
+        .returning(ImportJob.id)
+    ).first()
+    db.commit()
+    if claimed is None:
+        return None
+    return db.get(ImportJob, job_id)
+
+
+def _progress_values(summary: dict) -> dict:
+    return {
+        "rows_processed": summary["total"],
+        "created_count": summary["created"],
+        "skipped_count": summary["skipped"],
+        "chunks_committed": summary["chunks_committed"],
+        "errors": list(summary["errors"]),
+        "errors_truncated": summary["errors_truncated"],
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def _finish(
+    db: Session,
+    job_id: int,
+    status: str,
+    summary: Optional[dict] = None,
+    error_message: Optional[str] = None,
+) -> None:
+    values = _progress_values(summary) if summary is not None else {"updated_at": datetime.utcnow()}
+    values.update(status=status, finished_at=datetime.utcnow(), error_message=error_message)
+    db.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+    db.commit()
+
+
+def _remove_file(path: Optional[str]) -> None:
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        logger.warning("No se pudo borrar el archivo de import %s", path)
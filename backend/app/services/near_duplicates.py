@@ -0,0 +1,396 @@
+"""
+Detección de preguntas casi duplicadas (MinHash + LSH).
+
+`content_hash` solo atrapa copias exactas; una pregunta reescrita ("¿Cuál es
+la idea principal?" vs "¿Cuál es la idea central?") pasa. Para esas:
+
+- Cada pregunta guarda su firma MinHash (`questions.minhash`, NUM_PERM
+  enteros uint32 en bytea) calculada sobre shingles de 3 palabras del
+  enunciado y de cada alternativa, normalizados como en `content_hash`. El
+  texto de lectura no entra: las preguntas de un mismo texto lo comparten y
+  se verían todas iguales.
+- `NearDuplicateIndex` mantiene en memoria un índice LSH: la firma se parte en
+  `bands` bandas de `rows` valores; dos preguntas son candidatas si coinciden
+  en alguna banda completa y son del mismo topic (como el dedupe exacto, que
+  es por topic: la clave de cada banda incluye el topic_id). Buscar es una
+  búsqueda binaria por banda (sub-lineal), y solo los candidatos se comparan
+  firma contra firma para estimar la similitud de Jaccard.
+
+El índice se arma en el startup de la app, antes de aceptar requests, y un
+thread de fondo lo reconstruye cada `NEAR_DUP_REBUILD_SECONDS`; antes de cada
+búsqueda se cargan las preguntas con id mayor al último visto, así también ve
+lo insertado por otros procesos. Quien cambie el topic (o la firma) de
+preguntas existentes llama a `reindex` con esos ids después del commit; en
+otros procesos el cambio se ve en la próxima reconstrucción. Si la carga
+inicial falla, no se reportan casi duplicados hasta la próxima reconstrucción.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import zlib
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Question
+from app.db.session import SessionLocal
+from app.services.content_hash import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Cambiarlo invalida las firmas guardadas (recalcular con scripts.backfill_minhash --all).
+NUM_PERM = 128
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_WORD = re.compile(r"\w+")
+
+# A partir de cuántas firmas nuevas se reordenan los arreglos del índice.
+_PENDING_MERGE = 2000
+
+
+def _stable_ints(prefix: str, count: int, bits: int) -> np.ndarray:
+    """Constantes deterministas (no dependen del RNG de NumPy ni del proceso)."""
+    mask = (1 << bits) - 1
+    values = [
+        int.from_bytes(hashlib.blake2b(f"{prefix}-{i}".encode(), digest_size=8).digest(), "big") & mask
+        for i in range(count)
+    ]
+    return np.array([v | 1 for v in values], dtype=np.uint64)
+
+
+# h_i(x) = (a_i * x + b_i) mod p: con a, b < 2^31 y x < 2^32 no hay overflow en uint64
+_PERM_A = _stable_ints("minhash-a", NUM_PERM, 31)
+_PERM_B = _stable_ints("minhash-b", NUM_PERM, 31)
+_BAND_MULT = _stable_ints("lsh-band", NUM_PERM, 64)
+_TOPIC_MULT = _stable_ints("lsh-topic", 1, 64)[0]
+
+
+def _shingles(prompt: str, choices: Iterable[str]) -> set[bytes]:
+    result: set[bytes] = set()
+    for segment in (prompt, *choices):
+        words = _WORD.findall(normalize_text(segment))
+        if not words:
+            continue
+        if len(words) <= SHINGLE_SIZE:
+            result.add(" ".join(words).encode("utf-8"))
+            continue
+        for i in range(len(words) - SHINGLE_SIZE + 1):
+            result.add(" ".join(words[i : i + SHINGLE_SIZE]).encode("utf-8"))
+    return result
+
+
+def minhash_signature(prompt: str, choices: Iterable[str]) -> Optional[np.ndarray]:
+    """Firma MinHash (NUM_PERM uint32), o None si el texto no tiene palabras."""
+    shingles = _shingles(prompt, choices)
+    if not shingles:
+        return None
+    hashes = np.fromiter((zlib.crc32(s) for s in shingles), dtype=np.uint64, count=len(shingles))
+    permuted = (hashes[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) % _MERSENNE_PRIME
+    return (permuted & _MAX_HASH).min(axis=0).astype(np.uint32)
+
+
+def signature_to_bytes(signature: Optional[np.ndarray]) -> Optional[bytes]:
+    return signature.astype("<u4").tobytes() if signature is not None else None
+
+
+def signature_from_bytes(value: bytes) -> np.ndarray:
+    return np.frombuffer(value, dtype="<u4").astype(np.uint32)
+
+
+def lsh_params(threshold: float) -> tuple[int, int]:
+    """
+    (bands, rows) con bands * rows = NUM_PERM.
+
+    El umbral aproximado de LSH es (1/bands)^(1/rows); se elige el mayor que
+    no supere `threshold`, para no perder pares justo en el límite (los falsos
+    positivos se descartan al comparar las firmas).
+    """
+    best = (NUM_PERM, 1)
+    best_approx = -1.0
+    for rows in range(1, NUM_PERM + 1):
+        if NUM_PERM % rows:
+            continue
+        bands = NUM_PERM // rows
+        approx = (1 / bands) ** (1 / rows)
+        if best_approx < approx <= threshold:
+            best, best_approx = (bands, rows), approx
+    return best
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.bands, self.rows = lsh_params(threshold)
+        self._lock = threading.Lock()
+        # Firmas "consolidadas": arreglos con una clave por banda, ordenados.
+        self._ids = np.empty(0, dtype=np.int64)
+        self._topics = np.empty(0, dtype=np.int64)
+        self._sigs = np.empty((0, NUM_PERM), dtype=np.uint32)
+        self._keys: list[np.ndarray] = [np.empty(0, dtype=np.uint64)] * self.bands
+        self._order: list[np.ndarray] = [np.empty(0, dtype=np.int64)] * self.bands
+        # Firmas recientes: buckets en dict hasta el próximo merge.
+        self._pending_ids: list[int] = []
+        self._pending_topics: list[int] = []
+        self._pending_sigs: list[np.ndarray] = []
+        self._pending_buckets: list[dict[int, list[int]]] = [{} for _ in range(self.bands)]
+        self._max_id = 0
+        self.built = False
+
+    def _band_keys(self, sigs: np.ndarray, topics: np.ndarray) -> np.ndarray:
+        """
+        Una clave uint64 por (firma, banda): hash polinomial de los `rows`
+        valores más el topic, así cada bucket es de un solo topic.
+        """
+        banded = sigs.reshape(len(sigs), self.bands, self.rows).astype(np.uint64)
+        mult = _BAND_MULT[: self.rows]
+        keys = (banded * mult).sum(axis=2, dtype=np.uint64)
+        return keys + (topics.astype(np.uint64) * _TOPIC_MULT)[:, None]
+
+    def _set_arrays(self, ids: np.ndarray, topics: np.ndarray, sigs: np.ndarray) -> None:
+        keys = self._band_keys(sigs, topics)
+        order = [np.argsort(keys[:, b], kind="stable") for b in range(self.bands)]
+        self._ids, self._topics, self._sigs = ids, topics, sigs
+        self._keys = [keys[order[b], b] for b in range(self.bands)]
+        self._order = order
+        self._pending_ids, self._pending_topics, self._pending_sigs = [], [], []
+        self._pending_buckets = [{} for _ in range(self.bands)]
+
+    def _merge_pending(self) -> None:
+        ids = np.concatenate([self._ids, np.array(self._pending_ids, dtype=np.int64)])
+        topics = np.concatenate([self._topics, np.array(self._pending_topics, dtype=np.int64)])
+        sigs = np.vstack([self._sigs, np.array(self._pending_sigs, dtype=np.uint32)])
+        self._set_arrays(ids, topics, sigs)
+
+    def add(self, question_id: int, topic_id: int, signature: np.ndarray) -> None:
+        with self._lock:
+            self._add_locked(question_id, topic_id, signature)
+
+    def _add_locked(self, question_id: int, topic_id: int, signature: np.ndarray) -> None:
+        position = len(self._pending_ids)
+        self._pending_ids.append(question_id)
+        self._pending_topics.append(topic_id)
+        self._pending_sigs.append(signature)
+        keys = self._band_keys(signature[None, :], np.array([topic_id], dtype=np.int64))[0]
+        for b, key in enumerate(keys):
+            self._pending_buckets[b].setdefault(int(key), []).append(position)
+        self._max_id = max(self._max_id, question_id)
+
+    def rebuild(self, db: Session) -> None:
+        """Recarga todas las firmas desde la BD (una query)."""
+        ids: list[int] = []
+        topics: list[int] = []
+        blobs: list[bytes] = []
+        for question_id, topic_id, blob in db.execute(
+            select(Question.id, Question.topic_id, Question.minhash)
+            .where(Question.minhash.is_not(None))
+            .order_by(Question.id)
+        ):
+            if len(blob) == NUM_PERM * 4:
+                ids.append(question_id)
+                topics.append(topic_id)
+                blobs.append(blob)
+        sigs = (
+            np.frombuffer(b"".join(blobs), dtype="<u4").astype(np.uint32).reshape(len(blobs), NUM_PERM)
+            if blobs
+            else np.empty((0, NUM_PERM), dtype=np.uint32)
+        )
+        with self._lock:
+            self._set_arrays(np.array(ids, dtype=np.int64), np.array(topics, dtype=np.int64), sigs)
+            self._max_id = ids[-1] if ids else 0
+            self.built = True
+
+    def refresh(self, db: Session) -> None:
+        """
+        Carga las preguntas con id mayor al último visto (índice por PK).
+
+        No arma el índice: si todavía no está armado (ver `warm_index`) no
+        hace nada, para no cargar el banco completo dentro de un request.
+        """
+        with self._lock:
+            built, after_id = self.built, self._max_id
+        if not built:
+            return
+        rows = db.execute(
+            select(Question.id, Question.topic_id, Question.minhash)
+            .where(Question.id > after_id, Question.minhash.is_not(None))
+            .order_by(Question.id)
+        ).all()
+        if not rows:
+            return
+        with self._lock:
+            # otro request pudo cargar las mismas filas mientras tanto
+            for question_id, topic_id, blob in rows:
+                if question_id > self._max_id and len(blob) == NUM_PERM * 4:
+                    self._add_locked(question_id, topic_id, signature_from_bytes(blob))
+            if len(self._pending_ids) >= _PENDING_MERGE:
+                self._merge_pending()
+
+    def reindex(self, db: Session, question_ids: Iterable[int]) -> None:
+        """
+        Vuelve a cargar de la BD las firmas y topics de `question_ids` (una
+        query por los ids + un reordenamiento en memoria, sin recargar todo).
+
+        Los ids que ya no existen o quedaron sin firma salen del índice; los
+        mayores al último visto se dejan para `refresh`.
+        """
+        with self._lock:
+            built, max_id = self.built, self._max_id
+        ids = sorted({question_id for question_id in question_ids if question_id <= max_id})
+        if not built or not ids:
+            return
+        loaded = [
+            (question_id, topic_id, blob)
+            for question_id, topic_id, blob in db.execute(
+                select(Question.id, Question.topic_id, Question.minhash).where(Question.id.in_(ids))
+            )
+            if blob is not None and len(blob) == NUM_PERM * 4
+        ]
+        new_ids = np.array([row[0] for row in loaded], dtype=np.int64)
+        new_topics = np.array([row[1] for row in loaded], dtype=np.int64)
+        new_sigs = (
+            np.frombuffer(b"".join(row[2] for row in loaded), dtype="<u4").astype(np.uint32).reshape(-1, NUM_PERM)
+        )
+        with self._lock:
+            all_ids = np.concatenate([self._ids, np.array(self._pending_ids, dtype=np.int64)])
+            all_topics = np.concatenate([self._topics, np.array(self._pending_topics, dtype=np.int64)])
+            all_sigs = np.vstack(
+                [self._sigs, np.array(self._pending_sigs, dtype=np.uint32).reshape(-1, NUM_PERM)]
+            )
+            keep = ~np.isin(all_ids, ids)
+            self._set_arrays(
+                np.concatenate([all_ids[keep], new_ids]),
+                np.concatenate([all_topics[keep], new_topics]),
+                np.vstack([all_sigs[keep], new_sigs]),
+            )
+
+    def query(self, signature: np.ndarray, topic_id: int, limit: int = 5) -> list[tuple[int, float]]:
+        """[(question_id, similitud estimada)] del topic >= threshold, de mayor a menor."""
+        keys = self._band_keys(signature[None, :], np.array([topic_id], dtype=np.int64))[0]
+        with self._lock:
+            ids, topics, sigs = self._ids, self._topics, self._sigs
+            positions = [
+                self._order[b][
+                    np.searchsorted(self._keys[b], keys[b], side="left") : np.searchsorted(
+                        self._keys[b], keys[b], side="right"
+                    )
+                ]
+                for b in range(self.bands)
+            ]
+            pending = set()
+            for b in range(self.bands):
+                pending.update(self._pending_buckets[b].get(int(keys[b]), ()))
+            pending = [p for p in pending if self._pending_topics[p] == topic_id]
+            pending_ids = [self._pending_ids[p] for p in pending]
+            pending_sigs = [self._pending_sigs[p] for p in pending]
+
+        matches: list[tuple[int, float]] = []
+        candidates = np.unique(np.concatenate(positions)) if positions else np.empty(0, dtype=np.int64)
+        # las claves ya separan por topic; esto descarta colisiones del hash
+        candidates = candidates[topics[candidates] == topic_id]
+        if len(candidates):
+            similarity = (sigs[candidates] == signature).mean(axis=1)
+            for position in np.nonzero(similarity >= self.threshold)[0]:
+                matches.append((int(ids[candidates[position]]), float(similarity[position])))
+        for question_id, other in zip(pending_ids, pending_sigs):
+            similarity = float((other == signature).mean())
+            if similarity >= self.threshold:
+                matches.append((question_id, similarity))
+        matches.sort(key=lambda m: (-m[1], m[0]))
+        return matches[:limit]
+
+
+near_duplicate_index = NearDuplicateIndex(settings.NEAR_DUP_THRESHOLD)
+
+
+def near_duplicates_enabled() -> bool:
+    return 0 < settings.NEAR_DUP_THRESHOLD < 1
+
+
+_BACKFILL_BATCH_SQL = text(
+    """
+    SELECT
+        q.id,
+        q.prompt,
+        coalesce(array_agg(c.text) FILTER (WHERE c.id IS NOT NULL), '{}') AS choices
+    FROM questions q
+    LEFT JOIN question_choices c ON c.question_id = q.id
+    WHERE q.id > :after_id AND (:all_rows OR q.minhash IS NULL)
+    GROUP BY q.id
+    ORDER BY q.id
+    LIMIT :batch_size
+    """
+)
+
+
+def backfill_minhashes(conn: Connection, batch_size: int = 1000, all_rows: bool = False) -> int:
+    """
+    Calcula `minhash` de las preguntas que no lo tienen (o de todas, con
+    `all_rows`), por lotes de id. Retorna las filas actualizadas. No hace commit.
+    """
+    updated = 0
+    after_id = 0
+    while True:
+        rows = conn.execute(
+            _BACKFILL_BATCH_SQL, {"after_id": after_id, "batch_size": batch_size, "all_rows": all_rows}
+        ).all()
+        if not rows:
+            break
+        after_id = rows[-1].id
+
+        values = [
+            {"id": row.id, "minhash": signature_to_bytes(minhash_signature(row.prompt, row.choices))}
+            for row in rows
+        ]
+        conn.execute(text("UPDATE questions SET minhash = :minhash WHERE id = :id"), values)
+        updated += len(values)
+    return updated
+
+
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def warm_index() -> None:
+    """Carga completa del índice global (startup y reconstrucciones periódicas)."""
+    db = SessionLocal()
+    try:
+        near_duplicate_index.rebuild(db)
+    except Exception:
+        logger.exception("Near-duplicate index rebuild failed")
+    finally:
+        db.close()
+
+
+def _rebuild_loop() -> None:
+    while not _stop.wait(settings.NEAR_DUP_REBUILD_SECONDS):
+        warm_index()
+
+
+def start_background_rebuild() -> None:
+    """
+    Arma el índice en el startup (antes de aceptar requests) y deja un thread
+    que lo reconstruye cada NEAR_DUP_REBUILD_SECONDS.
+    """
+    global _thread
+    if _thread is not None or not near_duplicates_enabled():
+        return
+    warm_index()
+    if settings.NEAR_DUP_REBUILD_SECONDS <= 0:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_rebuild_loop, name="near-dup-index", daemon=True)
+    _thread.start()
+
+
+def stop_background_rebuild() -> None:
+    global _thread
+    _stop.set()
+    _thread = None
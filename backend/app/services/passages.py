@@ -0,0 +1,65 @@
+"""
+Textos de lectura compartidos (tabla `passages`).
+
+Varias preguntas de comprensión lectora usan el mismo texto (hasta 50 KB).
+En vez de guardarlo en cada pregunta, se guarda una vez en `passages`,
+deduplicado por `content_hash` (sha256 del texto normalizado, ver
+`content_hash.normalize_text`), y la pregunta lo referencia con
+`passage_id`. El quiz envía solo (passage_id, version); el cliente pide el
+texto a `/quiz/passages/{id}` una vez y lo cachea.
+
+Los payloads de carga (`reading_text` en create/bulk/import) no cambian:
+`resolve_passages` convierte los textos en ids al escribir.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.db.models import Passage
+from app.services.content_hash import normalize_text
+
+
+def passage_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def resolve_passages(db: Session, texts: Iterable[Optional[str]]) -> dict[str, int]:
+    """
+    Asegura que cada texto tenga su fila en `passages` y retorna {texto: passage_id}.
+
+    Dos queries para todo el lote (INSERT ... ON CONFLICT DO NOTHING + SELECT
+    por hash), sin importar cuántas preguntas compartan cada texto. No hace
+    commit: queda en la transacción del llamador.
+    """
+    hashes: dict[str, str] = {}
+    for text in texts:
+        if text and text not in hashes:
+            hashes[text] = passage_hash(text)
+    if not hashes:
+        return {}
+
+    now = datetime.utcnow()
+    first_text_by_hash: dict[str, str] = {}
+    for text, h in hashes.items():
+        first_text_by_hash.setdefault(h, text)
+    db.execute(
+        pg_insert(Passage)
+        .values(
+            [
+                {"content_hash": h, "text": text, "version": 1, "created_at": now, "updated_at": now}
+                for h, text in first_text_by_hash.items()
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=[Passage.content_hash])
+    )
+    ids_by_hash = dict(
+        db.execute(
+            select(Passage.content_hash, Passage.id).where(Passage.content_hash.in_(first_text_by_hash))
+        ).all()
+    )
+    return {text: ids_by_hash[h] for text, h in hashes.items()}
@@ -0,0 +1,119 @@
+"""
+Rollups de progreso por (user, topic) mantenidos incrementalmente.
+
+`record_answer` se llama en la misma transacción que crea el AttemptFeedback,
+así `user_progress` nunca queda desfasado respecto de las respuestas. Para
+reconstruirlo desde cero: `python -m scripts.backfill_user_progress`.
+
+Cada respuesta también suma en `user_topic_daily` (user, topic, día UTC), que
+alimenta los gráficos de progreso; se reconstruye con
+`python -m scripts.backfill_user_topic_daily`.
+
+Cada cambio incrementa `users.stats_version`, que versiona el caché de stats.
+"""
+
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.db.models import User, UserProgress, UserTopicDaily
+
+
+def bump_stats_version(db: Session, user_id: int) -> None:
+    """Invalida el caché/ETag de /users/{id}/stats (ver users.user_stats)."""
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(stats_version=User.stats_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bump_stats_versions(db: Session, user_ids: Iterable[int]) -> None:
+    """`bump_stats_version` para varios usuarios en un UPDATE (backfills)."""
+    ids = sorted(set(user_ids))
+    if not ids:
+        return
+    db.execute(
+        update(User)
+        .where(User.id.in_(ids))
+        .values(stats_version=User.stats_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def record_answer(
+    db: Session, user_id: int, topic_id: int, is_correct: bool, answered_at: datetime
+) -> tuple[int, int]:
+    """
+    Upsert atómico del rollup (user, topic) para una respuesta nueva.
+
+    Retorna los contadores actualizados (answered_count, correct_count).
+    """
+    correct = 1 if is_correct else 0
+    stmt = pg_insert(UserProgress).values(
+        user_id=user_id,
+        topic_id=topic_id,
+        answered_count=1,
+        correct_count=correct,
+        accuracy=correct * 100,
+        streak=correct,
+        last_activity_at=answered_at,
+        updated_at=answered_at,
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_progress_user_topic",
+        set_={
+            "answered_count": UserProgress.answered_count + 1,
+            "correct_count": UserProgress.correct_count + correct,
+            "accuracy": (UserProgress.correct_count + correct) * 100 / (UserProgress.answered_count + 1),
+            "streak": UserProgress.streak + 1 if is_correct else 0,
+            "last_activity_at": answered_at,
+            "updated_at": answered_at,
+        },
+    ).returning(UserProgress.answered_count, UserProgress.correct_count)
+    answered, correct = db.execute(stmt).one()
+    record_daily(db, user_id, topic_id, is_correct, answered_at)
+    bump_stats_version(db, user_id)
+    return answered, correct
+
+
+def record_daily(
+    db: Session, user_id: int, topic_id: int, is_correct: bool, answered_at: datetime
+) -> None:
+    """Suma la respuesta al bucket diario (user, topic, día UTC)."""
+    correct = 1 if is_correct else 0
+    stmt = pg_insert(UserTopicDaily).values(
+        user_id=user_id,
+        topic_id=topic_id,
+        day=answered_at.date(),
+        answered_count=1,
+        correct_count=correct,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserTopicDaily.user_id, UserTopicDaily.topic_id, UserTopicDaily.day],
+        set_={
+            "answered_count": UserTopicDaily.answered_count + 1,
+            "correct_count": UserTopicDaily.correct_count + correct,
+        },
+    )
+    db.execute(stmt)
+
+
+def record_completion(db: Session, user_id: int, topic_id: int, completed_at: datetime) -> None:
+    """Marca el topic como completado (último intento terminado)."""
+    stmt = pg_insert(UserProgress).values(
+        user_id=user_id,
+        topic_id=topic_id,
+        completed_at=completed_at,
+        updated_at=completed_at,
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_progress_user_topic",
+        set_={"completed_at": completed_at, "updated_at": completed_at},
+    )
+    db.execute(stmt)
+    bump_stats_version(db, user_id)
@@ -0,0 +1,174 @@
+"""
+Exportación streaming del banco de preguntas (NDJSON/CSV, opcionalmente gzip).
+
+Una sola query sobre questions ⨝ topics ⨝ subjects ⨝ passages ⨝ question_choices,
+ordenada por (question_id, label) y leída con un cursor del lado del servidor
+(`yield_per`): Postgres entrega las filas por lotes y las alternativas de
+cada pregunta llegan contiguas, así que se arma una pregunta a la vez. La
+memoria queda acotada por el lote + el buffer de salida, no por el tamaño
+del banco.
+
+El formato es el mismo que acepta `/questions/import` (más `question_id`,
+`is_active` y `created_at`), así que un export sirve de respaldo re-importable.
+"""
+
+import csv
+import io
+import json
+import zlib
+from itertools import groupby
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import select
+
+from app.db.models import Passage, Question, QuestionChoice, Subject, Topic
+from app.db.session import SessionLocal
+from app.services.question_import import CSV_CHOICE_COLUMNS
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+CSV_COLUMNS = [
+    "question_id",
+    "subject_code",
+    "topic_code",
+    "prompt",
+    "reading_text",
+    "explanation",
+    "difficulty",
+    *CSV_CHOICE_COLUMNS.values(),
+    "correct_choice",
+    "is_active",
+    "created_at",
+]
+
+# Filas que Postgres entrega por lote (4 por pregunta) y tamaño mínimo de cada chunk de salida.
+_YIELD_PER = 2000
+_FLUSH_BYTES = 64 * 1024
+
+
+def iter_export_questions(
+    subject_code: Optional[str] = None,
+    topic_code: Optional[str] = None,
+    is_active: Optional[bool] = None,
+) -> Iterator[dict]:
+    """
+    Genera una pregunta (dict) a la vez, en orden de id.
+
+    Abre su propia sesión: el generador lo consume la respuesta streaming
+    después de que la request ya liberó la suya.
+    """
+    stmt = (
+        select(
+            Question.id,
+            Subject.code,
+            Topic.code,
+            Question.prompt,
+            Passage.text,
+            Question.explanation,
+            Question.difficulty,
+            Question.is_active,
+            Question.created_at,
+            QuestionChoice.label,
+            QuestionChoice.text,
+            QuestionChoice.is_correct,
+        )
+        .join(Topic, Topic.id == Question.topic_id)
+        .join(Subject, Subject.id == Topic.subject_id)
+        .outerjoin(Passage, Passage.id == Question.passage_id)
+        .outerjoin(QuestionChoice, QuestionChoice.question_id == Question.id)
+        .order_by(Question.id, QuestionChoice.label)
+    )
+    if subject_code is not None:
+        stmt = stmt.where(Subject.code == subject_code)
+    if topic_code is not None:
+        stmt = stmt.where(Topic.code == topic_code)
+    if is_active is not None:
+        stmt = stmt.where(Question.is_active == is_active)
+
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt, execution_options={"yield_per": _YIELD_PER})
+        for _, rows in groupby(result, key=lambda row: row[0]):
+            rows = list(rows)
+            (question_id, subject, topic, prompt, reading_text, explanation,
+             difficulty, active, created_at) = rows[0][:9]
+            choices = [(label, text, correct) for *_, label, text, correct in rows if label is not None]
+            yield {
+                "question_id": question_id,
+                "subject_code": subject,
+                "topic_code": topic,
+                "prompt": prompt,
+                "reading_text": reading_text,
+                "explanation": explanation,
+                "difficulty": difficulty,
+                "choices": [{"label": label, "text": text} for label, text, _ in choices],
+                "correct_choice": next((label for label, _, correct in choices if correct), None),
+                "is_active": active,
+                "created_at": created_at.isoformat() if created_at else None,
+            }
+    finally:
+        db.close()
+
+
+def _ndjson_lines(questions: Iterable[dict]) -> Iterator[str]:
+    for question in questions:
+        yield json.dumps(question, ensure_ascii=False) + "\n"
+
+
+def _csv_lines(questions: Iterable[dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take() -> str:
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writerow(CSV_COLUMNS)
+    yield take()
+    for question in questions:
+        choices = {c["label"]: c["text"] for c in question["choices"]}
+        writer.writerow(
+            [
+                question["question_id"],
+                question["subject_code"],
+                question["topic_code"],
+                question["prompt"],
+                question["reading_text"] or "",
+                question["explanation"] or "",
+                question["difficulty"],
+                *(choices.get(label, "") for label in CSV_CHOICE_COLUMNS),
+                question["correct_choice"] or "",
+                "true" if question["is_active"] else "false",
+                question["created_at"] or "",
+            ]
+        )
+        yield take()
+
+
+def export_chunks(questions: Iterable[dict], fmt: str, gzip: bool = False) -> Iterator[bytes]:
+    """Serializa a NDJSON/CSV en chunks de ~64 KB, comprimidos con gzip si se pide."""
+    lines = _ndjson_lines(questions) if fmt == "ndjson" else _csv_lines(questions)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None  # wbits=31: formato gzip
+
+    pending: list[bytes] = []
+    size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        pending.append(data)
+        size += len(data)
+        if size >= _FLUSH_BYTES:
+            chunk = b"".join(pending)
+            pending, size = [], 0
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    chunk = b"".join(pending)
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
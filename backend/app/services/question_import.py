@@ -0,0 +1,509 @@
+"""
+Validación y escritura set-based de preguntas (bulk / importaciones).
+
+`QuestionValidator` concentra las reglas que comparten `/questions/bulk` y
+`/questions/import`; `iter_import_rows` + `import_questions` procesan un
+archivo NDJSON/CSV en streaming, fila a fila, con commit por chunk.
+
+Escritura:
+- `insert_questions` (bulk, hasta 200 ítems): en vez de `db.add()` + `flush()`
+  por pregunta (2×N roundtrips), un INSERT multi-fila de preguntas con
+  RETURNING de los ids (en el mismo orden de entrada; SQLAlchemy pagina los
+  VALUES con "insertmanyvalues") y un executemany de todas las alternativas
+  (psycopg lo envía en pipeline, un solo roundtrip).
+- `copy_questions` (import, miles de filas): reserva los ids con `nextval` y
+  carga ambas tablas con COPY, para que el costo lo ponga la BD y no el
+  armado de sentencias en Python.
+
+En ambos casos `reading_text` se guarda en `passages` (un texto compartido
+se guarda una vez, ver `resolve_passages`) y el commit queda en manos del
+llamador.
+
+Duplicados exactos: `split_duplicates` calcula el `content_hash` de cada
+ítem y los busca con una sola query sobre el índice único
+(content_hash, topic_id), además de detectar repetidos dentro del lote.
+También marca los casi duplicados (firma MinHash contra el índice LSH en
+memoria y del mismo topic, ver `near_duplicates`), salvo con
+`allow_near_duplicates`.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import BinaryIO, Callable, Iterator, Optional, Sequence
+
+import psycopg
+from pydantic import ValidationError
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.db.models import Exam, Question, QuestionChoice, Subject, Topic
+from app.schemas.questions import QuestionCreateIn
+from app.services.content_hash import content_hash
+from app.services.passages import resolve_passages
+from app.services.near_duplicates import (
+    NearDuplicateIndex,
+    minhash_signature,
+    near_duplicate_index,
+    near_duplicates_enabled,
+    signature_to_bytes,
+)
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+# Columnas del CSV: una fila por pregunta, alternativas en choice_a..choice_d.
+CSV_CHOICE_COLUMNS = {"A": "choice_a", "B": "choice_b", "C": "choice_c", "D": "choice_d"}
+
+# Reintentos de un chunk cuyo COPY choca con una carga concurrente en
+# uq_question_content_hash_topic (COPY no tiene ON CONFLICT).
+_CHUNK_RETRIES = 2
+
+
+class ImportAborted(Exception):
+    """
+    El import se detuvo antes de terminar el archivo.
+
+    `status_code` es el HTTP sugerido (400 archivo inválido, 409 conflicto
+    con otra carga, 500 error de BD), `row` la fila de datos donde se detuvo
+    y `summary` los contadores hasta ese punto (chunks ya confirmados
+    incluidos), lo asigna `import_questions`.
+    """
+
+    def __init__(self, status_code: int, error: str, detail: str, row: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.error = error
+        self.detail = detail
+        self.row = row
+        self.summary: Optional[dict] = None
+
+
+class QuestionValidator:
+    """
+    Reglas de validación de una pregunta nueva (mismas para bulk e import).
+
+    Carga subjects/topics del exam en una sola query al construirse; validar
+    cada ítem después es solo memoria.
+    """
+
+    def __init__(self, db: Session, exam: Exam):
+        self.exam_code = exam.code
+        self._subjects: set[str] = set()
+        self._topics: dict[tuple[str, str], int] = {}
+        rows = db.execute(
+            select(Subject.code, Topic.code, Topic.id)
+            .outerjoin(Topic, Topic.subject_id == Subject.id)
+            .where(Subject.exam_id == exam.id)
+        ).all()
+        for subject_code, topic_code, topic_id in rows:
+            self._subjects.add(subject_code)
+            if topic_id is not None:
+                self._topics[(subject_code, topic_code)] = topic_id
+
+    def validate(self, q: QuestionCreateIn) -> tuple[Optional[int], Optional[dict]]:
+        """Retorna (topic_id, None) si es válida, o (None, {"error", "detail"})."""
+        # Bloqueo de preguntas de prueba: evita que datos [TEST] lleguen a producción.
+        if isinstance(q.prompt, str) and q.prompt.strip().startswith("[TEST]"):
+            return None, {
+                "error": "test_question",
+                "detail": "Preguntas marcadas como [TEST] no están permitidas",
+            }
+
+        topic_id = self._topics.get((q.subject_code, q.topic_code))
+        if topic_id is None:
+            if q.subject_code not in self._subjects:
+                return None, {
+                    "error": "subject_not_found",
+                    "detail": f"subject_code={q.subject_code} en exam={self.exam_code}",
+                }
+            return None, {
+                "error": "topic_not_found",
+                "detail": f"topic_code={q.topic_code} en subject_code={q.subject_code}",
+            }
+
+        labels = [c.label for c in q.choices]
+        if len(set(labels)) != 4:
+            return None, {
+                "error": "invalid_choices",
+                "detail": "Las alternativas deben tener labels únicos (A/B/C/D)",
+            }
+        if q.correct_choice not in set(labels):
+            return None, {
+                "error": "invalid_correct_choice",
+                "detail": "correct_choice debe existir dentro de choices",
+            }
+        return topic_id, None
+
+
+def question_content_hash(q: QuestionCreateIn) -> str:
+    return content_hash(q.prompt, q.reading_text, [(c.label, c.text) for c in q.choices])
+
+
+def question_minhash(q: QuestionCreateIn):
+    return minhash_signature(q.prompt, [c.text for c in q.choices])
+
+
+def near_duplicate_error(matches: list[tuple[int, float]]) -> dict:
+    question_id, similarity = matches[0]
+    return {
+        "error": "near_duplicate_question",
+        "detail": (
+            f"Muy similar a question_id={question_id} (similitud {similarity:.2f}); "
+            "usar allow_near_duplicates=true para crearla igual"
+        ),
+        "matches": [{"question_id": qid, "similarity": round(sim, 3)} for qid, sim in matches],
+    }
+
+
+def split_duplicates(
+    db: Session,
+    items: Sequence[tuple[QuestionCreateIn, int]],
+    allow_near_duplicates: bool = False,
+) -> tuple[list[tuple[QuestionCreateIn, int, str, Optional[bytes]]], dict[int, dict]]:
+    """
+    Separa los duplicados de un lote de (payload, topic_id).
+
+    Retorna (ítems nuevos como (payload, topic_id, content_hash, minhash),
+    {posición en `items`: error}) para los que ya existen en el topic o se
+    repiten dentro del mismo lote (`duplicate_question`), y para los casi
+    duplicados de una pregunta de la BD o del mismo lote
+    (`near_duplicate_question`, con los question_id similares en `matches`).
+    """
+    hashed = [(q, topic_id, question_content_hash(q)) for q, topic_id in items]
+    existing: dict[tuple[str, int], int] = {}
+    if hashed:
+        existing = {
+            (h, topic_id): question_id
+            for h, topic_id, question_id in db.execute(
+                select(Question.content_hash, Question.topic_id, Question.id).where(
+                    Question.content_hash.in_({h for _, _, h in hashed})
+                )
+            )
+        }
+
+    check_near = bool(hashed) and near_duplicates_enabled() and not allow_near_duplicates
+    if check_near:
+        near_duplicate_index.refresh(db)
+        # índice solo en memoria para los casi duplicados dentro del lote
+        batch_index = NearDuplicateIndex(near_duplicate_index.threshold)
+
+    fresh: list[tuple[QuestionCreateIn, int, str, Optional[bytes]]] = []
+    duplicates: dict[int, dict] = {}
+    seen: set[tuple[str, int]] = set()
+    for position, (q, topic_id, h) in enumerate(hashed):
+        key = (h, topic_id)
+        if key in existing:
+            duplicates[position] = {
+                "error": "duplicate_question",
+                "detail": f"Ya existe una pregunta igual en el topic (question_id={existing[key]})",
+            }
+            continue
+        if key in seen:
+            duplicates[position] = {
+                "error": "duplicate_question",
+                "detail": "Pregunta repetida dentro del mismo lote",
+            }
+            continue
+
+        signature = question_minhash(q)
+        if check_near and signature is not None:
+            matches = near_duplicate_index.query(signature, topic_id)
+            if matches:
+                duplicates[position] = near_duplicate_error(matches)
+                continue
+            if batch_index.query(signature, topic_id, limit=1):
+                duplicates[position] = {
+                    "error": "near_duplicate_question",
+                    "detail": "Muy similar a otra pregunta del mismo lote",
+                }
+                continue
+            batch_index.add(position, topic_id, signature)
+
+        seen.add(key)
+        fresh.append((q, topic_id, h, signature_to_bytes(signature)))
+    return fresh, duplicates
+
+
+def insert_questions(
+    db: Session, items: Sequence[tuple[QuestionCreateIn, int, str, Optional[bytes]]]
+) -> list[int]:
+    """
+    Inserta preguntas ya validadas junto con sus alternativas (y los textos de
+    lectura nuevos en `passages`).
+
+    `items` son (payload, topic_id, content_hash, minhash), ver `split_duplicates`.
+    Retorna los ids creados en el mismo orden que `items`.
+    """
+    if not items:
+        return []
+
+    now = datetime.utcnow()
+    passage_ids = resolve_passages(db, (q.reading_text for q, *_ in items))
+    question_ids = list(
+        db.scalars(
+            insert(Question).returning(Question.id, sort_by_parameter_order=True),
+            [
+                {
+                    "topic_id": topic_id,
+                    "prompt": q.prompt,
+                    "passage_id": passage_ids.get(q.reading_text),
+                    "explanation": q.explanation,
+                    "difficulty": q.difficulty,
+                    "question_type": "mcq",
+                    "is_active": True,
+                    "created_at": now,
+                    "content_hash": h,
+                    "minhash": minhash,
+                }
+                for q, topic_id, h, minhash in items
+            ],
+        )
+    )
+
+    db.execute(
+        insert(QuestionChoice),
+        [
+            {
+                "question_id": question_id,
+                "label": choice.label,
+                "text": choice.text,
+                "is_correct": choice.label == q.correct_choice,
+            }
+            for (q, *_), question_id in zip(items, question_ids)
+            for choice in q.choices
+        ],
+    )
+    return question_ids
+
+
+def copy_questions(
+    db: Session, items: Sequence[tuple[QuestionCreateIn, int, str, Optional[bytes]]]
+) -> list[int]:
+    """
+    Igual que `insert_questions`, pero con COPY (para chunks grandes).
+
+    Usa la conexión de la sesión, así que queda dentro de su transacción.
+    """
+    if not items:
+        return []
+
+    question_ids = list(
+        db.scalars(
+            text("SELECT nextval(pg_get_serial_sequence('questions', 'id')) FROM generate_series(1, :n)"),
+            {"n": len(items)},
+        )
+    )
+    now = datetime.utcnow()
+    passage_ids = resolve_passages(db, (q.reading_text for q, *_ in items))
+    conn = db.connection().connection.driver_connection
+    with conn.cursor() as cur:
+        with cur.copy(
+            "COPY questions (id, topic_id, prompt, passage_id, explanation, difficulty, "
+            "question_type, is_active, created_at, content_hash, minhash) FROM STDIN"
+        ) as copy:
+            for (q, topic_id, h, minhash), question_id in zip(items, question_ids):
+                copy.write_row(
+                    (question_id, topic_id, q.prompt, passage_ids.get(q.reading_text), q.explanation,
+                     q.difficulty, "mcq", True, now, h, minhash)
+                )
+        with cur.copy("COPY question_choices (question_id, label, text, is_correct) FROM STDIN") as copy:
+            for (q, *_), question_id in zip(items, question_ids):
+                for choice in q.choices:
+                    copy.write_row(
+                        (question_id, choice.label, choice.text, choice.label == q.correct_choice)
+                    )
+    return question_ids
+
+
+def _validation_detail(exc: ValidationError) -> str:
+    parts = []
+    for err in exc.errors():
+        loc = ".".join(str(p) for p in err.get("loc", ()))
+        parts.append(f"{loc}: {err.get('msg')}" if loc else str(err.get("msg")))
+    return "; ".join(parts)[:500]
+
+
+def _csv_row_to_payload(row: dict) -> dict:
+    def clean(value):
+        if value is None:
+            return None
+        value = value.strip()
+        return value or None
+
+    payload = {
+        "subject_code": clean(row.get("subject_code")),
+        "topic_code": clean(row.get("topic_code")),
+        "prompt": clean(row.get("prompt")),
+        "reading_text": clean(row.get("reading_text")),
+        "explanation": clean(row.get("explanation")),
+        "choices": [
+            {"label": label, "text": clean(row.get(column))}
+            for label, column in CSV_CHOICE_COLUMNS.items()
+        ],
+        "correct_choice": (clean(row.get("correct_choice")) or "").upper() or None,
+    }
+    difficulty = clean(row.get("difficulty"))
+    if difficulty is not None:
+        payload["difficulty"] = difficulty
+    return payload
+
+
+def iter_import_rows(
+    fileobj: BinaryIO, fmt: str
+) -> Iterator[tuple[int, Optional[QuestionCreateIn], Optional[dict]]]:
+    """
+    Recorre un archivo NDJSON/CSV sin cargarlo completo en memoria.
+
+    Genera (row, payload, error): `row` es el número de fila de datos
+    (1-based, sin contar el header del CSV); exactamente uno de `payload` o
+    `error` viene informado. Una línea CSV malformada corta la lectura con
+    `ImportAborted` (invalid_csv).
+    """
+    stream = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        row_number = 0
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as exc:
+                # el lector no puede seguir de forma confiable después de una línea malformada
+                raise ImportAborted(400, "invalid_csv", f"línea {reader.line_num}: {exc}", row=row_number + 1)
+            row_number += 1
+            try:
+                yield row_number, QuestionCreateIn.model_validate(_csv_row_to_payload(row)), None
+            except ValidationError as exc:
+                yield row_number, None, {"error": "invalid_row", "detail": _validation_detail(exc)}
+        return
+
+    row_number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield row_number, None, {"error": "invalid_json", "detail": str(exc)[:500]}
+            continue
+        try:
+            yield row_number, QuestionCreateIn.model_validate(data), None
+        except ValidationError as exc:
+            yield row_number, None, {"error": "invalid_row", "detail": _validation_detail(exc)}
+
+
+def import_questions(
+    db: Session,
+    validator: QuestionValidator,
+    rows: Iterator[tuple[int, Optional[QuestionCreateIn], Optional[dict]]],
+    chunk_size: int,
+    dry_run: bool,
+    max_errors: int,
+    on_progress: Optional[Callable[[dict], bool]] = None,
+    allow_near_duplicates: bool = False,
+) -> dict:
+    """
+    Valida fila a fila e inserta los ítems válidos con un commit por chunk.
+
+    La memoria queda acotada por `chunk_size` + `max_errors` (el reporte de
+    errores se trunca, los contadores no). Los chunks ya confirmados se
+    mantienen si un chunk posterior falla.
+
+    Los duplicados exactos y casi duplicados se detectan por chunk (contra la
+    BD y dentro del chunk); con `dry_run` no se detectan repetidos entre
+    chunks distintos.
+
+    `on_progress(summary)` se llama cada `chunk_size` filas procesadas; si
+    retorna False el import se detiene (`cancelled=True`) sin escribir las
+    filas pendientes del chunk en curso.
+
+    Un chunk que choca con otra carga concurrente se reintenta (las filas
+    ganadas por la otra carga quedan como `duplicate_question`). Un archivo
+    malformado (CSV, encoding) o un error de BD detiene el import con
+    `ImportAborted`, que lleva el `summary` parcial; las filas pendientes
+    del chunk en curso no se escriben.
+    """
+    summary = {
+        "total": 0,
+        "created": 0,
+        "skipped": 0,
+        "chunks_committed": 0,
+        "errors": [],
+        "errors_truncated": False,
+        "cancelled": False,
+    }
+    chunk: list[tuple[int, QuestionCreateIn, int]] = []
+    last_progress = 0
+
+    def add_error(row_number: int, error: dict) -> None:
+        summary["skipped"] += 1
+        if len(summary["errors"]) < max_errors:
+            summary["errors"].append({"row": row_number, **error})
+        else:
+            summary["errors_truncated"] = True
+
+    def flush_chunk() -> None:
+        for attempt in range(_CHUNK_RETRIES + 1):
+            try:
+                fresh, duplicates = split_duplicates(
+                    db, [(q, topic_id) for _, q, topic_id in chunk], allow_near_duplicates
+                )
+                if not dry_run:
+                    copy_questions(db, fresh)
+                    db.commit()
+                break
+            except (IntegrityError, psycopg.IntegrityError):
+                # COPY va por el driver: sus errores llegan como psycopg, no SQLAlchemy.
+                # otra carga insertó alguna pregunta igual entre la búsqueda de
+                # duplicados y el COPY: se recalculan contra la BD y se reintenta
+                db.rollback()
+                if attempt == _CHUNK_RETRIES:
+                    raise ImportAborted(
+                        409, "question_conflict", "Otra carga insertó preguntas iguales; reintentar el import",
+                        row=chunk[0][0],
+                    )
+            except (SQLAlchemyError, psycopg.Error) as exc:
+                db.rollback()
+                raise ImportAborted(500, "import_failed", str(getattr(exc, "orig", None) or exc)[:500], row=chunk[0][0]) from exc
+            except Exception:
+                db.rollback()
+                raise
+        for position, error in duplicates.items():
+            add_error(chunk[position][0], error)
+        if not dry_run:
+            summary["chunks_committed"] += 1
+        summary["created"] += len(fresh)
+        chunk.clear()
+
+    try:
+        try:
+            for row_number, payload, error in rows:
+                summary["total"] += 1
+                if payload is not None:
+                    topic_id, error = validator.validate(payload)
+                if error is not None:
+                    add_error(row_number, error)
+                else:
+                    chunk.append((row_number, payload, topic_id))
+                    if len(chunk) >= chunk_size:
+                        flush_chunk()
+
+                if on_progress is not None and summary["total"] - last_progress >= chunk_size:
+                    last_progress = summary["total"]
+                    if not on_progress(summary):
+                        summary["cancelled"] = True
+                        chunk.clear()
+                        break
+        except UnicodeDecodeError:
+            raise ImportAborted(400, "invalid_encoding", "El archivo debe estar en UTF-8", row=summary["total"] + 1)
+
+        if chunk:
+            flush_chunk()
+    except ImportAborted as exc:
+        exc.summary = summary
+        raise
+    return summary
@@ -0,0 +1,150 @@
+"""
+Ranking por percentil: histogramas de accuracy por topic (NumPy).
+
+Cada topic tiene un arreglo de `RANKING_BUCKETS` buckets fijos sobre 0-100%
+con la cantidad de usuarios en cada tramo de accuracy. Responder "¿en qué
+percentil estoy?" es O(buckets), sin ordenar a todos los usuarios.
+
+- Incremental: `record_answer` mueve al usuario de bucket cuando cambia su
+  accuracy (llamado desde submit_answer después del commit).
+- Batch: `rebuild` recalcula todo con un GROUP BY sobre `user_progress`
+  (rollup mantenido desde attempt_feedback, ver backfill_user_progress). Un
+  thread de fondo lo corre cada `RANKING_REBUILD_SECONDS`, lo que además
+  reconcilia las actualizaciones hechas por otros workers.
+"""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.db.models import UserProgress
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def bucket_for(answered: int, correct: int, buckets: int) -> Optional[int]:
+    """Bucket de un usuario, o None si aún no tiene suficientes respuestas."""
+    if answered < settings.RANKING_MIN_ANSWERS or answered <= 0:
+        return None
+    return min(correct * buckets // answered, buckets - 1)
+
+
+class TopicHistograms:
+    def __init__(self, buckets: int):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: dict[int, np.ndarray] = {}
+        self.built_at: Optional[float] = None
+
+    def rebuild(self, db) -> None:
+        """Recalcula todos los histogramas con un solo agregado en SQL."""
+        bucket = func.least(
+            (UserProgress.correct_count * self.buckets) / UserProgress.answered_count,
+            self.buckets - 1,
+        )
+        rows = db.execute(
+            select(UserProgress.topic_id, func.floor(bucket).label("bucket"), func.count())
+            .where(
+                UserProgress.answered_count >= max(1, settings.RANKING_MIN_ANSWERS),
+            )
+            .group_by(UserProgress.topic_id, "bucket")
+        ).all()
+
+        histograms: dict[int, np.ndarray] = {}
+        for topic_id, b, users in rows:
+            hist = histograms.get(topic_id)
+            if hist is None:
+                hist = histograms[topic_id] = np.zeros(self.buckets, dtype=np.int64)
+            hist[int(b)] += users
+
+        with self._lock:
+            self._histograms = histograms
+            self.built_at = time.monotonic()
+
+    def ensure_built(self) -> None:
+        if self.built_at is not None:
+            return
+        db = SessionLocal()
+        try:
+            self.rebuild(db)
+        finally:
+            db.close()
+
+    def record_answer(self, topic_id: int, answered: int, correct: int, is_correct: bool) -> None:
+        """Aplica una respuesta nueva; `answered`/`correct` son los contadores ya actualizados."""
+        if self.built_at is None:
+            return
+        old = bucket_for(answered - 1, correct - (1 if is_correct else 0), self.buckets)
+        new = bucket_for(answered, correct, self.buckets)
+        if old == new:
+            return
+        with self._lock:
+            hist = self._histograms.get(topic_id)
+            if hist is None:
+                hist = self._histograms[topic_id] = np.zeros(self.buckets, dtype=np.int64)
+            if old is not None and hist[old] > 0:
+                hist[old] -= 1
+            if new is not None:
+                hist[new] += 1
+
+    def rank(self, topic_id: int, answered: int, correct: int) -> Optional[dict]:
+        """Percentil del usuario en el topic, O(buckets)."""
+        b = bucket_for(answered, correct, self.buckets)
+        if b is None:
+            return None
+        with self._lock:
+            hist = self._histograms.get(topic_id)
+            hist = hist.copy() if hist is not None else np.zeros(self.buckets, dtype=np.int64)
+        # El propio usuario cuenta aunque el histograma aún no lo refleje.
+        if hist[b] == 0:
+            hist[b] = 1
+
+        total = int(hist.sum())
+        below = int(hist[:b].sum())
+        same = int(hist[b])
+        return {
+            # percentil con rango medio para los empates del mismo bucket
+            "percentile": round((below + same / 2) / total * 100, 1),
+            # "estás en el top X%": fracción con accuracy >= la tuya
+            "top_percent": round((total - below) / total * 100, 1),
+            "cohort_size": total,
+        }
+
+
+topic_histograms = TopicHistograms(settings.RANKING_BUCKETS)
+
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _refresh_loop() -> None:
+    while not _stop.is_set():
+        db = SessionLocal()
+        try:
+            topic_histograms.rebuild(db)
+        except Exception:
+            logger.exception("Ranking histogram rebuild failed")
+        finally:
+            db.close()
+        _stop.wait(settings.RANKING_REBUILD_SECONDS)
+
+
+def start_background_refresh() -> None:
+    global _thread
+    if _thread is not None or settings.RANKING_REBUILD_SECONDS <= 0:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_refresh_loop, name="ranking-refresh", daemon=True)
+    _thread.start()
+
+
+def stop_background_refresh() -> None:
+    global _thread
+    _stop.set()
+    _thread = None
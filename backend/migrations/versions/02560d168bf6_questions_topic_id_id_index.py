@@ -0,0 +1,29 @@
+"""questions (topic_id, id) index for keyset listing
+
+Revision ID: 02560d168bf6
+Revises: 5b622920a194
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "02560d168bf6"
+down_revision: Union[str, Sequence[str], None] = "5b622920a194"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (topic_id, id) también cubre los lookups por topic_id solo
+    op.create_index("ix_questions_topic_id_id", "questions", ["topic_id", "id"])
+    op.drop_index("ix_questions_topic_id", table_name="questions")
+
+
+def downgrade() -> None:
+    op.create_index("ix_questions_topic_id", "questions", ["topic_id"])
+    op.drop_index("ix_questions_topic_id_id", table_name="questions")
@@ -0,0 +1,108 @@
+"""analytics materialized views (question, choice and topic stats)
+
+Revision ID: 444014f9e2bc
+Revises: 954313a1c081
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "444014f9e2bc"
+down_revision: Union[str, Sequence[str], None] = "954313a1c081"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Cada vista agrega attempt_feedback/attempts una sola vez (subquery agrupada)
+# y la une a la tabla base, así las preguntas/alternativas/topics sin
+# respuestas también aparecen con contadores en 0. `refreshed_at` = momento
+# del último REFRESH. Refresco: scripts/refresh_analytics.py.
+_QUESTION_STATS = """
+CREATE MATERIALIZED VIEW question_stats_mv AS
+SELECT
+    q.id AS question_id,
+    q.topic_id,
+    coalesce(f.answered_count, 0) AS answered_count,
+    coalesce(f.correct_count, 0) AS correct_count,
+    CAST(f.correct_count AS double precision) / nullif(f.answered_count, 0) AS accuracy,
+    f.last_answered_at,
+    now() AS refreshed_at
+FROM questions q
+LEFT JOIN (
+    SELECT
+        question_id,
+        count(*) AS answered_count,
+        count(*) FILTER (WHERE is_correct) AS correct_count,
+        max(created_at) AS last_answered_at
+    FROM attempt_feedback
+    GROUP BY question_id
+) f ON f.question_id = q.id
+"""
+
+_CHOICE_STATS = """
+CREATE MATERIALIZED VIEW choice_pick_stats_mv AS
+SELECT
+    c.id AS choice_id,
+    c.question_id,
+    c.label,
+    c.is_correct,
+    coalesce(f.picked_count, 0) AS picked_count,
+    now() AS refreshed_at
+FROM question_choices c
+LEFT JOIN (
+    SELECT selected_choice_id, count(*) AS picked_count
+    FROM attempt_feedback
+    WHERE selected_choice_id IS NOT NULL
+    GROUP BY selected_choice_id
+) f ON f.selected_choice_id = c.id
+"""
+
+_TOPIC_STATS = """
+CREATE MATERIALIZED VIEW topic_stats_mv AS
+SELECT
+    t.id AS topic_id,
+    t.subject_id,
+    coalesce(a.attempts_count, 0) AS attempts_count,
+    coalesce(a.completed_count, 0) AS completed_count,
+    coalesce(a.users_count, 0) AS users_count,
+    coalesce(a.answered_count, 0) AS answered_count,
+    coalesce(a.correct_count, 0) AS correct_count,
+    a.avg_score,
+    now() AS refreshed_at
+FROM topics t
+LEFT JOIN (
+    SELECT
+        topic_id,
+        count(*) AS attempts_count,
+        count(*) FILTER (WHERE status = 'completed') AS completed_count,
+        count(DISTINCT user_id) AS users_count,
+        sum(total_questions) AS answered_count,
+        sum(correct_count) AS correct_count,
+        avg(score) FILTER (WHERE status = 'completed') AS avg_score
+    FROM attempts
+    WHERE topic_id IS NOT NULL
+    GROUP BY topic_id
+) a ON a.topic_id = t.id
+"""
+
+
+def upgrade() -> None:
+    op.execute(_QUESTION_STATS)
+    op.execute(_CHOICE_STATS)
+    op.execute(_TOPIC_STATS)
+    # REFRESH ... CONCURRENTLY exige un índice único por vista.
+    op.create_index("ux_question_stats_mv_question_id", "question_stats_mv", ["question_id"], unique=True)
+    op.create_index("ix_question_stats_mv_topic_id", "question_stats_mv", ["topic_id", "question_id"])
+    op.create_index("ux_choice_pick_stats_mv_choice_id", "choice_pick_stats_mv", ["choice_id"], unique=True)
+    op.create_index("ix_choice_pick_stats_mv_question_id", "choice_pick_stats_mv", ["question_id"])
+    op.create_index("ux_topic_stats_mv_topic_id", "topic_stats_mv", ["topic_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS topic_stats_mv")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS choice_pick_stats_mv")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS question_stats_mv")
@@ -0,0 +1,127 @@
+"""add minhash to questions
+
+Revision ID: 5b622920a194
+Revises: 9044b61ca7de
+Create Date: 2026-10-19
+
+"""
+
+import hashlib
+import logging
+import re
+import unicodedata
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b622920a194"
+down_revision: Union[str, Sequence[str], None] = "9044b61ca7de"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Copia congelada de app.services.near_duplicates (MinHash de 128
+# permutaciones sobre shingles de 3 palabras) a la fecha de esta revisión: la
+# migración no importa código de la app. Si el algoritmo cambia, las firmas se
+# recalculan con `python -m scripts.backfill_minhash --all`.
+_NUM_PERM = 128
+_SHINGLE_SIZE = 3
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_WHITESPACE = re.compile(r"\s+")
+_WORD = re.compile(r"\w+")
+
+
+def _stable_ints(prefix: str, count: int, bits: int) -> np.ndarray:
+    mask = (1 << bits) - 1
+    values = [
+        int.from_bytes(hashlib.blake2b(f"{prefix}-{i}".encode(), digest_size=8).digest(), "big") & mask
+        for i in range(count)
+    ]
+    return np.array([v | 1 for v in values], dtype=np.uint64)
+
+
+_PERM_A = _stable_ints("minhash-a", _NUM_PERM, 31)
+_PERM_B = _stable_ints("minhash-b", _NUM_PERM, 31)
+
+
+def _normalize_text(value):
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKC", value).casefold()
+    return _WHITESPACE.sub(" ", value).strip()
+
+
+def _minhash_bytes(prompt, choices):
+    shingles: set[bytes] = set()
+    for segment in (prompt, *choices):
+        words = _WORD.findall(_normalize_text(segment))
+        if not words:
+            continue
+        if len(words) <= _SHINGLE_SIZE:
+            shingles.add(" ".join(words).encode("utf-8"))
+            continue
+        for i in range(len(words) - _SHINGLE_SIZE + 1):
+            shingles.add(" ".join(words[i : i + _SHINGLE_SIZE]).encode("utf-8"))
+    if not shingles:
+        return None
+    hashes = np.fromiter((zlib.crc32(s) for s in shingles), dtype=np.uint64, count=len(shingles))
+    permuted = (hashes[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) % _MERSENNE_PRIME
+    return (permuted & _MAX_HASH).min(axis=0).astype("<u4").tobytes()
+
+
+_BATCH_SQL = text(
+    """
+    SELECT
+        q.id,
+        q.prompt,
+        coalesce(array_agg(c.text) FILTER (WHERE c.id IS NOT NULL), '{}') AS choices
+    FROM questions q
+    LEFT JOIN question_choices c ON c.question_id = q.id
+    WHERE q.id > :after_id AND q.minhash IS NULL
+    GROUP BY q.id
+    ORDER BY q.id
+    LIMIT :batch_size
+    """
+)
+
+_UPDATE_SQL = text("UPDATE questions SET minhash = :minhash WHERE id = :id")
+
+
+def _backfill_minhashes(conn, batch_size: int = 1000) -> int:
+    updated = 0
+    after_id = 0
+    while True:
+        rows = conn.execute(_BATCH_SQL, {"after_id": after_id, "batch_size": batch_size}).all()
+        if not rows:
+            break
+        after_id = rows[-1].id
+        conn.execute(
+            _UPDATE_SQL,
+            [{"id": row.id, "minhash": _minhash_bytes(row.prompt, row.choices)} for row in rows],
+        )
+        updated += len(rows)
+    return updated
+
+
+def upgrade() -> None:
+    op.add_column("questions", sa.Column("minhash", sa.LargeBinary(), nullable=True))
+    op.add_column(
+        "import_jobs",
+        sa.Column("allow_near_duplicates", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+    )
+
+    updated = _backfill_minhashes(op.get_bind())
+    logger.info("minhash: %s preguntas", updated)
+
+
+def downgrade() -> None:
+    op.drop_column("import_jobs", "allow_near_duplicates")
+    op.drop_column("questions", "minhash")
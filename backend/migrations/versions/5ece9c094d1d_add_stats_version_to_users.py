@@ -0,0 +1,30 @@
+"""add stats_version to users
+
+Revision ID: 5ece9c094d1d
+Revises: a40b9a00a0af
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5ece9c094d1d"
+down_revision: Union[str, Sequence[str], None] = "a40b9a00a0af"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("stats_version", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "stats_version")
@@ -0,0 +1,41 @@
+"""feedback_explanations: shared explanation per (question, choice, generator version)
+
+Revision ID: 855f959aac0e
+Revises: 444014f9e2bc
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "855f959aac0e"
+down_revision: Union[str, Sequence[str], None] = "444014f9e2bc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "feedback_explanations",
+        sa.Column("question_id", sa.Integer(), nullable=False),
+        sa.Column("choice_id", sa.Integer(), nullable=False),
+        sa.Column("generator_version", sa.String(length=64), nullable=False),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["question_id"], ["questions.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["choice_id"], ["question_choices.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("question_id", "choice_id", "generator_version"),
+    )
+    # la PK no empieza por choice_id: el CASCADE al borrar alternativas necesita su índice
+    op.create_index("ix_feedback_explanations_choice_id", "feedback_explanations", ["choice_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_feedback_explanations_choice_id", table_name="feedback_explanations")
+    op.drop_table("feedback_explanations")
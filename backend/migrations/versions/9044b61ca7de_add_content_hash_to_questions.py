@@ -0,0 +1,133 @@
+"""add content_hash to questions
+
+Revision ID: 9044b61ca7de
+Revises: e4eb8753ffb4
+Create Date: 2026-10-19
+
+"""
+
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9044b61ca7de"
+down_revision: Union[str, Sequence[str], None] = "e4eb8753ffb4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Copia congelada de app.services.content_hash a la fecha de esta revisión:
+# la migración no importa código de la app, que puede cambiar después.
+_WHITESPACE = re.compile(r"\s+")
+_FIELD_SEP = "\x1f"
+_CHOICE_SEP = "\x1e"
+
+
+def _normalize_text(value):
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKC", value).casefold()
+    return _WHITESPACE.sub(" ", value).strip()
+
+
+def _content_hash(prompt, reading_text, choices):
+    parts = [_normalize_text(prompt), _normalize_text(reading_text)]
+    parts.append(
+        _CHOICE_SEP.join(
+            f"{label.upper()}:{_normalize_text(choice_text)}"
+            for label, choice_text in sorted(choices)
+        )
+    )
+    return hashlib.sha256(_FIELD_SEP.join(parts).encode("utf-8")).hexdigest()
+
+
+# Esquema de esta revisión: el texto de lectura aún está en questions.reading_text.
+_BATCH_SQL = text(
+    """
+    SELECT
+        q.id,
+        q.topic_id,
+        q.prompt,
+        q.reading_text,
+        coalesce(
+            json_agg(json_build_array(c.label, c.text) ORDER BY c.label)
+                FILTER (WHERE c.id IS NOT NULL),
+            '[]'
+        ) AS choices
+    FROM questions q
+    LEFT JOIN question_choices c ON c.question_id = q.id
+    WHERE q.content_hash IS NULL AND q.id > :after_id
+    GROUP BY q.id
+    ORDER BY q.id
+    LIMIT :batch_size
+    """
+)
+
+_TAKEN_SQL = text("SELECT content_hash, topic_id FROM questions WHERE content_hash = ANY(:hashes)")
+
+_UPDATE_SQL = text(
+    """
+    UPDATE questions AS q
+    SET content_hash = v.content_hash
+    FROM unnest(CAST(:ids AS integer[]), CAST(:hashes AS varchar[])) AS v(id, content_hash)
+    WHERE q.id = v.id
+    """
+)
+
+
+def _backfill_content_hashes(conn, batch_size: int = 1000) -> tuple[int, int]:
+    """Retorna (filas actualizadas, duplicados exactos dejados en NULL)."""
+    updated = 0
+    duplicates = 0
+    after_id = 0
+    while True:
+        rows = conn.execute(_BATCH_SQL, {"after_id": after_id, "batch_size": batch_size}).all()
+        if not rows:
+            break
+        after_id = rows[-1].id
+
+        hashed = [
+            (row.id, row.topic_id, _content_hash(row.prompt, row.reading_text, [tuple(c) for c in row.choices]))
+            for row in rows
+        ]
+        taken = set(conn.execute(_TAKEN_SQL, {"hashes": [h for _, _, h in hashed]}).tuples())
+        ids: list[int] = []
+        hashes: list[str] = []
+        for question_id, topic_id, h in hashed:
+            if (h, topic_id) in taken:
+                duplicates += 1
+                continue
+            taken.add((h, topic_id))
+            ids.append(question_id)
+            hashes.append(h)
+
+        if ids:
+            conn.execute(_UPDATE_SQL, {"ids": ids, "hashes": hashes})
+            updated += len(ids)
+    return updated, duplicates
+
+
+def upgrade() -> None:
+    op.add_column("questions", sa.Column("content_hash", sa.String(length=64), nullable=True))
+
+    # Duplicados exactos ya existentes quedan en NULL (se conserva el de menor id).
+    updated, duplicates = _backfill_content_hashes(op.get_bind())
+    logger.info("content_hash: %s preguntas, %s duplicados exactos sin hash", updated, duplicates)
+
+    op.create_unique_constraint(
+        "uq_question_content_hash_topic", "questions", ["content_hash", "topic_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_question_content_hash_topic", "questions", type_="unique")
+    op.drop_column("questions", "content_hash")
@@ -0,0 +1,34 @@
+"""partial index questions (topic_id, passage_id, id) for passage-grouped delivery
+
+Revision ID: 954313a1c081
+Revises: bd55d0a81022
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "954313a1c081"
+down_revision: Union[str, Sequence[str], None] = "bd55d0a81022"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Solo preguntas activas con passage: el índice queda chico y el
+    # GROUP BY passage_id de next-question (modo passage) es index-only.
+    op.create_index(
+        "ix_questions_topic_passage_active",
+        "questions",
+        ["topic_id", "passage_id", "id"],
+        postgresql_where=sa.text("is_active AND passage_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_questions_topic_passage_active", table_name="questions")
@@ -0,0 +1,40 @@
+"""user_progress rollup counters
+
+Revision ID: a40b9a00a0af
+Revises: b3a1f0c2d9e4
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a40b9a00a0af"
+down_revision: Union[str, Sequence[str], None] = "b3a1f0c2d9e4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "user_progress",
+        sa.Column("answered_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.add_column(
+        "user_progress",
+        sa.Column("correct_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.add_column(
+        "user_progress",
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("user_progress", "completed_at")
+    op.drop_column("user_progress", "correct_count")
+    op.drop_column("user_progress", "answered_count")
@@ -0,0 +1,143 @@
+"""add passages and move questions.reading_text into them
+
+Revision ID: bd55d0a81022
+Revises: d85b6675f1ab
+Create Date: 2026-10-19
+
+"""
+
+import hashlib
+import logging
+import re
+import unicodedata
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "bd55d0a81022"
+down_revision: Union[str, Sequence[str], None] = "d85b6675f1ab"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _passage_hash(value: str) -> str:
+    """Copia congelada de app.services.passages.passage_hash (sha256 del texto normalizado)."""
+    value = _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", value).casefold()).strip()
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+_QUESTION_VECTOR_WITH_READING = (
+    "setweight(to_tsvector('spanish'::regconfig, coalesce(prompt, '')), 'A') || "
+    "setweight(to_tsvector('spanish'::regconfig, coalesce(reading_text, '')), 'B') || "
+    "setweight(to_tsvector('spanish'::regconfig, coalesce(explanation, '')), 'C')"
+)
+_QUESTION_VECTOR = (
+    "setweight(to_tsvector('spanish'::regconfig, coalesce(prompt, '')), 'A') || "
+    "setweight(to_tsvector('spanish'::regconfig, coalesce(explanation, '')), 'C')"
+)
+
+
+def _replace_question_search_vector(expression: str) -> None:
+    op.drop_index("ix_questions_search_vector", table_name="questions")
+    op.drop_column("questions", "search_vector")
+    op.add_column(
+        "questions",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(expression, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_questions_search_vector", "questions", ["search_vector"], postgresql_using="gin"
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "passages",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False, server_default=sa.text("1")),
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed("setweight(to_tsvector('spanish'::regconfig, text), 'B')", persisted=True),
+            nullable=True,
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("content_hash"),
+    )
+    op.create_index(
+        "ix_passages_search_vector", "passages", ["search_vector"], postgresql_using="gin"
+    )
+    op.add_column("questions", sa.Column("passage_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "questions_passage_id_fkey", "questions", "passages", ["passage_id"], ["id"], ondelete="SET NULL"
+    )
+    op.create_index("ix_questions_passage_id", "questions", ["passage_id"])
+
+    # Extraer los textos: uno por hash (se conserva la primera variante).
+    conn = op.get_bind()
+    texts = list(
+        conn.scalars(text("SELECT DISTINCT reading_text FROM questions WHERE reading_text IS NOT NULL"))
+    )
+    now = datetime.utcnow()
+    passage_ids: dict[str, int] = {}
+    for reading_text in texts:
+        h = _passage_hash(reading_text)
+        passage_id = conn.scalar(
+            text(
+                """
+                INSERT INTO passages (content_hash, text, version, created_at, updated_at)
+                VALUES (:h, :text, 1, :now, :now)
+                ON CONFLICT (content_hash) DO UPDATE SET content_hash = EXCLUDED.content_hash
+                RETURNING id
+                """
+            ),
+            {"h": h, "text": reading_text, "now": now},
+        )
+        passage_ids[reading_text] = passage_id
+    if passage_ids:
+        conn.execute(
+            text(
+                """
+                UPDATE questions AS q
+                SET passage_id = v.passage_id
+                FROM unnest(CAST(:texts AS text[]), CAST(:ids AS integer[])) AS v(reading_text, passage_id)
+                WHERE q.reading_text = v.reading_text
+                """
+            ),
+            {"texts": list(passage_ids), "ids": list(passage_ids.values())},
+        )
+    logger.info("passages: %s textos para %s variantes", len(set(passage_ids.values())), len(texts))
+
+    _replace_question_search_vector(_QUESTION_VECTOR)
+    op.drop_column("questions", "reading_text")
+
+
+def downgrade() -> None:
+    op.add_column("questions", sa.Column("reading_text", sa.Text(), nullable=True))
+    op.execute(
+        "UPDATE questions AS q SET reading_text = p.text FROM passages p WHERE p.id = q.passage_id"
+    )
+    _replace_question_search_vector(_QUESTION_VECTOR_WITH_READING)
+
+    op.drop_index("ix_questions_passage_id", table_name="questions")
+    op.drop_constraint("questions_passage_id_fkey", "questions", type_="foreignkey")
+    op.drop_column("questions", "passage_id")
+    op.drop_index("ix_passages_search_vector", table_name="passages")
+    op.drop_table("passages")
@@ -0,0 +1,46 @@
+"""add full-text search_vector to questions
+
+Revision ID: d85b6675f1ab
+Revises: 02560d168bf6
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d85b6675f1ab"
+down_revision: Union[str, Sequence[str], None] = "02560d168bf6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Columna generada: Postgres la mantiene en cada INSERT/UPDATE (también COPY).
+    op.add_column(
+        "questions",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('spanish'::regconfig, coalesce(prompt, '')), 'A') || "
+                "setweight(to_tsvector('spanish'::regconfig, coalesce(reading_text, '')), 'B') || "
+                "setweight(to_tsvector('spanish'::regconfig, coalesce(explanation, '')), 'C')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_questions_search_vector", "questions", ["search_vector"], postgresql_using="gin"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_questions_search_vector", table_name="questions")
+    op.drop_column("questions", "search_vector")
@@ -0,0 +1,38 @@
+"""user_topic_daily rollup
+
+Revision ID: f8bfe03b39eb
+Revises: 5ece9c094d1d
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f8bfe03b39eb"
+down_revision: Union[str, Sequence[str], None] = "5ece9c094d1d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_topic_daily",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("topic_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("answered_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("correct_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["topic_id"], ["topics.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "topic_id", "day"),
+    )
+    # Datos existentes: python -m scripts.backfill_user_topic_daily
+
+
+def downgrade() -> None:
+    op.drop_table("user_topic_daily")
@@ -0,0 +1,33 @@
+"""
+Calcula la firma MinHash (`questions.minhash`) de las preguntas que no la tienen.
+
+Las preguntas creadas por la API, imports y seeds ya guardan su firma; este
+job cubre filas cargadas por fuera (SQL directo, COPY) y, con `--all`,
+recalcula todas (por ejemplo, si cambia la normalización o NUM_PERM en
+services/near_duplicates). Los procesos de la API ven las firmas nuevas en
+la próxima reconstrucción del índice (NEAR_DUP_REBUILD_SECONDS).
+
+Ejemplo:
+    python -m scripts.backfill_minhash
+    python -m scripts.backfill_minhash --all
+"""
+
+import argparse
+
+from app.db.session import engine
+from app.services.near_duplicates import backfill_minhashes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcula questions.minhash para casi duplicados.")
+    parser.add_argument("--all", action="store_true", help="Recalcular también las que ya tienen firma")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    with engine.begin() as conn:
+        updated = backfill_minhashes(conn, batch_size=args.batch_size, all_rows=args.all)
+    print(f"✅ minhash calculado: {updated} preguntas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Reconstruye `user_progress` desde `attempt_feedback` (job one-off / reparación).
+
+Recalcula por (user, topic): respuestas, correctas, accuracy, racha actual
+(correctas consecutivas desde la última incorrecta), última actividad y
+último intento completado. Es idempotente (`ON CONFLICT DO UPDATE`), así que
+se puede re-ejecutar; conviene correrlo con poco tráfico porque reemplaza los
+contadores que `submit_answer` mantiene en línea. En la misma transacción
+incrementa `users.stats_version` de los usuarios tocados, para que el caché y
+el ETag de /users/{id}/stats no sigan sirviendo los contadores anteriores.
+
+Ejemplo:
+    python -m scripts.backfill_user_progress
+    python -m scripts.backfill_user_progress --user-id 42
+"""
+
+import argparse
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.services.progress_service import bump_stats_versions
+
+BACKFILL_SQL = """
+WITH fb AS (
+    SELECT
+        a.user_id,
+        a.topic_id,
+        f.id,
+        f.is_correct,
+        f.created_at,
+        max(f.id) FILTER (WHERE NOT f.is_correct)
+            OVER (PARTITION BY a.user_id, a.topic_id) AS last_wrong_id
+    FROM attempt_feedback f
+    JOIN attempts a ON a.id = f.attempt_id
+    WHERE a.topic_id IS NOT NULL
+      AND (CAST(:user_id AS integer) IS NULL OR a.user_id = :user_id)
+),
+agg AS (
+    SELECT
+        user_id,
+        topic_id,
+        count(*) AS answered_count,
+        count(*) FILTER (WHERE is_correct) AS correct_count,
+        count(*) FILTER (WHERE is_correct AND id > coalesce(last_wrong_id, 0)) AS streak,
+        max(created_at) AS last_activity_at
+    FROM fb
+    GROUP BY user_id, topic_id
+),
+completed AS (
+    SELECT user_id, topic_id, max(completed_at) AS completed_at
+    FROM attempts
+    WHERE status = 'completed'
+      AND topic_id IS NOT NULL
+      AND (CAST(:user_id AS integer) IS NULL OR user_id = :user_id)
+    GROUP BY user_id, topic_id
+)
+INSERT INTO user_progress (
+    user_id, topic_id, answered_count, correct_count, accuracy, streak,
+    last_activity_at, completed_at, updated_at
+)
+SELECT
+    agg.user_id,
+    agg.topic_id,
+    agg.answered_count,
+    agg.correct_count,
+    round(agg.correct_count * 100.0 / agg.answered_count),
+    agg.streak,
+    agg.last_activity_at,
+    completed.completed_at,
+    now()
+FROM agg
+LEFT JOIN completed
+    ON completed.user_id = agg.user_id AND completed.topic_id = agg.topic_id
+ON CONFLICT ON CONSTRAINT uq_progress_user_topic DO UPDATE SET
+    answered_count = EXCLUDED.answered_count,
+    correct_count = EXCLUDED.correct_count,
+    accuracy = EXCLUDED.accuracy,
+    streak = EXCLUDED.streak,
+    last_activity_at = EXCLUDED.last_activity_at,
+    completed_at = EXCLUDED.completed_at,
+    updated_at = EXCLUDED.updated_at
+RETURNING user_id
+"""
+
+
+def backfill(user_id=None) -> int:
+    db = SessionLocal()
+    try:
+        result = db.execute(text(BACKFILL_SQL), {"user_id": user_id})
+        user_ids = list(result.scalars())
+        bump_stats_versions(db, user_ids)
+        db.commit()
+        return len(user_ids)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstruye user_progress desde attempt_feedback.")
+    parser.add_argument("--user-id", type=int, default=None, help="Limitar a un usuario")
+    args = parser.parse_args(argv)
+
+    rows = backfill(args.user_id)
+    print(f"✅ user_progress reconstruido: {rows} filas (user, topic)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Reconstruye `user_topic_daily` desde `attempt_feedback` (job batch idempotente).
+
+Agrega por (user, topic, día UTC) y reemplaza los contadores con
+`ON CONFLICT DO UPDATE`, así que se puede re-ejecutar cuantas veces haga
+falta. `submit_answer` mantiene la tabla en línea; este job sirve para la
+carga inicial y para reconciliar una ventana reciente (`--since-days`) desde
+un cron. Incrementa `users.stats_version` de los usuarios tocados en la misma
+transacción (invalida el caché de stats).
+
+Ejemplo:
+    python -m scripts.backfill_user_topic_daily
+    python -m scripts.backfill_user_topic_daily --since-days 2
+    python -m scripts.backfill_user_topic_daily --user-id 42
+"""
+
+import argparse
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.services.progress_service import bump_stats_versions
+
+BACKFILL_SQL = """
+INSERT INTO user_topic_daily (user_id, topic_id, day, answered_count, correct_count)
+SELECT
+    a.user_id,
+    a.topic_id,
+    CAST(f.created_at AT TIME ZONE 'UTC' AS date) AS day,
+    count(*),
+    count(*) FILTER (WHERE f.is_correct)
+FROM attempt_feedback f
+JOIN attempts a ON a.id = f.attempt_id
+WHERE a.topic_id IS NOT NULL
+  AND (CAST(:user_id AS integer) IS NULL OR a.user_id = :user_id)
+  AND (
+      CAST(:since_days AS integer) IS NULL
+      OR f.created_at >= CAST(CAST(now() AT TIME ZONE 'UTC' AS date) - CAST(:since_days AS integer) AS timestamp)
+          AT TIME ZONE 'UTC'
+  )
+GROUP BY a.user_id, a.topic_id, day
+ON CONFLICT (user_id, topic_id, day) DO UPDATE SET
+    answered_count = EXCLUDED.answered_count,
+    correct_count = EXCLUDED.correct_count
+RETURNING user_id
+"""
+
+
+def backfill(user_id=None, since_days=None) -> int:
+    db = SessionLocal()
+    try:
+        result = db.execute(text(BACKFILL_SQL), {"user_id": user_id, "since_days": since_days})
+        user_ids = list(result.scalars())
+        bump_stats_versions(db, user_ids)
+        db.commit()
+        return len(user_ids)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstruye user_topic_daily desde attempt_feedback.")
+    parser.add_argument("--user-id", type=int, default=None, help="Limitar a un usuario")
+    parser.add_argument(
+        "--since-days",
+        type=int,
+        default=None,
+        help="Solo re-agregar los últimos N días (UTC) además del día actual",
+    )
+    args = parser.parse_args(argv)
+
+    rows = backfill(args.user_id, args.since_days)
+    print(f"✅ user_topic_daily reconstruido: {rows} filas (user, topic, día)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+Micro-benchmark de endpoints (in-process, vía ASGI) con presupuestos.
+
+Recorre los routers (quiz, questions, analytics, catalog, users, auth, ai) con
+`httpx.ASGITransport` contra la DB local seed-eada y, por endpoint, registra:
+- tiempo de pared (p50/p95 en ms)
+- cantidad de statements SQL ejecutados por request
+- memoria asignada (peak de tracemalloc por request, en KB)
+
+Los presupuestos viven en `scripts/bench_budgets.json` (versionado). Si un
+endpoint excede su presupuesto de queries, latencia o memoria, el script
+termina con código 1 (apto para CI).
+
+Los casos que escriben (respuestas, feedback de IA) corren con un usuario
+desechable que se crea al empezar y se borra al final (con sus intentos y
+rollups, por cascada): no tocan las stats del usuario demo. Antes de cada
+iteración de `quiz.submit_answer` se abre un intento nuevo, así se mide
+siempre el registro de una respuesta y no el camino de duplicado.
+
+Requisitos: DB migrada + seed_paes.py + seed_questions.py + seed_user.py.
+
+Ejemplo:
+    python -m scripts.bench_endpoints --iterations 30
+    python -m scripts.bench_endpoints --only catalog --json bench_output.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+from sqlalchemy import delete, event, select, update
+
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.db.models import Attempt, Exam, Question, QuestionChoice, Subject, Topic, User
+from app.db.session import SessionLocal, engine
+from app.main import app
+
+DEFAULT_BUDGETS = Path(__file__).with_name("bench_budgets.json")
+
+
+class StatementCounter:
+    """Cuenta statements SQL emitidos por el engine (todas las threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.count += 1
+
+    def reset(self) -> int:
+        with self._lock:
+            value, self.count = self.count, 0
+        return value
+
+
+def load_fixtures() -> dict:
+    """Resuelve ids reales de la DB seed-eada para parametrizar los requests."""
+    db = SessionLocal()
+    try:
+        user = db.scalar(select(User).where(User.email == settings.DEMO_EMAIL))
+        if not user or not user.is_admin:
+            raise SystemExit("Usuario demo admin no encontrado. Ejecuta seed_user.py primero.")
+
+        exam = db.scalar(select(Exam).where(Exam.code == settings.PAES_CODE))
+        if not exam:
+            raise SystemExit(f"{settings.PAES_CODE} exam no encontrado. Ejecuta seed_paes.py primero.")
+
+        row = db.execute(
+            select(Subject.id, Subject.code, Topic.id, Topic.code, Question.id)
+            .join(Topic, Topic.subject_id == Subject.id)
+            .join(Question, Question.topic_id == Topic.id)
+            .where(Subject.exam_id == exam.id, Question.is_active == True)  # noqa: E712
+            .order_by(Question.id.asc())
+            .limit(1)
+        ).first()
+        if not row:
+            raise SystemExit("No hay preguntas activas. Ejecuta seed_questions.py primero.")
+        subject_id, subject_code, topic_id, topic_code, question_id = row
+
+        choice_id = db.scalar(
+            select(QuestionChoice.id)
+            .where(QuestionChoice.question_id == question_id)
+            .order_by(QuestionChoice.label.asc())
+        )
+
+        return {
+            "user_id": user.id,
+            "email": user.email,
+            "token": create_access_token(user.id),
+            "exam_id": exam.id,
+            "subject_id": subject_id,
+            "subject_code": subject_code,
+            "topic_id": topic_id,
+            "topic_code": topic_code,
+            "question_id": question_id,
+            "choice_id": choice_id,
+        }
+    finally:
+        db.close()
+
+
+def create_bench_user() -> int:
+    """Usuario desechable para los casos que escriben; ver `delete_bench_user`."""
+    db = SessionLocal()
+    try:
+        user = User(email=f"bench-{uuid.uuid4().hex[:12]}@bench.local", name="Bench", is_active=True)
+        db.add(user)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def delete_bench_user(user_id: int) -> None:
+    """Borra el usuario bench; intentos, feedback y rollups caen por ON DELETE CASCADE."""
+    db = SessionLocal()
+    try:
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+    finally:
+        db.close()
+
+
+def open_fresh_attempt(fx: dict) -> None:
+    """Cierra el intento en curso del usuario bench y abre uno vacío."""
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(Attempt)
+            .where(Attempt.user_id == fx["bench_user_id"], Attempt.status == "in_progress")
+            .values(status="completed", completed_at=datetime.utcnow())
+        )
+        db.add(
+            Attempt(
+                user_id=fx["bench_user_id"],
+                exam_id=fx["exam_id"],
+                subject_id=fx["subject_id"],
+                topic_id=fx["topic_id"],
+                status="in_progress",
+                started_at=datetime.utcnow(),
+                total_questions=0,
+                correct_count=0,
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_cases(fx: dict) -> list[dict]:
+    """Casos de benchmark. `name` es la llave en el archivo de presupuestos."""
+    answer_payload = {
+        "subject_code": fx["subject_code"],
+        "topic_code": fx["topic_code"],
+        "question_id": fx["question_id"],
+        "selected_choice_id": fx["choice_id"],
+    }
+    bulk_payload = {
+        "dry_run": True,
+        "questions": [
+            {
+                "subject_code": fx["subject_code"],
+                "topic_code": fx["topic_code"],
+                "prompt": "Pregunta de benchmark (dry run)",
+                "difficulty": 1,
+                "choices": [{"label": label, "text": f"Opción {label}"} for label in "ABCD"],
+                "correct_choice": "A",
+            }
+        ],
+    }
+    bench_headers = {"Authorization": f"Bearer {fx['bench_token']}"}
+    return [
+        {"name": "auth.login", "method": "POST", "url": "/api/v1/auth/login", "json": {"email": fx["email"]}},
+        {"name": "auth.me", "method": "GET", "url": "/api/v1/auth/me"},
+        {"name": "catalog.get_exams", "method": "GET", "url": "/api/v1/catalog/exams/"},
+        {"name": "catalog.get_subjects", "method": "GET", "url": f"/api/v1/catalog/subjects/?exam_id={fx['exam_id']}"},
+        {"name": "catalog.get_topics", "method": "GET", "url": f"/api/v1/catalog/topics/?subject_id={fx['subject_id']}"},
+        {"name": "catalog.get_catalog_tree", "method": "GET", "url": "/api/v1/catalog/tree"},
+        {
+            "name": "quiz.next_question",
+            "method": "GET",
+            "url": f"/api/v1/quiz/next-question?subject_code={fx['subject_code']}&topic_code={fx['topic_code']}",
+        },
+        {
+            "name": "quiz.submit_answer",
+            "method": "POST",
+            "url": "/api/v1/quiz/answer",
+            "json": answer_payload,
+            "headers": bench_headers,
+            "prepare": lambda: open_fresh_attempt(fx),
+        },
+        {"name": "users.user_stats", "method": "GET", "url": f"/api/v1/users/{fx['user_id']}/stats"},
+        {"name": "users.user_ranking", "method": "GET", "url": f"/api/v1/users/{fx['user_id']}/ranking"},
+        {"name": "users.user_daily_progress", "method": "GET", "url": f"/api/v1/users/{fx['user_id']}/progress/daily"},
+        {
+            "name": "ai.ai_feedback",
+            "method": "GET",
+            "url": "/api/v1/ai/feedback/{feedback_id}",
+            "headers": bench_headers,
+        },
+        {
+            "name": "ai.ai_attempt_feedback",
+            "method": "GET",
+            "url": "/api/v1/ai/feedback?attempt_id={attempt_id}",
+            "headers": bench_headers,
+        },
+        {"name": "questions.create_questions_bulk_dry_run", "method": "POST", "url": "/api/v1/questions/bulk", "json": bulk_payload},
+        {"name": "questions.list_recent_questions", "method": "GET", "url": "/api/v1/questions/recent?limit=10"},
+        {
+            "name": "questions.list_questions",
+            "method": "GET",
+            "url": f"/api/v1/questions/?subject_code={fx['subject_code']}&topic_code={fx['topic_code']}&limit=50",
+        },
+        {"name": "questions.search_questions", "method": "GET", "url": "/api/v1/questions/search?q=texto&limit=20"},
+        {
+            "name": "analytics.question_analytics",
+            "method": "GET",
+            "url": f"/api/v1/analytics/questions?subject_code={fx['subject_code']}&topic_code={fx['topic_code']}&limit=50",
+        },
+        {"name": "analytics.topic_analytics", "method": "GET", "url": "/api/v1/analytics/topics"},
+    ]
+
+
+async def run_case(client: httpx.AsyncClient, case: dict, counter: StatementCounter, iterations: int) -> dict:
+    timings: list[float] = []
+    statements: list[int] = []
+    allocations: list[int] = []
+    status_code = None
+
+    for i in range(iterations + 1):
+        if "prepare" in case:
+            case["prepare"]()
+        counter.reset()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        response = await client.request(
+            case["method"], case["url"], json=case.get("json"), headers=case.get("headers")
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        n_statements = counter.reset()
+        status_code = response.status_code
+
+        # La primera iteración calienta caches/pool y no se mide.
+        if i == 0:
+            continue
+        timings.append(elapsed_ms)
+        statements.append(n_statements)
+        allocations.append(max(0, peak - base))
+
+    timings.sort()
+    p95_index = max(0, int(round(0.95 * len(timings))) - 1)
+    return {
+        "name": case["name"],
+        "status": status_code,
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[p95_index], 2),
+        "queries": max(statements),
+        "alloc_kb": round(max(allocations) / 1024, 1),
+    }
+
+
+def check_budget(result: dict, budgets: dict) -> list[str]:
+    budget = {**budgets.get("defaults", {}), **budgets.get("endpoints", {}).get(result["name"], {})}
+    violations = []
+    if result["status"] >= 400:
+        violations.append(f"status={result['status']}")
+    if "max_queries" in budget and result["queries"] > budget["max_queries"]:
+        violations.append(f"queries={result['queries']} > {budget['max_queries']}")
+    if "p95_ms" in budget and result["p95_ms"] > budget["p95_ms"]:
+        violations.append(f"p95={result['p95_ms']}ms > {budget['p95_ms']}ms")
+    if "max_alloc_kb" in budget and result["alloc_kb"] > budget["max_alloc_kb"]:
+        violations.append(f"alloc={result['alloc_kb']}KB > {budget['max_alloc_kb']}KB")
+    return violations
+
+
+async def run(args) -> int:
+    budgets = json.loads(Path(args.budgets).read_text(encoding="utf-8"))
+    fixtures = load_fixtures()
+    fixtures["bench_user_id"] = create_bench_user()
+    fixtures["bench_token"] = create_access_token(fixtures["bench_user_id"])
+
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    tracemalloc.start()
+
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {fixtures['token']}"}
+    results = []
+    failed = False
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            # Garantiza un feedback_id (y su attempt) real del usuario bench para los endpoints de IA.
+            cases = build_cases(fixtures)
+            answer_case = next(c for c in cases if c["name"] == "quiz.submit_answer")
+            response = await client.post(
+                answer_case["url"], json=answer_case["json"], headers=answer_case["headers"]
+            )
+            response.raise_for_status()
+            feedback_id = response.json()["feedback_id"]
+            attempt_id = response.json()["attempt_id"]
+
+            for case in cases:
+                if args.only and not any(case["name"].startswith(prefix) for prefix in args.only):
+                    continue
+                case["url"] = case["url"].replace("{feedback_id}", str(feedback_id))
+                case["url"] = case["url"].replace("{attempt_id}", str(attempt_id))
+                result = await run_case(client, case, counter, args.iterations)
+                result["violations"] = check_budget(result, budgets)
+                failed = failed or bool(result["violations"])
+                results.append(result)
+    finally:
+        tracemalloc.stop()
+        event.remove(engine, "before_cursor_execute", counter)
+        delete_bench_user(fixtures["bench_user_id"])
+
+    print(f"{'endpoint':45} {'status':>6} {'p50ms':>8} {'p95ms':>8} {'queries':>8} {'allocKB':>9}")
+    for r in results:
+        mark = "FAIL " + "; ".join(r["violations"]) if r["violations"] else "ok"
+        print(
+            f"{r['name']:45} {r['status']:>6} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+            f"{r['queries']:>8} {r['alloc_kb']:>9}  {mark}"
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    return 1 if failed else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark in-process de endpoints con presupuestos.")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--budgets", default=str(DEFAULT_BUDGETS))
+    parser.add_argument("--only", action="append", help="Prefijo de caso (ej: catalog, quiz.next_question)")
+    parser.add_argument("--json", help="Ruta donde escribir los resultados en JSON")
+    args = parser.parse_args(argv)
+    if args.iterations < 1:
+        parser.error("--iterations debe ser >= 1")
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,317 @@
+"""
+Generador de datos a escala para benchmarks (índices, queries, endpoints).
+
+Llena `users`, `questions`, `question_choices`, `attempts` y `attempt_feedback`
+con volúmenes configurables usando `COPY ... FROM STDIN` en chunks (streaming),
+en vez de INSERTs fila a fila como `seed_questions.py`.
+
+- Determinista: mismo `--seed` + mismos volúmenes => mismos datos.
+- No deduplica: está pensado para una DB de benchmark, no para producción.
+- Requiere el catálogo (exam/subjects/topics). Ejecutar después de seed_paes.py.
+
+Ejemplo:
+    python -m scripts.generate_scale_data \\
+        --questions 100000 --users 200000 --attempts 2000000 --feedback 50000000
+"""
+
+import argparse
+import random
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.models import Exam, Subject, Topic
+from app.db.session import SessionLocal, engine
+from app.services.content_hash import backfill_content_hashes
+from app.services.near_duplicates import backfill_minhashes
+
+LABELS = ("A", "B", "C", "D")
+
+# Segundos promedio entre respuestas dentro de un intento.
+ANSWER_GAP_SECONDS = 45
+
+WORDS = (
+    "función", "ecuación", "texto", "autor", "proceso", "gráfico", "valor",
+    "célula", "energía", "territorio", "período", "argumento", "variable",
+    "ángulo", "reacción", "fuerza", "región", "idea", "dato", "modelo",
+    "conjunto", "probabilidad", "fuente", "contexto", "sistema", "razón",
+)
+
+
+def _ts(value: datetime) -> str:
+    return value.isoformat()
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def _next_id(cur, table: str) -> int:
+    cur.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+    return int(cur.fetchone()[0])
+
+
+def _sync_sequence(cur, table: str) -> None:
+    cur.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+        f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+    )
+
+
+def _copy_rows(cur, table: str, columns: tuple, lines, chunk_size: int) -> int:
+    """
+    Escribe líneas ya formateadas (text format de COPY) en chunks.
+
+    `lines` es un iterable/generador: nunca se materializa la tabla completa.
+    """
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    written = 0
+    buffer: list[str] = []
+    with cur.copy(sql) as copy:
+        for line in lines:
+            buffer.append(line)
+            if len(buffer) >= chunk_size:
+                copy.write("\n".join(buffer) + "\n")
+                written += len(buffer)
+                buffer.clear()
+        if buffer:
+            copy.write("\n".join(buffer) + "\n")
+            written += len(buffer)
+    return written
+
+
+def _load_topics(db):
+    exam = db.scalar(select(Exam).where(Exam.code == settings.PAES_CODE))
+    if not exam:
+        raise SystemExit(f"{settings.PAES_CODE} exam no encontrado. Ejecuta seed_paes.py primero.")
+
+    rows = db.execute(
+        select(Topic.id, Topic.subject_id)
+        .join(Subject, Subject.id == Topic.subject_id)
+        .where(Subject.exam_id == exam.id)
+        .order_by(Topic.id.asc())
+    ).all()
+    if not rows:
+        raise SystemExit("No hay topics en el catálogo. Ejecuta seed_paes.py primero.")
+    return exam.id, [(r.id, r.subject_id) for r in rows]
+
+
+def generate(args) -> None:
+    if args.attempts and not args.users:
+        raise SystemExit("--attempts requiere --users > 0")
+    if args.feedback and not (args.attempts and args.questions):
+        raise SystemExit("--feedback requiere --attempts > 0 y --questions > 0")
+
+    rng = random.Random(args.seed)
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    window = timedelta(days=args.days).total_seconds()
+
+    db = SessionLocal()
+    try:
+        exam_id, topics = _load_topics(db)
+    finally:
+        db.close()
+
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection
+        with conn.cursor() as cur:
+            user_base = _next_id(cur, "users")
+            question_base = _next_id(cur, "questions")
+            choice_base = _next_id(cur, "question_choices")
+            attempt_base = _next_id(cur, "attempts")
+            feedback_base = _next_id(cur, "attempt_feedback")
+
+            # Estado compacto (arrays de C) para que los intentos/feedback
+            # referencien preguntas y choices válidos sin volver a la DB.
+            question_topic_idx = array("H")
+            question_correct = bytearray()
+            questions_by_topic: list[array] = [array("I") for _ in topics]
+
+            started = time.perf_counter()
+
+            #  Users
+            def user_lines():
+                for i in range(args.users):
+                    uid = user_base + i
+                    created = _ts(now - timedelta(seconds=rng.random() * window))
+                    yield f"{uid}\tbench{uid}@example.com\tBench User {uid}\tt\tf\t{created}\t{created}"
+
+            n = _copy_rows(
+                cur, "users",
+                ("id", "email", "name", "is_active", "is_admin", "created_at", "updated_at"),
+                user_lines(), args.chunk_size,
+            )
+            print(f"users: {n} filas")
+
+            #  Questions
+            def question_lines():
+                for i in range(args.questions):
+                    t_idx = rng.randrange(len(topics))
+                    question_topic_idx.append(t_idx)
+                    question_correct.append(rng.randrange(4))
+                    questions_by_topic[t_idx].append(i)
+                    qid = question_base + i
+                    prompt = f"[BENCH {qid}] ¿{_sentence(rng, rng.randint(6, 18))}?"
+                    explanation = _sentence(rng, rng.randint(8, 24))
+                    difficulty = rng.randint(1, 3)
+                    is_active = "t" if rng.random() < 0.95 else "f"
+                    created = _ts(now - timedelta(seconds=rng.random() * window))
+                    yield (
+                        f"{qid}\t{topics[t_idx][0]}\t{prompt}\t{explanation}\t{difficulty}"
+                        f"\tmcq\t{is_active}\t{created}"
+                    )
+
+            n = _copy_rows(
+                cur, "questions",
+                ("id", "topic_id", "prompt", "explanation", "difficulty",
+                 "question_type", "is_active", "created_at"),
+                question_lines(), args.chunk_size,
+            )
+            print(f"questions: {n} filas")
+
+            #  Choices (4 por pregunta, ids contiguos)
+            def choice_lines():
+                for i in range(args.questions):
+                    qid = question_base + i
+                    correct = question_correct[i]
+                    for k, label in enumerate(LABELS):
+                        cid = choice_base + i * 4 + k
+                        is_correct = "t" if k == correct else "f"
+                        yield f"{cid}\t{qid}\t{label}\t{_sentence(rng, rng.randint(2, 8))}\t{is_correct}"
+
+            n = _copy_rows(
+                cur, "question_choices",
+                ("id", "question_id", "label", "text", "is_correct"),
+                choice_lines(), args.chunk_size,
+            )
+            print(f"question_choices: {n} filas")
+
+            #  Attempts
+            # Se reparten las filas de feedback entre intentos de forma exacta
+            # (base + resto), acotado por la cantidad de preguntas del tópico.
+            attempt_topic_idx = array("H")
+            attempt_answers = array("I")
+            attempt_correct = array("I")
+            attempt_started = array("d")
+
+            topics_with_questions = [i for i, qs in enumerate(questions_by_topic) if qs] or list(range(len(topics)))
+            per_attempt, remainder = divmod(args.feedback, args.attempts) if args.attempts else (0, 0)
+
+            def attempt_lines():
+                for i in range(args.attempts):
+                    aid = attempt_base + i
+                    uid = user_base + rng.randrange(args.users)
+                    t_idx = rng.choice(topics_with_questions)
+                    topic_id, subject_id = topics[t_idx]
+                    answers = min(per_attempt + (1 if i < remainder else 0), len(questions_by_topic[t_idx]))
+                    correct = sum(1 for _ in range(answers) if rng.random() < 0.6)
+                    start = now - timedelta(seconds=rng.random() * window)
+
+                    attempt_topic_idx.append(t_idx)
+                    attempt_answers.append(answers)
+                    attempt_correct.append(correct)
+                    attempt_started.append(start.timestamp())
+
+                    if answers and rng.random() < 0.8:
+                        status = "completed"
+                        completed = _ts(start + timedelta(seconds=answers * ANSWER_GAP_SECONDS))
+                        score = str(int(correct / answers * 1000))
+                    else:
+                        status, completed, score = "in_progress", "\\N", "\\N"
+
+                    yield (
+                        f"{aid}\t{uid}\t{exam_id}\t{subject_id}\t{topic_id}\t{status}\t{_ts(start)}"
+                        f"\t{completed}\t{answers}\t{correct}\t{score}"
+                    )
+
+            n = _copy_rows(
+                cur, "attempts",
+                ("id", "user_id", "exam_id", "subject_id", "topic_id", "status", "started_at",
+                 "completed_at", "total_questions", "correct_count", "score"),
+                attempt_lines(), args.chunk_size,
+            )
+            print(f"attempts: {n} filas")
+
+            #  Attempt feedback
+            def feedback_lines():
+                fid = feedback_base
+                for i in range(args.attempts):
+                    answers = attempt_answers[i]
+                    if not answers:
+                        continue
+                    aid = attempt_base + i
+                    pool = questions_by_topic[attempt_topic_idx[i]]
+                    picked = rng.sample(range(len(pool)), answers)
+                    correct = attempt_correct[i]
+                    start = attempt_started[i]
+                    for j, pool_idx in enumerate(picked):
+                        q_idx = pool[pool_idx]
+                        right = question_correct[q_idx]
+                        is_correct = j < correct
+                        chosen = right if is_correct else (right + rng.randint(1, 3)) % 4
+                        created = datetime.fromtimestamp(start + j * ANSWER_GAP_SECONDS, tz=timezone.utc)
+                        yield (
+                            f"{fid}\t{aid}\t{question_base + q_idx}\t{choice_base + q_idx * 4 + chosen}"
+                            f"\t{'t' if is_correct else 'f'}\t{'¡Correcto!' if is_correct else 'Incorrecto'}"
+                            f"\t{{}}\t{_ts(created)}"
+                        )
+                        fid += 1
+
+            n = _copy_rows(
+                cur, "attempt_feedback",
+                ("id", "attempt_id", "question_id", "selected_choice_id", "is_correct",
+                 "feedback_text", "ai_payload", "created_at"),
+                feedback_lines(), args.chunk_size,
+            )
+            print(f"attempt_feedback: {n} filas")
+
+            for table in ("users", "questions", "question_choices", "attempts", "attempt_feedback"):
+                _sync_sequence(cur, table)
+
+        conn.commit()
+
+        # content_hash y minhash se completan después (necesitan las alternativas ya cargadas)
+        with engine.begin() as sa_conn:
+            hashed, _ = backfill_content_hashes(sa_conn, batch_size=5000)
+            signed = backfill_minhashes(sa_conn, batch_size=5000)
+        print(f"content_hash: {hashed} preguntas, minhash: {signed} preguntas")
+
+        if not args.skip_analyze:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                for table in ("users", "questions", "question_choices", "attempts", "attempt_feedback"):
+                    cur.execute(f"ANALYZE {table}")
+
+        print(f" Datos de benchmark generados en {time.perf_counter() - started:.1f}s (seed={args.seed})")
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Genera datos a escala vía COPY FROM STDIN.")
+    parser.add_argument("--questions", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--attempts", type=int, default=100_000)
+    parser.add_argument("--feedback", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=365, help="Ventana temporal de los datos generados")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Filas por write() de COPY")
+    parser.add_argument("--skip-analyze", action="store_true")
+    args = parser.parse_args(argv)
+    for name in ("questions", "users", "attempts", "feedback"):
+        if getattr(args, name) < 0:
+            parser.error(f"--{name} debe ser >= 0")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size debe ser >= 1")
+    return args
+
+
+if __name__ == "__main__":
+    generate(parse_args())
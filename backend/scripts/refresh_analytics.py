@@ -0,0 +1,33 @@
+"""
+Refresca las vistas materializadas de analítica admin (ver services/analytics).
+
+Pensado para un cron; cada vista se refresca CONCURRENTLY, así los
+endpoints `/analytics` siguen leyendo la versión anterior mientras tanto.
+`--blocking` usa REFRESH sin CONCURRENTLY: más rápido, pero bloquea las
+lecturas de la vista mientras corre.
+
+Ejemplo:
+    python -m scripts.refresh_analytics
+    # cron cada 15 minutos
+    */15 * * * * cd /app/backend && python -m scripts.refresh_analytics
+"""
+
+import argparse
+
+from app.db.session import engine
+from app.services.analytics import refresh_analytics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresca las vistas materializadas de analítica.")
+    parser.add_argument("--blocking", action="store_true", help="REFRESH sin CONCURRENTLY")
+    args = parser.parse_args(argv)
+
+    with engine.connect() as conn:
+        timings = refresh_analytics(conn, concurrently=not args.blocking)
+    for name, seconds in timings.items():
+        print(f"✅ {name} refrescada en {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import select
+from sqlalchemy import select, update
 from app.core.config import settings
 from app.db.session import SessionLocal, engine
 from app.db.base import Base
@@ -51,9 +51,11 @@ def deactivate_demo_questions(db):
         "¿Cuál es el resultado de 2 + 2?",
         "¿Cuánto es 2+2?",
     }
-    demos = db.scalars(select(Question).where(Question.prompt.in_(demo_prompts))).all()
-    for q in demos:
-        q.is_active = False
+    db.execute(
+        update(Question)
+        .where(Question.prompt.in_(demo_prompts), Question.is_active == True)  # noqa: E712
+        .values(is_active=False)
+    )
 
 def main():
     db = SessionLocal()
@@ -4,10 +4,16 @@ Por ahora solo es un modelo con preguntas simples de opción múltiple.
 Ejecutar después de seed_paes.py
 """
 
+from datetime import datetime
+
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.db.models import Exam, Subject, Topic, Question, QuestionChoice
+from app.services.content_hash import content_hash
+from app.services.near_duplicates import minhash_signature, signature_to_bytes
+from app.services.passages import resolve_passages
 
 def seed_questions():
     db = SessionLocal()
@@ -88,24 +94,36 @@ def _add_question(db, topic_id: int, prompt: str, explanation: str, choices_data
     choices_data: [("A", "texto opción", True/False), ...]
     reading_text: Texto para preguntas de comprensión lectora (opcional)
     """
-    existing = db.scalar(select(Question).where(Question.topic_id == topic_id, Question.prompt == prompt))
-    if existing:
+    # El texto de lectura se guarda una vez en `passages` y se comparte por id.
+    passage_id = resolve_passages(db, [reading_text]).get(reading_text)
+
+    # Dedupe por content_hash: ON CONFLICT sobre el índice único (content_hash, topic_id)
+    question_id = db.scalar(
+        pg_insert(Question)
+        .values(
+            topic_id=topic_id,
+            prompt=prompt,
+            explanation=explanation,
+            passage_id=passage_id,
+            difficulty=difficulty,
+            question_type="mcq",
+            is_active=True,
+            created_at=datetime.utcnow(),
+            content_hash=content_hash(
+                prompt, reading_text, [(label, text) for label, text, _ in choices_data]
+            ),
+            minhash=signature_to_bytes(
+                minhash_signature(prompt, [text for _, text, _ in choices_data])
+            ),
+        )
+        .on_conflict_do_nothing(constraint="uq_question_content_hash_topic")
+        .returning(Question.id)
+    )
+    if question_id is None:
         return
 
-    q = Question(
-        topic_id=topic_id,
-        prompt=prompt,
-        explanation=explanation,
-        reading_text=reading_text,
-        difficulty=difficulty,
-        question_type="mcq",
-        is_active=True,
-    )
-    db.add(q)
-    db.flush()
-
     for label, text, is_correct in choices_data:
-        db.add(QuestionChoice(question_id=q.id, label=label, text=text, is_correct=is_correct))
+        db.add(QuestionChoice(question_id=question_id, label=label, text=text, is_correct=is_correct))
 
 
 #  COMPETENCIA LECTORA 